@@ -1 +1,8 @@
-from infra.salign.super_aligner import SuperAligner
+# SuperAligner pulls in the whole engine, only import it when it is used
+def __getattr__(name):
+    if name == "SuperAligner":
+        from infra.salign.super_aligner import SuperAligner
+
+        return SuperAligner
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
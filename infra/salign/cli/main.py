@@ -1,5 +1,8 @@
+from infra.salign.cli.mirror import mirror
 from infra.salign.cli.solve import solve
+from infra.salign.util.get_config import CONFIG_PATH_VARIABLE, parse_setting, reload_config
 from argparse import ArgumentParser
+import os
 
 import logging
 
@@ -11,8 +14,14 @@ def main():
 
     arguments = parse_arguments()
 
+    if arguments.config is not None:
+        os.environ[CONFIG_PATH_VARIABLE] = arguments.config
+        reload_config()
+
     if arguments.command == "solve":
-        solve()
+        solve(resume=arguments.resume, config_overrides=parse_overrides(arguments.set))
+    elif arguments.command == "mirror":
+        mirror(config_overrides=parse_overrides(arguments.set))
     elif arguments.command is None:
         print("No command specified.")
 
@@ -28,8 +37,36 @@ def parse_arguments():
     )
 
     parser.add_argument('command', help='Superalignment command.')
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Resume solving from the last saved checkpoint.",
+    )
+    parser.add_argument(
+        "--config",
+        default=None,
+        help="A YAML file with settings that replace the defaults.",
+    )
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE",
+        help="Override a setting for this run, can be repeated.",
+    )
 
     argumments = parser.parse_args()
     return argumments
 
+def parse_overrides(assignments):
+    overrides = {}
+
+    for assignment in assignments:
+        name, separator, value = assignment.partition("=")
+        if not separator:
+            raise ValueError(f"Expected NAME=VALUE, got {assignment}")
+        overrides[name.strip()] = parse_setting(name.strip(), value)
+
+    return overrides
+
 main()
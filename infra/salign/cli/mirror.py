@@ -0,0 +1,5 @@
+def mirror(config_overrides=None):
+    # The solver imports the whole engine, keep it out of the CLI's startup
+    from sdk.mgo.solve import build_mirror
+
+    build_mirror(config_overrides=config_overrides)
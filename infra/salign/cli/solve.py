@@ -1,4 +1,5 @@
-from sdk.mgo.solve import run
+def solve(resume=False, config_overrides=None):
+    # The solver imports the whole engine, keep it out of the CLI's startup
+    from sdk.mgo.solve import run
 
-def solve():
-    run()
+    run(resume=resume, config_overrides=config_overrides)
@@ -0,0 +1,59 @@
+from infra.salign.util.get_config import get_config
+
+import os
+import pickle
+import tempfile
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def save_checkpoint(checkpoint, model_name, db_name):
+    """
+    Atomically write the checkpoint, so a crash mid-write leaves the previous one intact.
+    """
+    path = get_checkpoint_path(model_name, db_name)
+
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+
+    file_descriptor, temporary_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+
+    try:
+        with os.fdopen(file_descriptor, "wb") as f:
+            pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(temporary_path, path)
+    except BaseException:
+        if os.path.exists(temporary_path):
+            os.remove(temporary_path)
+        raise
+
+    logger.info(f"Checkpoint for iteration {checkpoint['iteration']} saved to {path}")
+
+
+def load_checkpoint(model_name, db_name):
+    """
+    Returns the last saved checkpoint, or None if there isn't one.
+    """
+    path = get_checkpoint_path(model_name, db_name)
+
+    if not os.path.exists(path):
+        logger.info(f"No checkpoint found at {path}")
+        return None
+
+    with open(path, "rb") as f:
+        checkpoint = pickle.load(f)
+
+    logger.info(f"Loaded checkpoint for iteration {checkpoint['iteration']} from {path}")
+
+    return checkpoint
+
+
+def get_checkpoint_path(model_name, db_name):
+    path = get_config()["checkpoint_path"]
+
+    return os.path.join(path, f"{model_name}_{db_name}_checkpoint.pkl")
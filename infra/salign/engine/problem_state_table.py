@@ -0,0 +1,120 @@
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ProblemStateTable:
+    """
+    Tracks where each problem is in the solve loop, keyed by instance_id.
+
+    A problem is frozen once one of its trajectories scores 1.0, after which it is
+    never explored again, so each iteration only pays for the problems still failing.
+    """
+
+    def __init__(self, states=None):
+        self.states = states if states is not None else {}
+
+    def add_problems(self, problems):
+        for problem in problems:
+            instance_id = problem["instance_id"]
+
+            if instance_id in self.states:
+                continue
+
+            self.states[instance_id] = {
+                "solved": problem.get("score", 0.0) >= 1.0,
+                "best_score": problem.get("score", 0.0),
+                "attempts": 0,
+                "solved_iteration": None,
+            }
+
+    def get_unsolved(self, problems):
+        return [
+            problem
+            for problem in problems
+            if not self.states[problem["instance_id"]]["solved"]
+        ]
+
+    def merge_results(self, problems, eval_results, iteration):
+        """
+        Merge the best trajectory for each explored problem back into the problem.
+
+        Returns the number of problems solved in this iteration.
+        """
+        instance_id_map = {p["instance_id"]: p for p in problems}
+
+        best_results = get_best_results(eval_results["results"])
+
+        newly_solved = 0
+
+        for instance_id, result in best_results.items():
+            assert instance_id in instance_id_map
+
+            problem = instance_id_map[instance_id]
+            state = self.states[instance_id]
+
+            state["attempts"] += 1
+
+            if result["score"] < problem.get("score", 0.0):
+                continue
+
+            # replace keys in the problem with those from the best trajectory
+            problem.update(result)
+
+            state["best_score"] = max(state["best_score"], result["score"])
+
+            if result["score"] >= 1.0 and not state["solved"]:
+                state["solved"] = True
+                state["solved_iteration"] = iteration
+                newly_solved += 1
+
+        return newly_solved
+
+    def get_solved_count(self):
+        return sum(1 for state in self.states.values() if state["solved"])
+
+    def to_dict(self):
+        return {"states": self.states}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(states=data["states"])
+
+
+def get_best_results(results):
+    """
+    Pick the highest scoring trajectory for each instance_id, preferring queries that ran.
+    """
+    best_results = {}
+
+    for result in results:
+        instance_id = result["instance_id"]
+        best = best_results.get(instance_id)
+
+        if best is None or get_result_rank(result) > get_result_rank(best):
+            best_results[instance_id] = result
+
+    return best_results
+
+
+def get_result_rank(result):
+    return (result["score"], not result.get("generated_failed", True))
+
+
+def add_instance_ids(problems):
+    """
+    Give every problem an instance_id, keeping any that are already set.
+    """
+    used_ids = {p["instance_id"] for p in problems if "instance_id" in p}
+
+    next_id = 0
+
+    for problem in problems:
+        if "instance_id" in problem:
+            continue
+
+        while next_id in used_ids:
+            next_id += 1
+
+        problem["instance_id"] = next_id
+        used_ids.add(next_id)
@@ -0,0 +1,148 @@
+from infra.salign.util.get_config import get_config
+
+import os
+import sqlite3
+import threading
+import time
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+RESULTS_INDEX_FILENAME = "results_index.sqlite"
+
+
+class ResultsIndex:
+    """
+    A small SQLite index over solver results, so plots don't have to load result files.
+
+    Holds the accuracy of every (model, database, step) and the score of every problem
+    at every step, and the warehouse score of problems explored on a local mirror. Rows
+    are replaced when a step is saved again, e.g. after a resume.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS step_accuracy (
+                model_name TEXT, db_name TEXT, step INTEGER,
+                total INTEGER, correct INTEGER, accuracy REAL, updated REAL,
+                PRIMARY KEY (model_name, db_name, step)
+            );
+            CREATE TABLE IF NOT EXISTS problem_scores (
+                model_name TEXT, db_name TEXT, step INTEGER,
+                instance_id TEXT, score REAL,
+                PRIMARY KEY (model_name, db_name, step, instance_id)
+            );
+            CREATE TABLE IF NOT EXISTS warehouse_scores (
+                model_name TEXT, db_name TEXT, step INTEGER,
+                instance_id TEXT, score REAL,
+                PRIMARY KEY (model_name, db_name, step, instance_id)
+            );
+            """
+        )
+        self.conn.commit()
+
+    def add_step(self, model_name, db_name, step, problems):
+        model_name = str(model_name)
+        db_name = str(db_name)
+
+        scores = [
+            (model_name, db_name, step, str(p["instance_id"]), p.get("score", 0.0))
+            for p in problems
+        ]
+
+        correct = sum(1 for *_, score in scores if score >= 1.0)
+        accuracy = correct / len(scores) if scores else 0.0
+
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO step_accuracy VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (model_name, db_name, step, len(scores), correct, accuracy, time.time()),
+                )
+                self.conn.execute(
+                    "DELETE FROM problem_scores WHERE model_name = ? AND db_name = ? AND step = ?",
+                    (model_name, db_name, step),
+                )
+                self.conn.executemany(
+                    "INSERT INTO problem_scores VALUES (?, ?, ?, ?, ?)", scores
+                )
+
+    def add_warehouse_scores(self, model_name, db_name, step, problems):
+        model_name = str(model_name)
+        db_name = str(db_name)
+
+        scores = [
+            (model_name, db_name, step, str(p["instance_id"]), p["warehouse_score"])
+            for p in problems
+            if "warehouse_score" in p
+        ]
+
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    "DELETE FROM warehouse_scores WHERE model_name = ? AND db_name = ? AND step = ?",
+                    (model_name, db_name, step),
+                )
+                self.conn.executemany(
+                    "INSERT INTO warehouse_scores VALUES (?, ?, ?, ?, ?)", scores
+                )
+
+    def clear_run(self, model_name, db_name):
+        with self.lock:
+            with self.conn:
+                for table in ("step_accuracy", "problem_scores", "warehouse_scores"):
+                    self.conn.execute(
+                        f"DELETE FROM {table} WHERE model_name = ? AND db_name = ?",
+                        (str(model_name), str(db_name)),
+                    )
+
+    def get_step_accuracies(self):
+        """
+        Returns (model_name, db_name, step, total, accuracy) rows ordered by run and step.
+        """
+        with self.lock:
+            return self.conn.execute(
+                "SELECT model_name, db_name, step, total, accuracy FROM step_accuracy "
+                "ORDER BY model_name, db_name, step"
+            ).fetchall()
+
+    def get_problem_scores(self, model_name, db_name, step):
+        with self.lock:
+            return dict(
+                self.conn.execute(
+                    "SELECT instance_id, score FROM problem_scores "
+                    "WHERE model_name = ? AND db_name = ? AND step = ?",
+                    (str(model_name), str(db_name), step),
+                ).fetchall()
+            )
+
+    def get_warehouse_scores(self, model_name, db_name, step):
+        with self.lock:
+            return dict(
+                self.conn.execute(
+                    "SELECT instance_id, score FROM warehouse_scores "
+                    "WHERE model_name = ? AND db_name = ? AND step = ?",
+                    (str(model_name), str(db_name), step),
+                ).fetchall()
+            )
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def get_results_index_path(results_dir=None):
+    if results_dir is None:
+        results_dir = get_config()["results_path"]
+
+    return os.path.join(results_dir, RESULTS_INDEX_FILENAME)
@@ -0,0 +1,182 @@
+from infra.salign.util.get_config import get_config
+from infra.salign.util.json_serializer import json_serializer
+
+import hashlib
+import json
+import os
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Large values repeated across every problem, written once per results file
+INTERNED_KEYS = ("db_profile", "alignment_prompt")
+
+
+class ResultsStore:
+    """
+    Appends solver results for one (model, database) run as line-delimited JSON.
+
+    Each iteration only writes the problems that changed since the previous iteration,
+    with large repeated values stored once by hash, followed by a one-line summary in
+    a separate file, so readers can get accuracy without loading any problems.
+
+    `<model>_<db>_eval_deltas.jsonl` holds lines of the form
+        {"type": "blob", "hash": ..., "value": ...}
+        {"type": "problem", "step": ..., "instance_id": ..., "problem": {...}}
+    and `<model>_<db>_eval_summary.jsonl` holds
+        {"step": ..., "total": ..., "correct": ..., "accuracy": ...}
+    with "warehouse_total", "warehouse_correct" and "warehouse_accuracy" added once
+    queries generated on a local mirror were scored on the warehouse.
+    """
+
+    def __init__(self, model_name, db_name, path=None, append=False):
+        if path is None:
+            path = get_config()["results_path"]
+
+        os.makedirs(path, exist_ok=True)
+
+        self.deltas_path = os.path.join(path, f"{model_name}_{db_name}_eval_deltas.jsonl")
+        self.summary_path = os.path.join(path, f"{model_name}_{db_name}_eval_summary.jsonl")
+
+        # A new run starts new files, a resumed run keeps appending to the old ones
+        if not append:
+            for existing_path in (self.deltas_path, self.summary_path):
+                if os.path.exists(existing_path):
+                    os.remove(existing_path)
+
+        self.blob_hashes = set()
+        self.problem_digests = {}
+
+    def save(self, problems, step):
+        lines = []
+        changed = 0
+
+        for problem in problems:
+            interned = self.intern_blobs(problem, lines)
+            serialized = json.dumps(interned, default=json_serializer)
+
+            digest = hash_text(serialized)
+            instance_id = problem["instance_id"]
+
+            if self.problem_digests.get(instance_id) == digest:
+                continue
+
+            self.problem_digests[instance_id] = digest
+            changed += 1
+
+            lines.append(
+                f'{{"type": "problem", "step": {step}, "instance_id": '
+                f'{json.dumps(instance_id, default=json_serializer)}, "problem": {serialized}}}'
+            )
+
+        with open(self.deltas_path, "a") as f:
+            for line in lines:
+                f.write(line + "\n")
+
+        summary = make_summary(problems, step)
+
+        with open(self.summary_path, "a") as f:
+            f.write(json.dumps(summary) + "\n")
+
+        logger.info(
+            f"Saved {changed} changed problems of {len(problems)} to {os.path.basename(self.deltas_path)}"
+        )
+
+        return summary
+
+    def intern_blobs(self, problem, lines):
+        interned = dict(problem)
+
+        for key in INTERNED_KEYS:
+            value = problem.get(key)
+
+            if not isinstance(value, str):
+                continue
+
+            blob_hash = hash_text(value)
+
+            if blob_hash not in self.blob_hashes:
+                self.blob_hashes.add(blob_hash)
+                lines.append(
+                    json.dumps({"type": "blob", "hash": blob_hash, "value": value})
+                )
+
+            interned[key] = {"$blob": blob_hash}
+
+        return interned
+
+
+def make_summary(problems, step):
+    correct = sum(1 for p in problems if p.get("score", 0.0) >= 1.0)
+
+    summary = {
+        "step": step,
+        "total": len(problems),
+        "correct": correct,
+        "accuracy": correct / len(problems) if problems else 0.0,
+    }
+
+    warehouse_scores = [p["warehouse_score"] for p in problems if "warehouse_score" in p]
+
+    if warehouse_scores:
+        warehouse_correct = sum(1 for score in warehouse_scores if score >= 1.0)
+
+        summary["warehouse_total"] = len(warehouse_scores)
+        summary["warehouse_correct"] = warehouse_correct
+        summary["warehouse_accuracy"] = warehouse_correct / len(warehouse_scores)
+
+    return summary
+
+
+def load_summaries(summary_path):
+    """
+    Returns the per-iteration summaries, later lines for a step replace earlier ones.
+    """
+    summaries = {}
+
+    with open(summary_path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            summary = json.loads(line)
+            summaries[summary["step"]] = summary
+
+    return [summaries[step] for step in sorted(summaries)]
+
+
+def load_problems(deltas_path, step=None):
+    """
+    Replay the deltas to rebuild the problems as of `step`, or as of the last step if None.
+    """
+    blobs = {}
+    problems = {}
+
+    with open(deltas_path, "r") as f:
+        for line in f:
+            if not line.strip():
+                continue
+
+            entry = json.loads(line)
+
+            if entry["type"] == "blob":
+                blobs[entry["hash"]] = entry["value"]
+                continue
+
+            if step is not None and entry["step"] > step:
+                continue
+
+            problem = entry["problem"]
+
+            for key in INTERNED_KEYS:
+                value = problem.get(key)
+                if isinstance(value, dict) and "$blob" in value:
+                    problem[key] = blobs[value["$blob"]]
+
+            problems[entry["instance_id"]] = problem
+
+    return list(problems.values())
+
+
+def hash_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
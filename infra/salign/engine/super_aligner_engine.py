@@ -1,16 +1,25 @@
+from infra.salign.engine.checkpoint import load_checkpoint, save_checkpoint
+from infra.salign.engine.problem_state_table import ProblemStateTable, add_instance_ids
+from infra.salign.engine.results_index import ResultsIndex, get_results_index_path
+from infra.salign.engine.results_store import ResultsStore
+
+from infra.salign.superalignment.add_reference_results import add_reference_results
 from infra.salign.superalignment.explore_trajectories import explore_trajectories
 from infra.salign.superalignment.gather_learnings import gather_learnings
 from infra.salign.superalignment.synthesize_insights import synthesize_insights
 from infra.salign.superalignment.set_score import set_score
+from infra.salign.superalignment.score_on_warehouse import score_on_warehouse
+from infra.salign.superalignment.use_local_mirror import use_local_mirror
 
-from infra.salign.util.get_config import get_config
-from infra.salign.util.get_inference_api_url import get_inference_api_url
+from infra.salign.sql.query_result_cache import get_query_cache_stats
 
-import copy
-import json
-import os
+from infra.salign.inference.inference_gateway import get_completion_cache_stats
+
+from infra.salign.util.derive_example import derive_example
+from infra.salign.util.get_config import get_config, override_config
+from infra.salign.util.get_inference_api_url import get_inference_api_url
 
-from decimal import Decimal
+import random
 
 import logging
 
@@ -18,13 +27,15 @@ logger = logging.getLogger(__name__)
 
 
 class SuperAlignerEngine:
-    def __init__(self, llm=None):
+    def __init__(self, llm=None, config_overrides=None):
         self.database = None
         self.query_logs = []
         self.problems = []
         self.reasoners = []
         self.llm = llm
         self.alignment_prompt = ""
+        self.problem_states = ProblemStateTable()
+        self.config_overrides = dict(config_overrides or {})
 
         if self.llm is None:
             self.llm = get_base_llm()
@@ -49,15 +60,47 @@ class SuperAlignerEngine:
         self.alignment_prompt = prompt
         logger.info(f"Alignment prompt set.")
 
-    def solve(self):
+    def solve(self, resume=False):
+        # Settings for this run only, the process wide config is restored afterwards
+        with override_config(self.config_overrides):
+            return self.run_solver(resume)
+
+    def run_solver(self, resume):
 
         set_score(self.problems)
+        add_instance_ids(self.problems)
         add_alignment_prompt(self.problems, self.alignment_prompt)
 
+        self.problem_states.add_problems(self.problems)
+
+        start_iteration = 0
+
+        if resume:
+            start_iteration = self.restore_checkpoint()
+
+        if is_local_mirror_enabled():
+            # Exploration runs on local copies of the warehouse tables the problems read
+            use_local_mirror(self.problems)
+
         max_iterations = get_max_solve_iterations()
         target_accuracy = get_target_accuracy()
 
-        for iteration in range(max_iterations):
+        overall_accuracy = get_accuracy(self.problems)
+
+        results_store = ResultsStore(
+            self.llm["model_name"], self.database["db_id"], append=resume
+        )
+
+        results_index = ResultsIndex(get_results_index_path())
+        if not resume:
+            results_index.clear_run(self.llm["model_name"], self.database["db_id"])
+
+        # The step the warehouse scores are saved with, the last one the loop reached
+        last_iteration = max(start_iteration - 1, 0)
+
+        for iteration in range(start_iteration, max_iterations):
+            last_iteration = iteration
+
             logger.info(
                 f"============= Superalignment Solver Iteration {iteration} ============="
             )
@@ -65,9 +108,25 @@ class SuperAlignerEngine:
             llm = self.llm
 
             logger.info(f"Using LLM: {llm}")
-            
+
+            # Executes each reference query once, later iterations only refresh
+            # problems whose reference SQL or database changed
+            add_reference_results(self.problems)
+
+            # Solved problems are frozen, only the ones still failing are explored
+            unsolved_problems = self.problem_states.get_unsolved(self.problems)
+
+            if len(unsolved_problems) == 0:
+                overall_accuracy = get_accuracy(self.problems)
+                logger.info("All problems are solved.")
+                break
+
+            logger.info(
+                f"Exploring {len(unsolved_problems)} of {len(self.problems)} problems"
+            )
+
             eval_results = explore_trajectories(
-                make_results(self.problems), llm, self.reasoners, seed=iteration
+                make_results(unsolved_problems), llm, self.reasoners, seed=iteration
             )
 
             if len(eval_results) == 0:
@@ -76,6 +135,12 @@ class SuperAlignerEngine:
 
             logger.info(f"Eval score: {eval_results['accuracy'] * 100:.2f}%")
 
+            newly_solved = self.problem_states.merge_results(
+                self.problems, eval_results, iteration
+            )
+
+            logger.info(f"Solved {newly_solved} new problems this iteration")
+
             #learnings = gather_learnings(eval_results, llm, seed=iteration)
 
             #insights = synthesize_insights(learnings, llm, seed=iteration)
@@ -86,24 +151,75 @@ class SuperAlignerEngine:
 
             logger.info(f"Overall Eval score: {overall_accuracy * 100:.2f}%")
 
-            save_results(
-                self.problems,
-                llm["model_name"],
-                self.database["db_id"],
-                f"eval_results_{iteration}.json",
+            log_query_cache_stats()
+            log_completion_cache_stats()
+
+            results_store.save(self.problems, iteration)
+            results_index.add_step(
+                self.llm["model_name"], self.database["db_id"], iteration, self.problems
             )
 
+            self.save_checkpoint(iteration)
+
             if overall_accuracy >= target_accuracy:
                 logger.info(
                     f"Target accuracy of {target_accuracy * 100:.2f}% reached. Stopping training."
                 )
                 break
 
+        warehouse_accuracy = None
+
+        if is_local_mirror_enabled() and should_score_on_warehouse():
+            warehouse_accuracy = score_on_warehouse(self.problems)
+
+        if warehouse_accuracy is not None:
+            results_store.save(self.problems, last_iteration)
+            results_index.add_warehouse_scores(
+                self.llm["model_name"], self.database["db_id"], last_iteration, self.problems
+            )
+
+        results_index.close()
+
         logger.info("Superalignment solver process completed.")
-        logger.info(f"Final eval score: {overall_accuracy * 100:.2f}%")
+
+        if warehouse_accuracy is None:
+            logger.info(f"Final eval score: {overall_accuracy * 100:.2f}%")
+        else:
+            logger.info(f"Final eval score on the local mirror: {overall_accuracy * 100:.2f}%")
+            logger.info(f"Final eval score on the warehouse: {warehouse_accuracy * 100:.2f}%")
 
         return self.problems
 
+    def save_checkpoint(self, iteration):
+        checkpoint = {
+            "iteration": iteration,
+            "problems": self.problems,
+            "reasoners": self.reasoners,
+            "problem_states": self.problem_states.to_dict(),
+            "random_state": random.getstate(),
+        }
+
+        save_checkpoint(checkpoint, self.llm["model_name"], self.database["db_id"])
+
+    def restore_checkpoint(self):
+        """
+        Restore the state saved after the last completed iteration, returns the iteration to start from.
+        """
+        checkpoint = load_checkpoint(self.llm["model_name"], self.database["db_id"])
+
+        if checkpoint is None:
+            logger.info("Starting from the first iteration.")
+            return 0
+
+        self.problems = checkpoint["problems"]
+        self.reasoners = checkpoint["reasoners"]
+        self.problem_states = ProblemStateTable.from_dict(checkpoint["problem_states"])
+        random.setstate(checkpoint["random_state"])
+
+        logger.info(f"Resuming after iteration {checkpoint['iteration']}.")
+
+        return checkpoint["iteration"] + 1
+
 
 def get_target_accuracy():
     config = get_config()
@@ -129,25 +245,38 @@ def get_max_align_iterations():
     return config["max_align_iterations"]
 
 
-def save_results(results, model_name, db_name, suffix):
-    path = get_config()["results_path"]
+def is_local_mirror_enabled():
+    config = get_config()
+
+    return config["local_mirror_enabled"]
+
+
+def should_score_on_warehouse():
+    config = get_config()
+
+    return config["local_mirror_score_on_warehouse"]
+
+
+def log_query_cache_stats():
+    stats = get_query_cache_stats()
+
+    if not stats:
+        return
 
-    if not os.path.exists(path):
-        os.makedirs(path)
+    logger.info(
+        f"Query cache: {stats['hits']} hits ({stats['memory_hits']} memory, {stats['disk_hits']} disk), "
+        f"{stats['misses']} misses, {stats['hit_rate'] * 100:.1f}% hit rate, "
+        f"saved {stats['saved_seconds']:.1f}s of query execution"
+    )
 
-    filename = f"{model_name}_{db_name}_{suffix}"
-    full_path = os.path.join(path, filename)
-    
-    
-    with open(full_path, "w") as f:
-        json.dump(results, f, indent=4, default=decimal_serializer)
-    logger.info(f"Results saved to {filename}")
 
+def log_completion_cache_stats():
+    stats = get_completion_cache_stats()
 
-def decimal_serializer(obj):
-    if isinstance(obj, Decimal):
-        return str(obj)
-    raise TypeError("Type not serializable")
+    logger.info(
+        f"Completion cache: {stats['hits']} hits, {stats['misses']} misses, "
+        f"{stats['hit_rate'] * 100:.1f}% hit rate, {stats['evictions']} evictions"
+    )
 
 
 def get_base_llm():
@@ -179,7 +308,7 @@ def make_results(problems):
     correct_count = 0
 
     for problem in problems:
-        result = copy.deepcopy(problem)
+        result = derive_example(problem)
         if "score" not in result:
             result["score"] = 0.0  # Placeholder score
         else:
@@ -0,0 +1,325 @@
+from infra.salign.util.disk_cache import DiskCache
+from infra.salign.util.get_config import get_config
+from infra.salign.util.get_inference_api_url import get_inference_api_url
+
+import asyncio
+import concurrent.futures
+import hashlib
+import threading
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceGateway:
+    """
+    The one place the pipeline talks to the inference server.
+
+    Completions are cached on disk keyed by (model name, api url, prompt, max tokens,
+    seed), so rerunning a pipeline after a crash only generates the completions that
+    were never returned. Only cache misses are sent to the server, split into
+    sub-batches of `inference_sub_batch_size` prompts with up to
+    `max_concurrent_inference_requests` in flight at once. A failed sub-batch is
+    retried with exponential backoff, and responses come back in the same order as
+    the prompts.
+    """
+
+    def __init__(self, api_url, cache=None):
+        self.api_url = api_url
+        self.llm = get_async_llm_client(api_url)
+        self.cache = cache
+
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def generate(self, prompts, max_tokens, model_name=None, seed=None, use_cache=True):
+        if self.cache is None or not use_cache:
+            keys = [None] * len(prompts)
+            responses = [None] * len(prompts)
+        else:
+            keys = [
+                make_completion_cache_key(model_name, self.api_url, prompt, max_tokens, seed)
+                for prompt in prompts
+            ]
+            responses = [self.cache.get(key) for key in keys]
+
+        missing = [index for index, response in enumerate(responses) if response is None]
+
+        if self.cache is not None and use_cache:
+            with self.lock:
+                self.hits += len(prompts) - len(missing)
+                self.misses += len(missing)
+
+            if len(missing) < len(prompts):
+                logger.info(
+                    f"Completion cache hit for {len(prompts) - len(missing)} of {len(prompts)} prompts"
+                )
+
+        if missing:
+            run_coroutine(
+                self.generate_missing(
+                    prompts, keys, responses, missing, max_tokens, model_name
+                )
+            )
+
+        return responses
+
+    async def generate_missing(
+        self, prompts, keys, responses, missing, max_tokens, model_name
+    ):
+        """
+        Fill in responses[index] for each missing index, caching each sub-batch as it completes.
+
+        Raises the first error once every sub-batch has finished or given up, so the
+        completions that did come back are cached for the next attempt.
+        """
+        config = get_config()
+
+        sub_batch_size = max(config["inference_sub_batch_size"], 1)
+        semaphore = asyncio.Semaphore(max(config["max_concurrent_inference_requests"], 1))
+
+        async def generate_sub_batch(indices):
+            async with semaphore:
+                generated = await self.generate_with_retries(
+                    [prompts[index] for index in indices], max_tokens, model_name
+                )
+
+            for index, response in zip(indices, generated):
+                responses[index] = response
+                if keys[index] is not None:
+                    self.cache.put(keys[index], response)
+
+        errors = [
+            error
+            for error in await asyncio.gather(
+                *[
+                    generate_sub_batch(missing[start : start + sub_batch_size])
+                    for start in range(0, len(missing), sub_batch_size)
+                ],
+                return_exceptions=True,
+            )
+            if error is not None
+        ]
+
+        if errors:
+            logger.error(f"{len(errors)} inference sub-batches failed after retries")
+            raise errors[0]
+
+    async def generate_with_retries(self, prompts, max_tokens, model_name):
+        config = get_config()
+
+        max_retries = config["inference_max_retries"]
+
+        for attempt in range(max_retries + 1):
+            try:
+                responses = await self.llm.generate(
+                    prompts, model_name=model_name, max_tokens=max_tokens
+                )
+
+                if len(responses) != len(prompts):
+                    raise ValueError(
+                        f"Expected {len(prompts)} responses, got {len(responses)}"
+                    )
+
+                return responses
+
+            except Exception as e:
+                if attempt == max_retries:
+                    raise
+
+                delay = config["inference_retry_delay"] * 2**attempt
+
+                logger.warning(
+                    f"Inference request for {len(prompts)} prompts failed, retrying in {delay:.1f}s: {e}"
+                )
+
+                await asyncio.sleep(delay)
+
+    def generate_chunks(
+        self, prompts, max_tokens, chunk_size, model_name=None, seed=None, use_cache=True
+    ):
+        """
+        Yield (start index, responses) for consecutive chunks of prompts as each chunk completes.
+
+        A chunk that still fails after retries is logged and skipped, the caller gets
+        every chunk that did complete.
+        """
+        if chunk_size <= 0:
+            chunk_size = max(len(prompts), 1)
+
+        for start in range(0, len(prompts), chunk_size):
+            try:
+                responses = self.generate(
+                    prompts[start : start + chunk_size],
+                    max_tokens=max_tokens,
+                    model_name=model_name,
+                    seed=seed,
+                    use_cache=use_cache,
+                )
+            except Exception as e:
+                logger.error(
+                    f"Skipping prompts {start} to {start + chunk_size} of {len(prompts)}: {e}"
+                )
+                continue
+
+            yield start, responses
+
+    def get_stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.cache.evictions if self.cache else 0,
+            }
+
+
+def make_completion_cache_key(model_name, api_url, prompt, max_tokens, seed):
+    prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    key = repr((model_name, api_url, prompt_hash, max_tokens, seed))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def generate(prompts, max_tokens, model_name=None, api_url=None, seed=None, use_cache=True):
+    """
+    Generate one completion per prompt through the shared inference gateway.
+
+    Pass use_cache=False for sampling runs that need fresh completions.
+    """
+    return get_inference_gateway(api_url).generate(
+        prompts,
+        max_tokens=max_tokens,
+        model_name=model_name,
+        seed=seed,
+        use_cache=use_cache,
+    )
+
+
+def generate_chunks(
+    prompts,
+    max_tokens,
+    chunk_size,
+    model_name=None,
+    api_url=None,
+    seed=None,
+    use_cache=True,
+):
+    """
+    Like generate, but yields (start index, responses) per chunk so callers can
+    process early completions while later ones are still being generated.
+    """
+    return get_inference_gateway(api_url).generate_chunks(
+        prompts,
+        max_tokens=max_tokens,
+        chunk_size=chunk_size,
+        model_name=model_name,
+        seed=seed,
+        use_cache=use_cache,
+    )
+
+
+inference_gateways = {}
+llm_clients = {}
+async_llm_clients = {}
+completion_cache = None
+inference_gateways_lock = threading.Lock()
+llm_clients_lock = threading.Lock()
+
+
+def get_inference_gateway(api_url=None):
+    if api_url is None:
+        api_url = get_inference_api_url()
+
+    with inference_gateways_lock:
+        gateway = inference_gateways.get(api_url)
+
+        if gateway is None:
+            gateway = InferenceGateway(api_url, cache=get_completion_cache_locked())
+            inference_gateways[api_url] = gateway
+
+        return gateway
+
+
+def get_llm_client(api_url):
+    """
+    Get the scalarlm client for api_url, shared by every stage that talks to that server.
+    """
+    with llm_clients_lock:
+        client = llm_clients.get(api_url)
+
+        if client is None:
+            # scalarlm brings in aiohttp and more, only load it when a client is needed
+            import scalarlm
+
+            client = scalarlm.SupermassiveIntelligence(api_url=api_url)
+            llm_clients[api_url] = client
+
+        return client
+
+
+def get_async_llm_client(api_url):
+    """
+    Get the asyncio scalarlm client for api_url, it opens a session per request so any event loop can use it.
+    """
+    with llm_clients_lock:
+        client = async_llm_clients.get(api_url)
+
+        if client is None:
+            # scalarlm brings in aiohttp and more, only load it when a client is needed
+            import scalarlm
+
+            client = scalarlm.AsyncSupermassiveIntelligence(api_url=api_url)
+            async_llm_clients[api_url] = client
+
+        return client
+
+
+def run_coroutine(coroutine):
+    """
+    Run the coroutine to completion from synchronous code, even if this thread already runs an event loop.
+    """
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coroutine)
+
+    # asyncio.run can't nest, e.g. in a notebook, run the coroutine on its own loop in another thread
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, coroutine).result()
+
+
+def get_completion_cache_locked():
+    global completion_cache
+
+    config = get_config()
+
+    if not config["completion_cache_enabled"]:
+        return None
+
+    if completion_cache is None:
+        completion_cache = DiskCache(
+            config["completion_cache_path"], config["completion_cache_max_bytes"]
+        )
+
+    return completion_cache
+
+
+def get_completion_cache_stats():
+    with inference_gateways_lock:
+        gateways = list(inference_gateways.values())
+
+    stats = {"hits": 0, "misses": 0}
+
+    for gateway in gateways:
+        gateway_stats = gateway.get_stats()
+        stats["hits"] += gateway_stats["hits"]
+        stats["misses"] += gateway_stats["misses"]
+
+    lookups = stats["hits"] + stats["misses"]
+    stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+    stats["evictions"] = completion_cache.evictions if completion_cache else 0
+
+    return stats
@@ -5,7 +5,9 @@ from infra.salign.superalignment.get_insights import get_insights
 import random
 
 from infra.salign.util.get_config import get_config
+from infra.salign.util.prompt_budget import PromptBudget
 from infra.salign.util.prompt_template import PromptTemplate
+from infra.salign.util.tokenizer import count_tokens, truncate_to_tokens
 
 
 class EnglishReasoningPrompt:
@@ -13,11 +15,13 @@ class EnglishReasoningPrompt:
         return "English Reasoning"
 
     def forward(self, example, seed):
+        sections = get_budgeted_sections(example, seed)
+
         prompt = PromptTemplate().user()
 
         prompt += f"The database name is `{example['database']['db_id']}`.\n"
 
-        prompt += example["db_profile"]
+        prompt += sections["schema"]
         prompt += "\n\n"
 
         prompt += f"An analyst was asked to write a query to help answer this question: `{example['question']}`\n"
@@ -26,13 +30,13 @@ class EnglishReasoningPrompt:
 
         prompt += "\n\n"
 
-        prompt += get_evidence(example, seed=seed)
+        prompt += sections["evidence"]
 
-        alternate_queries_statement = get_alternate_queries(example, seed=seed)
+        alternate_queries_statement = sections["alternate_queries"]
 
         prompt += alternate_queries_statement
 
-        prompt += get_insights(example, seed=seed)
+        prompt += sections["insights"]
 
         prompt += (
             f"Think step by step to answer the question: `{example['question']}`.\n"
@@ -64,3 +68,52 @@ class EnglishReasoningPrompt:
         prompt += PromptTemplate().assistant()
 
         return prompt
+
+
+# Instructions, question and alignment prompt around the budgeted sections
+RESERVED_PROMPT_TOKENS = 256
+
+
+def get_budgeted_sections(example, seed):
+    """
+    Render the schema, evidence, alternate queries and insights within the prompt token budget.
+
+    Sections that fit are used as is, the others are re-rendered with fewer items (or
+    truncated, for the schema) to their share of the budget.
+    """
+    sections = {
+        "schema": example["db_profile"],
+        "evidence": get_evidence(example, seed=seed),
+        "alternate_queries": get_alternate_queries(example, seed=seed),
+        "insights": get_insights(example, seed=seed),
+    }
+
+    demands = {name: count_tokens(text) for name, text in sections.items()}
+
+    reserved_tokens = (
+        RESERVED_PROMPT_TOKENS
+        + count_tokens(example["question"]) * 2
+        + count_tokens(example["alignment_prompt"])
+    )
+
+    grants = PromptBudget.from_config().allocate(demands, reserved_tokens=reserved_tokens)
+
+    if grants["schema"] < demands["schema"]:
+        sections["schema"] = truncate_to_tokens(sections["schema"], grants["schema"])
+
+    if grants["evidence"] < demands["evidence"]:
+        sections["evidence"] = get_evidence(
+            example, seed=seed, max_tokens=grants["evidence"]
+        )
+
+    if grants["alternate_queries"] < demands["alternate_queries"]:
+        sections["alternate_queries"] = get_alternate_queries(
+            example, seed=seed, max_tokens=grants["alternate_queries"]
+        )
+
+    if grants["insights"] < demands["insights"]:
+        sections["insights"] = get_insights(
+            example, seed=seed, max_tokens=grants["insights"]
+        )
+
+    return sections
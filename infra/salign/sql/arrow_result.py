@@ -0,0 +1,61 @@
+def read_arrow_table(batches, column_names, max_rows):
+    """
+    The first max_rows rows of a result as one Arrow table, reading only the batches needed.
+
+    `batches` yields Arrow tables or record batches, `column_names` names the columns of an empty result.
+    """
+    import pyarrow as pa
+
+    tables = []
+    row_count = 0
+
+    for batch in batches:
+        if isinstance(batch, pa.RecordBatch):
+            batch = pa.Table.from_batches([batch])
+
+        if row_count + batch.num_rows > max_rows:
+            batch = batch.slice(0, max_rows - row_count)
+
+        tables.append(batch)
+        row_count += batch.num_rows
+
+        if row_count >= max_rows:
+            break
+
+    if not tables:
+        # An empty result has no batches, but still has column names
+        return pa.table([pa.array([], type=pa.null()) for _ in column_names], names=column_names)
+
+    return pa.concat_tables(tables)
+
+
+def convert_arrow_columns(table):
+    """
+    Python values column by column, matching convert_decimals_to_floats: decimals as floats,
+    dates and times as ISO strings. Decimals and dates are converted by Arrow kernels.
+    """
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    columns = []
+
+    for column in table.columns:
+        column_type = column.type
+
+        if pa.types.is_decimal(column_type):
+            values = pc.cast(column, pa.float64()).to_pylist()
+        elif pa.types.is_date(column_type):
+            # Arrow formats dates as YYYY-MM-DD, the same as date.isoformat()
+            values = pc.cast(column, pa.string()).to_pylist()
+        elif pa.types.is_timestamp(column_type) or pa.types.is_time(column_type):
+            # Arrow's string cast differs from isoformat() in separators and fractions
+            values = [
+                value.isoformat() if value is not None else None
+                for value in column.to_pylist()
+            ]
+        else:
+            values = column.to_pylist()
+
+        columns.append(values)
+
+    return columns
@@ -0,0 +1,367 @@
+from infra.salign.sql.connection_pool import close_connection_pool
+from infra.salign.sql.database_adapter import quote_identifier
+from infra.salign.sql.rewrite_query import (
+    IDENTIFIER,
+    get_database_qualifier_pattern,
+    get_sql_dialect,
+    is_same_name,
+)
+
+from infra.salign.util.get_config import get_config
+from infra.salign.util.get_db_adapter_from_config import get_db_adapter_from_config
+
+import hashlib
+import json
+import os
+import re
+import time
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Databases that are already local files, mirroring them gains nothing
+LOCAL_DATABASE_TYPES = ("sqlite", "duckdb")
+
+# Rows per insert when the warehouse driver can't hand out Arrow batches
+EXTRACT_BATCH_ROWS = 10000
+
+
+def build_local_mirror(database, queries, mirror_path=None, sample_rows=None):
+    """
+    Copy the warehouse tables that queries read into a local DuckDB file, and return
+    the database for it.
+
+    Each table is extracted in full, or sampled down to sample_rows rows. A table is
+    only extracted again once the warehouse changed, or with a different sample size.
+    Queries against the mirror are still written for the warehouse, `MGO."SALES".ORDERS`
+    names the mirrored table and the SQL is transpiled when sqlglot is installed.
+    """
+    config = get_config()
+
+    if mirror_path is None:
+        mirror_path = get_mirror_path(database)
+
+    if sample_rows is None:
+        sample_rows = config["local_mirror_sample_rows"]
+
+    mirror_database = get_mirror_database(database, mirror_path)
+
+    table_names = get_referenced_tables_in_queries(queries, database)
+
+    db_adapter = get_db_adapter_from_config(database)
+    source_version = repr(db_adapter.get_database_version(database))
+
+    manifest = load_manifest(mirror_path)
+
+    stale_tables = [
+        table_name
+        for table_name in table_names
+        if not is_current_table(
+            manifest.get(get_table_key(table_name)), source_version, sample_rows
+        )
+    ]
+
+    if len(stale_tables) == 0 and os.path.exists(mirror_path):
+        logger.info(f"Local mirror {mirror_path} is up to date, {len(table_names)} tables.")
+        return mirror_database
+
+    logger.info(
+        f"Extracting {len(stale_tables)} of {len(table_names)} tables into {mirror_path}"
+    )
+
+    # Pooled read only connections to the mirror would keep it from being written
+    mirror_adapter = get_db_adapter_from_config(mirror_database)
+    close_connection_pool(mirror_adapter.get_database_identity(mirror_database))
+
+    # Only runs that build a mirror load duckdb here, exploring loads it with the adapter
+    import duckdb
+
+    os.makedirs(os.path.dirname(os.path.abspath(mirror_path)), exist_ok=True)
+
+    with duckdb.connect(mirror_path) as mirror:
+        for table_name in stale_tables:
+            start_time = time.time()
+
+            try:
+                row_count = extract_table(
+                    db_adapter, database, mirror, table_name, sample_rows
+                )
+            except Exception as e:
+                # The table keeps its previous copy if it had one, and is extracted again next build
+                logger.error(f"Unable to extract {table_name}: {e}")
+                continue
+
+            logger.info(
+                f"Extracted {row_count} rows of {table_name} in {time.time() - start_time:.1f}s"
+            )
+
+            manifest[get_table_key(table_name)] = {
+                "table_name": table_name,
+                "source_version": source_version,
+                "sample_rows": sample_rows,
+                "row_count": row_count,
+            }
+
+            # Saved after every table, an interrupted build keeps the tables it finished
+            save_manifest(mirror_path, manifest)
+
+    return mirror_database
+
+
+def get_mirror_database(database, mirror_path):
+    return {
+        "type": "duckdb",
+        "path": mirror_path,
+        "source_database": database["db_id"],
+        "source_dialect": get_sql_dialect(database.get("type", "sqlite").lower()),
+    }
+
+
+def get_mirror_path(database):
+    config = get_config()
+
+    db_adapter = get_db_adapter_from_config(database)
+    identity = repr(db_adapter.get_database_identity(database))
+
+    # One mirror per warehouse database, the hash tells apart accounts with the same database name
+    name = f"{database['db_id']}-{hashlib.sha256(identity.encode('utf-8')).hexdigest()[:12]}"
+
+    return os.path.join(config["local_mirror_path"], name + ".duckdb")
+
+
+def extract_table(db_adapter, database, mirror, table_name, sample_rows):
+    """
+    Replace the table in the mirror with its rows in the warehouse, returns the number of rows copied.
+
+    The rows are copied into a staging table that only replaces the mirrored table once
+    all of them arrived, a failed extract leaves the previous copy in place.
+    """
+    schema_name, name = split_table_name(table_name)[:2]
+    staging_name = f"{schema_name}.{get_staging_table_name(name)}"
+
+    mirror.execute(f"CREATE SCHEMA IF NOT EXISTS {schema_name}")
+    mirror.execute(f"DROP TABLE IF EXISTS {staging_name}")
+
+    try:
+        row_count = copy_rows(
+            db_adapter, database, mirror, table_name, staging_name, sample_rows
+        )
+
+        swap_in_staging_table(mirror, table_name, staging_name, name)
+
+    except Exception:
+        mirror.execute(f"DROP TABLE IF EXISTS {staging_name}")
+        raise
+
+    return row_count
+
+
+def swap_in_staging_table(mirror, table_name, staging_name, name):
+    mirror.execute("BEGIN TRANSACTION")
+
+    try:
+        mirror.execute(f"DROP TABLE IF EXISTS {table_name}")
+        mirror.execute(f"ALTER TABLE {staging_name} RENAME TO {name}")
+        mirror.execute("COMMIT")
+    except Exception:
+        mirror.execute("ROLLBACK")
+        raise
+
+
+def copy_rows(db_adapter, database, mirror, table_name, staging_name, sample_rows):
+    row_count = 0
+
+    with db_adapter.create_db_connection(database) as cursor:
+        cursor.execute(
+            db_adapter.get_sample_query(f"{database['db_id']}.{table_name}", sample_rows)
+        )
+
+        column_names = [desc[0] for desc in cursor.description]
+
+        for batch in fetch_batches(cursor, column_names):
+            mirror.register("salign_extracted_rows", batch)
+
+            if row_count == 0:
+                mirror.execute(
+                    f"CREATE TABLE {staging_name} AS SELECT * FROM salign_extracted_rows"
+                )
+            else:
+                widen_columns(mirror, staging_name, "salign_extracted_rows")
+                mirror.execute(
+                    f"INSERT INTO {staging_name} BY NAME SELECT * FROM salign_extracted_rows"
+                )
+
+            mirror.unregister("salign_extracted_rows")
+
+            row_count += len(batch)
+
+    if row_count == 0:
+        # Keep the columns of an empty table, queries against it still need them
+        mirror.execute(
+            f"CREATE TABLE {staging_name} ({', '.join(quote_identifier(name) + ' VARCHAR' for name in column_names)})"
+        )
+
+    return row_count
+
+
+def widen_columns(mirror, staging_name, batch_name):
+    """
+    Change the staging table's columns to types that also hold the batch's values.
+
+    The types of a batch follow its values, e.g. Snowflake sends a NUMBER column as
+    int8 until a batch holds a larger number, and a column that was all null so far
+    has no type yet. DuckDB's union of both picks the narrowest type holding either.
+    """
+    current_types = mirror.execute(f"DESCRIBE SELECT * FROM {staging_name}").fetchall()
+    combined_types = mirror.execute(
+        f"DESCRIBE SELECT * FROM {staging_name} UNION ALL BY NAME SELECT * FROM {batch_name}"
+    ).fetchall()
+
+    current_types = {row[0]: row[1] for row in current_types}
+
+    for column_name, column_type, *_ in combined_types:
+        if current_types.get(column_name, column_type) != column_type:
+            mirror.execute(
+                f"ALTER TABLE {staging_name} ALTER COLUMN {quote_identifier(column_name)} TYPE {column_type}"
+            )
+
+
+def get_staging_table_name(name):
+    return quote_identifier("salign_staging_" + name.strip('"').replace('""', '"'))
+
+
+def fetch_batches(cursor, column_names):
+    # Snowflake hands out Arrow tables, other drivers hand out rows
+    if hasattr(cursor, "fetch_arrow_batches"):
+        for batch in cursor.fetch_arrow_batches():
+            if len(batch) > 0:
+                yield batch
+        return
+
+    import pandas as pd
+
+    while True:
+        rows = cursor.fetchmany(EXTRACT_BATCH_ROWS)
+
+        if len(rows) == 0:
+            break
+
+        yield pd.DataFrame(rows, columns=column_names)
+
+
+def get_referenced_tables_in_queries(queries, database):
+    table_names = {}
+
+    for query in queries:
+        for table_name in get_referenced_tables(
+            query, database["db_id"], database.get("type")
+        ):
+            table_names.setdefault(get_table_key(table_name), table_name)
+
+    return list(table_names.values())
+
+
+def get_referenced_tables(query, source_database, source_dialect=None):
+    """
+    The warehouse tables the query reads, as `SCHEMA.TABLE` written the way the query writes them.
+    """
+    table_names = parse_referenced_tables(query, source_database, source_dialect)
+
+    if table_names is not None:
+        return table_names
+
+    # Without sqlglot only fully qualified names are found, e.g. MGO."SALES".ORDERS
+    return [
+        f"{schema_name}.{table_name}"
+        for schema_name, table_name in re.findall(
+            get_database_qualifier_pattern(source_database)
+            + rf"({IDENTIFIER})\s*\.\s*({IDENTIFIER})",
+            query,
+        )
+    ]
+
+
+def parse_referenced_tables(query, source_database, source_dialect):
+    # sqlglot is optional, it also finds tables named without their database, e.g. SALES.ORDERS
+    try:
+        import sqlglot
+        from sqlglot import exp
+    except ImportError:
+        return None
+
+    dialect = get_sql_dialect(source_dialect.lower()) if source_dialect else None
+
+    try:
+        expressions = sqlglot.parse(query, read=dialect)
+    except Exception as e:
+        logger.debug(f"Unable to parse query, matching table names instead: {e}")
+        return None
+
+    table_names = []
+
+    for expression in expressions:
+        if expression is None:
+            continue
+
+        for table in expression.find_all(exp.Table):
+            schema_name = table.args.get("db")
+
+            if not isinstance(schema_name, exp.Identifier) or not isinstance(
+                table.this, exp.Identifier
+            ):
+                continue
+
+            if table.catalog and not is_same_name(table.catalog, source_database):
+                continue
+
+            table_names.append(
+                f"{schema_name.sql(dialect=dialect)}.{table.this.sql(dialect=dialect)}"
+            )
+
+    return table_names
+
+
+def split_table_name(table_name):
+    return re.findall(IDENTIFIER, table_name)
+
+
+def get_table_key(table_name):
+    # DuckDB resolves names without regard to case, so does the mirror's manifest
+    return ".".join(
+        part.strip('"').replace('""', '"').lower() for part in split_table_name(table_name)
+    )
+
+
+def is_current_table(entry, source_version, sample_rows):
+    return (
+        entry is not None
+        and entry["source_version"] == source_version
+        and entry["sample_rows"] == sample_rows
+    )
+
+
+def get_manifest_path(mirror_path):
+    return mirror_path + ".json"
+
+
+def load_manifest(mirror_path):
+    """
+    The tables in the mirror, with the warehouse version and sample size they were extracted at.
+    """
+    if not os.path.exists(mirror_path) or not os.path.exists(
+        get_manifest_path(mirror_path)
+    ):
+        return {}
+
+    with open(get_manifest_path(mirror_path), "r") as f:
+        return json.load(f)["tables"]
+
+
+def save_manifest(mirror_path, manifest):
+    temporary_path = get_manifest_path(mirror_path) + ".tmp"
+
+    with open(temporary_path, "w") as f:
+        json.dump({"tables": manifest}, f, indent=2)
+
+    os.replace(temporary_path, get_manifest_path(mirror_path))
@@ -0,0 +1,218 @@
+import hashlib
+import math
+import sys
+from collections import defaultdict
+
+NULL = 0
+NUMBER = 1
+TEXT = 2
+
+TOLERANCE = 1e-2
+
+# math.isclose's default relative tolerance, applied together with the absolute tolerance
+RELATIVE_TOLERANCE = 1e-9
+
+
+class CanonicalColumn:
+    """
+    A result column converted once into arrays that can be compared with NumPy.
+
+    Each value is classified as null, number or text. Numbers are stored as float64 and
+    text as an object array, both in the original order and in the order that
+    `vectors_match` sorts by when ignoring row order. `signature` only depends on the
+    row count, the null and number counts and the multiset of text values, so two
+    columns with different signatures can never match.
+
+    Columns holding anything else (dates, decimals, nested values) are not `exact`
+    and are compared with `vectors_match` instead.
+    """
+
+    __slots__ = ("values", "exact", "signature", "ordered", "sorted")
+
+    def __init__(self, values):
+        # NumPy is loaded by the first comparison, not by importing the scorer
+        import numpy as np
+
+        self.values = values
+        self.exact = True
+        self.signature = None
+        self.ordered = None
+        self.sorted = None
+
+        categories = np.empty(len(values), dtype=np.int8)
+        numbers = np.zeros(len(values), dtype=np.float64)
+        texts = np.empty(len(values), dtype=object)
+
+        try:
+            for index, value in enumerate(values):
+                if value is None or is_pandas_missing(value):
+                    categories[index] = NULL
+                elif isinstance(value, (int, float)):
+                    if isinstance(value, float) and math.isnan(value):
+                        categories[index] = NULL
+                    else:
+                        categories[index] = NUMBER
+                        numbers[index] = float(value)
+                elif isinstance(value, str):
+                    categories[index] = TEXT
+                    texts[index] = value
+                else:
+                    self.exact = False
+                    return
+        except OverflowError:
+            # Integers too large for a float, let the slow path decide
+            self.exact = False
+            return
+
+        self.ordered = (categories, numbers, texts)
+
+        # Same ordering as vectors_match, computed once per column instead of once per comparison
+        order = sorted(
+            range(len(values)),
+            key=lambda i: (
+                values[i] is None,
+                str(values[i]),
+                isinstance(values[i], (int, float)),
+            ),
+        )
+        order = np.array(order, dtype=np.intp)
+        self.sorted = (categories[order], numbers[order], texts[order])
+
+        text_values = texts[categories == TEXT]
+
+        self.signature = (
+            len(values),
+            int(np.count_nonzero(categories == NULL)),
+            int(np.count_nonzero(categories == NUMBER)),
+            stable_hash(tuple(sorted(text_values))),
+        )
+
+
+def stable_hash(value):
+    """A hash of `repr(value)` that is the same in every process, so it can be stored."""
+    return hashlib.blake2b(repr(value).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def is_pandas_missing(value):
+    # A NaT or NA can only exist once pandas is loaded, don't load it just to check
+    pd = sys.modules.get("pandas")
+
+    return pd is not None and (value is pd.NaT or value is pd.NA)
+
+
+def is_missing(value):
+    return (
+        value is None
+        or (isinstance(value, float) and math.isnan(value))
+        or is_pandas_missing(value)
+    )
+
+
+def canonical_columns_match(left, right, ignore_order, tol=TOLERANCE):
+    import numpy as np
+
+    if left.signature != right.signature:
+        return False
+
+    left_categories, left_numbers, left_texts = left.sorted if ignore_order else left.ordered
+    right_categories, right_numbers, right_texts = (
+        right.sorted if ignore_order else right.ordered
+    )
+
+    if not np.array_equal(left_categories, right_categories):
+        return False
+
+    number_mask = left_categories == NUMBER
+    a = left_numbers[number_mask]
+    b = right_numbers[number_mask]
+
+    # Elementwise math.isclose(a, b, abs_tol=tol)
+    with np.errstate(invalid="ignore", over="ignore"):
+        bound = np.maximum(
+            RELATIVE_TOLERANCE * np.maximum(np.abs(a), np.abs(b)), tol
+        )
+        close = (a == b) | (
+            np.isfinite(a) & np.isfinite(b) & (np.abs(a - b) <= bound)
+        )
+
+    if not close.all():
+        return False
+
+    text_mask = left_categories == TEXT
+
+    return bool((left_texts[text_mask] == right_texts[text_mask]).all())
+
+
+def columns_match(gold_columns, pred_columns, ignore_order=False, tol=TOLERANCE):
+    """
+    Returns 1 if every gold column matches some predicted column, otherwise 0.
+
+    Gives the same answer as checking every pair with `vectors_match`, but each column is
+    canonicalized once and gold columns are only compared against predicted columns
+    with the same signature.
+    """
+    exact_preds = defaultdict(list)
+    inexact_preds = []
+
+    for values in pred_columns:
+        column = CanonicalColumn(values)
+        if column.exact:
+            exact_preds[column.signature].append(column)
+        else:
+            inexact_preds.append(column)
+
+    all_preds = [column for columns in exact_preds.values() for column in columns]
+    all_preds += inexact_preds
+
+    for values in gold_columns:
+        gold = CanonicalColumn(values)
+
+        if gold.exact:
+            matched = any(
+                canonical_columns_match(gold, pred, ignore_order, tol)
+                for pred in exact_preds.get(gold.signature, [])
+            ) or any(
+                vectors_match(gold.values, pred.values, tol, ignore_order)
+                for pred in inexact_preds
+            )
+        else:
+            matched = any(
+                vectors_match(gold.values, pred.values, tol, ignore_order)
+                for pred in all_preds
+            )
+
+        if not matched:
+            return 0
+
+    return 1
+
+
+def vectors_match(v1, v2, tol=TOLERANCE, ignore_order_=False):
+    """
+    Element by element comparison, used for columns that can't be canonicalized.
+    """
+    try:
+        if ignore_order_:
+            v1, v2 = (
+                sorted(
+                    v1,
+                    key=lambda x: (x is None, str(x), isinstance(x, (int, float))),
+                ),
+                sorted(
+                    v2,
+                    key=lambda x: (x is None, str(x), isinstance(x, (int, float))),
+                ),
+            )
+        if len(v1) != len(v2):
+            return False
+        for a, b in zip(v1, v2):
+            if is_missing(a) and is_missing(b):
+                continue
+            elif isinstance(a, (int, float)) and isinstance(b, (int, float)):
+                if not math.isclose(float(a), float(b), abs_tol=tol):
+                    return False
+            elif a != b:
+                return False
+        return True
+    except Exception as e:
+        return False
@@ -0,0 +1,189 @@
+from infra.salign.util.get_config import get_config
+
+import atexit
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPool:
+    """
+    A bounded pool of reusable connections to a single database.
+
+    Connections are created lazily by `create_connection`, checked with
+    `is_connection_alive` before being handed out again, and closed once they
+    have been idle for longer than `idle_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        create_connection,
+        is_connection_alive=None,
+        max_size=4,
+        idle_timeout=300,
+        name="",
+    ):
+        self.create_connection = create_connection
+        self.is_connection_alive = is_connection_alive
+        self.max_size = max(1, max_size)
+        self.idle_timeout = idle_timeout
+        self.name = name
+
+        self.idle_connections = deque()
+        self.checked_out = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    @contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        except Exception:
+            # The connection may be in an unknown state, don't hand it out again
+            self.release(conn, discard=True)
+            raise
+        else:
+            self.release(conn)
+
+    def acquire(self):
+        with self.condition:
+            while True:
+                if self.closed:
+                    raise RuntimeError(f"Connection pool {self.name} is closed")
+
+                self.evict_idle_locked()
+
+                if self.idle_connections:
+                    conn, _ = self.idle_connections.pop()
+                    self.checked_out += 1
+                    break
+
+                if self.checked_out < self.max_size:
+                    conn = None
+                    self.checked_out += 1
+                    break
+
+                self.condition.wait()
+
+        if conn is not None and self.check_alive(conn):
+            return conn
+
+        if conn is not None:
+            logger.debug(f"Discarding stale connection from pool {self.name}")
+            close_connection(conn)
+
+        try:
+            return self.create_connection()
+        except Exception:
+            with self.condition:
+                self.checked_out -= 1
+                self.condition.notify()
+            raise
+
+    def release(self, conn, discard=False):
+        with self.condition:
+            self.checked_out -= 1
+
+            if discard or self.closed:
+                close_connection(conn)
+            else:
+                self.idle_connections.append((conn, time.monotonic()))
+
+            self.condition.notify()
+
+    def check_alive(self, conn):
+        if self.is_connection_alive is None:
+            return True
+
+        try:
+            return self.is_connection_alive(conn)
+        except Exception as e:
+            logger.debug(f"Health check failed for pool {self.name}: {e}")
+            return False
+
+    def evict_idle(self):
+        with self.condition:
+            self.evict_idle_locked()
+
+    def evict_idle_locked(self):
+        now = time.monotonic()
+
+        # The oldest connections are at the left end of the deque
+        while self.idle_connections:
+            conn, last_used = self.idle_connections[0]
+            if now - last_used <= self.idle_timeout:
+                break
+            self.idle_connections.popleft()
+            close_connection(conn)
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            while self.idle_connections:
+                conn, _ = self.idle_connections.popleft()
+                close_connection(conn)
+            self.condition.notify_all()
+
+
+def close_connection(conn):
+    try:
+        conn.close()
+    except Exception as e:
+        logger.debug(f"Error closing connection: {e}")
+
+
+connection_pools = {}
+connection_pools_lock = threading.Lock()
+
+
+def get_connection_pool(key, create_connection, is_connection_alive=None):
+    """
+    Get the connection pool for the database identified by `key`, creating it on first use.
+    """
+    with connection_pools_lock:
+        pool = connection_pools.get(key)
+
+        if pool is None or pool.closed:
+            config = get_config()
+            pool = ConnectionPool(
+                create_connection,
+                is_connection_alive=is_connection_alive,
+                max_size=config["connection_pool_size"],
+                idle_timeout=config["connection_pool_idle_timeout"],
+                name=str(key),
+            )
+            connection_pools[key] = pool
+
+        return pool
+
+
+def close_connection_pool(key):
+    """
+    Close the pool for one database, e.g. before its file is rewritten.
+    """
+    with connection_pools_lock:
+        pool = connection_pools.pop(key, None)
+
+    if pool is not None:
+        pool.close()
+
+
+def close_all_connection_pools():
+    with connection_pools_lock:
+        pools = list(connection_pools.values())
+        connection_pools.clear()
+
+    for pool in pools:
+        pool.close()
+
+    if pools:
+        logger.debug(f"Closed {len(pools)} connection pools")
+
+
+atexit.register(close_all_connection_pools)
@@ -1,9 +1,14 @@
+from infra.salign.sql.rewrite_query import rewrite_query
+
 from abc import ABC, abstractmethod
 from decimal import Decimal
 import datetime
 
 
 class DatabaseAdapter(ABC):
+    # The SQL dialect of the database, as sqlglot names it
+    dialect = None
+
     @abstractmethod
     def get_table_info(self, database):
         pass
@@ -16,6 +21,53 @@ class DatabaseAdapter(ABC):
     def convert_result(self, cursor):
         pass
 
+    def get_database_identity(self, database):
+        """A hashable value that identifies the database, used to key caches."""
+        return tuple(sorted((key, str(value)) for key, value in database.items()))
+
+    def get_database_version(self, database):
+        """A value that changes whenever the database changes, or None if unknown."""
+        return None
+
+    def quote_table_name(self, table_name):
+        """The table name as it should appear in a FROM clause."""
+        return table_name
+
+    def quote_column(self, column):
+        """
+        A column from get_table_info as it should appear in a query. Names the adapter
+        left unquoted for the prompt, e.g. `order` in SQLite, are quoted here.
+        """
+        if len(column) > 1 and column.startswith('"') and column.endswith('"'):
+            return column
+        return '"' + column.replace('"', '""') + '"'
+
+    def get_sample_query(self, table_name, row_count):
+        """A query for about row_count rows of the table, or all of them if row_count is 0."""
+        if not row_count:
+            return f"SELECT * FROM {table_name}"
+
+        return f"SELECT * FROM {table_name} LIMIT {int(row_count)}"
+
+    def prepare_query(self, database, query):
+        """
+        The query as it is sent to the database. Queries against a local mirror are
+        written for the warehouse it mirrors, see `build_local_mirror`.
+        """
+        if "source_database" not in database:
+            return query
+
+        return rewrite_query(
+            query,
+            database["source_database"],
+            database.get("source_dialect"),
+            self.dialect,
+        )
+
+    def is_connection_alive(self, conn):
+        """Health check for pooled connections before they are reused."""
+        return True
+
     def convert_decimals_to_floats(self, obj):
         """
         Recursively convert all Decimal objects to floats in a nested data structure.
@@ -46,3 +98,10 @@ class DatabaseAdapter(ABC):
             return tuple(self.convert_decimals_to_floats(item) for item in obj)
         else:
             return obj
+
+
+def quote_identifier(name):
+    """
+    Double quote a name, so names that are keywords, e.g. a table named order, still parse.
+    """
+    return '"' + name.replace('"', '""') + '"'
@@ -0,0 +1,140 @@
+from infra.salign.sql.arrow_result import convert_arrow_columns, read_arrow_table
+from infra.salign.sql.connection_pool import get_connection_pool
+from infra.salign.sql.database_adapter import DatabaseAdapter, quote_identifier
+from infra.salign.sql.query_result import QueryResult
+from infra.salign.util.get_config import get_config
+from contextlib import contextmanager
+import duckdb
+import os
+import threading
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tables in DuckDB's default schema are named without it, like SQLite tables
+DEFAULT_SCHEMA = "main"
+
+
+class DuckDBAdapter(DatabaseAdapter):
+    """
+    A local DuckDB file, e.g. a mirror of warehouse tables for exploring queries.
+
+    The database is `{"type": "duckdb", "path": ...}`. Connections are read only unless
+    the database sets `"read_only": False`, generated queries can't change the data.
+    """
+
+    dialect = "duckdb"
+
+    @contextmanager
+    def create_db_connection(self, database):
+        """Context manager for pooled DuckDB connections."""
+        database_path = self.get_database_path(database)
+        assert os.path.exists(
+            database_path
+        ), f"Database path does not exist: {database_path}"
+
+        config = get_config()
+        query_execution_timeout = config["query_execution_timeout"]
+
+        pool = get_connection_pool(
+            self.get_database_identity(database),
+            lambda: duckdb.connect(
+                database_path, read_only=database.get("read_only", True)
+            ),
+            self.is_connection_alive,
+        )
+
+        try:
+            with pool.connection() as conn:
+                # DuckDB has no statement timeout, interrupt the query from a timer instead
+                timer = threading.Timer(query_execution_timeout, conn.interrupt)
+                timer.daemon = True
+                timer.start()
+                try:
+                    # A DuckDB connection executes queries itself, a cursor would be a new connection
+                    yield conn
+                finally:
+                    timer.cancel()
+
+        except Exception as e:
+            logger.error(f"DuckDB connection error: {e}")
+            raise
+
+    def get_database_path(self, database):
+        return database["path"]
+
+    def get_database_identity(self, database):
+        return ("duckdb", os.path.abspath(self.get_database_path(database)))
+
+    def get_database_version(self, database):
+        path = self.get_database_path(database)
+
+        # Recent writes may only be in the write ahead log
+        version = []
+        for file_path in (path, path + ".wal"):
+            if os.path.exists(file_path):
+                stat = os.stat(file_path)
+                version.append((stat.st_mtime_ns, stat.st_size))
+
+        return tuple(version)
+
+    def quote_table_name(self, table_name):
+        return ".".join(quote_identifier(part) for part in table_name.split("."))
+
+    def is_connection_alive(self, conn):
+        conn.execute("SELECT 1").fetchone()
+        return True
+
+    def get_table_info(self, database):
+        with self.create_db_connection(database) as conn:
+            rows = conn.execute(
+                "SELECT c.table_schema, c.table_name, c.column_name, c.data_type "
+                "FROM information_schema.columns AS c "
+                "JOIN information_schema.tables AS t "
+                "ON c.table_catalog = t.table_catalog AND c.table_schema = t.table_schema "
+                "AND c.table_name = t.table_name "
+                "WHERE t.table_type = 'BASE TABLE' AND t.table_catalog = current_database() "
+                "ORDER BY c.table_schema, c.table_name, c.ordinal_position"
+            ).fetchall()
+
+        table_info = {}
+        for schema_name, table_name, column_name, column_type in rows:
+            if schema_name != DEFAULT_SCHEMA:
+                table_name = f"{schema_name}.{table_name}"
+
+            table_info.setdefault(table_name, []).append(
+                {"column": quote_identifier(column_name), "type": column_type}
+            )
+
+        return table_info
+
+    def convert_result(self, conn):
+        config = get_config()
+
+        max_rows = config["max_rows_per_query"]
+
+        column_names = [desc[0] for desc in conn.description or ()]
+
+        try:
+            table = read_arrow_table(conn.fetch_record_batch(), column_names, max_rows)
+        except Exception as e:
+            # Statements without a result set, or no pyarrow
+            logger.debug(f"Falling back to fetchmany: {e}")
+            table = None
+
+        if table is None:
+            results = conn.fetchmany(max_rows) if conn.description else []
+
+            return QueryResult.from_rows(
+                super().convert_decimals_to_floats(results),
+                column_names=column_names,
+                truncated=len(results) >= max_rows,
+            )
+
+        return QueryResult.from_columns(
+            column_names,
+            convert_arrow_columns(table),
+            row_format="tuple",
+            truncated=table.num_rows >= max_rows,
+        )
@@ -0,0 +1,285 @@
+from infra.salign.sql.execute_query import (
+    do_execute_query,
+    lookup_cached_query_result,
+    store_query_result,
+)
+from infra.salign.sql.query_result import QueryResult
+from infra.salign.util.get_config import get_config, make_config, set_config_snapshot, thaw
+from infra.salign.util.get_db_adapter_from_config import get_db_adapter_from_config
+
+import concurrent.futures
+import copy
+import multiprocessing
+import threading
+import time
+from collections import OrderedDict, deque
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def execute_queries(examples, queries):
+    """
+    Execute queries[i] against examples[i]["database"] concurrently.
+
+    Returns a list of (result, failed) pairs in the same order as the inputs, exactly
+    as calling execute_query on each pair would. Cached results are served without
+    touching the database, at most `max_concurrent_queries_per_database` queries run
+    against any one database at a time, and a query that has not finished within
+    `batch_query_timeout` seconds is reported as failed.
+    """
+    assert len(examples) == len(queries), "Need one example per query"
+
+    outputs = [None] * len(queries)
+
+    pending = OrderedDict()
+    cache_keys = [None] * len(queries)
+
+    # Identical queries in the same batch only run once
+    first_index_for_key = {}
+    duplicates = {}
+
+    for index, (example, query) in enumerate(zip(examples, queries)):
+        database = example["database"]
+        key, result = lookup_cached_query_result(database, query)
+
+        if result is not None:
+            outputs[index] = (result, False)
+            continue
+
+        if key is not None:
+            if key in first_index_for_key:
+                duplicates[index] = first_index_for_key[key]
+                continue
+            first_index_for_key[key] = index
+
+        cache_keys[index] = key
+
+        identity = get_db_adapter_from_config(database).get_database_identity(database)
+        pending.setdefault(identity, deque()).append(index)
+
+    if sum(len(indices) for indices in pending.values()) == 1:
+        index = next(iter(pending.values()))[0]
+        outputs[index] = run_query(examples[index], queries[index], cache_keys[index])
+    elif pending:
+        run_pending_queries(examples, queries, cache_keys, pending, outputs)
+
+    for index, first_index in duplicates.items():
+        outputs[index] = copy.deepcopy(outputs[first_index])
+
+    return outputs
+
+
+def run_query(example, query, cache_key):
+    start_time = time.time()
+
+    try:
+        result, failed = do_execute_query(example, query)
+    except Exception as e:
+        logger.debug(f"Error executing query: {query}")
+        logger.debug(f"Error message: {str(e)}")
+        result, failed = QueryResult.from_error(e), True
+
+    store_query_result(cache_key, result, failed, time.time() - start_time)
+    return result, failed
+
+
+def run_pending_queries(examples, queries, cache_keys, pending, outputs):
+    config = get_config()
+
+    max_workers = config["max_query_workers"]
+    max_per_database = config["max_concurrent_queries_per_database"]
+    timeout = config["batch_query_timeout"]
+
+    running_per_database = {identity: 0 for identity in pending}
+
+    # future -> (index, database identity, submit time), index is None once the query was reported
+    in_flight = {}
+
+    # Queries that timed out in earlier batches still hold a worker and a database slot
+    for future, identity in take_abandoned_queries():
+        in_flight[future] = (None, identity, None)
+        running_per_database[identity] = running_per_database.get(identity, 0) + 1
+
+    # Queries still waiting for a slot give up once no slot has freed up for a whole timeout
+    last_progress = time.monotonic()
+
+    while pending or any(index is not None for index, _, _ in in_flight.values()):
+        # Start as many queries as the global and per database limits allow
+        for identity in list(pending.keys()):
+            indices = pending[identity]
+
+            while (
+                indices
+                and len(in_flight) < max_workers
+                and running_per_database[identity] < max_per_database
+            ):
+                index = indices.popleft()
+                future = submit_query(examples[index], queries[index])
+                in_flight[future] = (index, identity, time.monotonic())
+                running_per_database[identity] += 1
+                last_progress = time.monotonic()
+
+            if not indices:
+                del pending[identity]
+
+        deadlines = [start + timeout for _, _, start in in_flight.values() if start is not None]
+
+        if pending:
+            deadlines.append(last_progress + timeout)
+
+        done, _ = concurrent.futures.wait(
+            in_flight,
+            timeout=max(min(deadlines) - time.monotonic(), 0) if deadlines else None,
+            return_when=concurrent.futures.FIRST_COMPLETED,
+        )
+
+        now = time.monotonic()
+
+        for future in list(in_flight.keys()):
+            index, identity, start = in_flight[future]
+
+            if future in done:
+                if index is not None:
+                    result, failed = get_query_output(future, queries[index])
+                    store_query_result(cache_keys[index], result, failed, now - start)
+                    outputs[index] = (result, failed)
+
+                # The slot is only free once the worker is
+                del in_flight[future]
+                running_per_database[identity] -= 1
+                last_progress = now
+
+            elif index is not None and now >= start + timeout:
+                # The worker can't be interrupted, the adapter's own timeout will stop it eventually
+                logger.warning(f"Query timed out after {timeout} seconds: {queries[index]}")
+                outputs[index] = (
+                    QueryResult.from_error(f"Query timed out after {timeout} seconds"),
+                    True,
+                )
+                in_flight[future] = (None, identity, None)
+
+        if pending and not done and now >= last_progress + timeout:
+            fail_waiting_queries(pending, outputs, timeout)
+
+    add_abandoned_queries(
+        (future, identity) for future, (_, identity, _) in in_flight.items()
+    )
+
+
+def fail_waiting_queries(pending, outputs, timeout):
+    for indices in pending.values():
+        for index in indices:
+            outputs[index] = (
+                QueryResult.from_error(
+                    f"No query worker became free within {timeout} seconds"
+                ),
+                True,
+            )
+
+    logger.warning(
+        f"Gave up on {sum(len(indices) for indices in pending.values())} queries waiting behind stuck queries"
+    )
+
+    pending.clear()
+
+
+abandoned_queries = {}
+abandoned_queries_lock = threading.Lock()
+
+
+def take_abandoned_queries():
+    """
+    The timed out queries that are still running, they count against the limits of the next batch.
+    """
+    with abandoned_queries_lock:
+        running = [
+            (future, identity)
+            for future, identity in abandoned_queries.items()
+            if not future.done()
+        ]
+        abandoned_queries.clear()
+
+    return running
+
+
+def add_abandoned_queries(futures):
+    with abandoned_queries_lock:
+        abandoned_queries.update(futures)
+
+
+def get_query_output(future, query):
+    try:
+        return future.result()
+    except Exception as e:
+        logger.debug(f"Error executing query: {query}")
+        logger.debug(f"Error message: {str(e)}")
+        return QueryResult.from_error(e), True
+
+
+def submit_query(example, query):
+    database = example["database"]
+    executor = get_query_executor(database)
+
+    # Only the database description is needed to run the query, don't ship the whole example
+    if isinstance(executor, concurrent.futures.ProcessPoolExecutor):
+        # Spawned workers start from the default settings, send the ones this run uses
+        return executor.submit(
+            execute_query_in_process, thaw(get_config()), {"database": database}, query
+        )
+
+    return executor.submit(do_execute_query, {"database": database}, query)
+
+
+# The settings a query worker process last applied
+worker_settings = None
+
+
+def execute_query_in_process(settings, example, query):
+    global worker_settings
+
+    if settings != worker_settings:
+        set_config_snapshot(make_config(settings))
+        worker_settings = settings
+
+    return do_execute_query(example, query)
+
+
+query_executors = {}
+query_executors_lock = threading.Lock()
+
+
+def get_query_executor(database):
+    """
+    Threads for I/O bound warehouses, processes for CPU bound local SQLite databases.
+    """
+    config = get_config()
+
+    executor_type = config["query_executor"]
+
+    if executor_type == "auto":
+        is_sqlite = database.get("type", "").lower() == "sqlite"
+        executor_type = "process" if is_sqlite else "thread"
+
+    with query_executors_lock:
+        executor = query_executors.get(executor_type)
+
+        if executor is None:
+            if executor_type == "process":
+                # Forking would copy the pooled SQLite connections and locks of a threaded parent
+                executor = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=config["max_query_workers"],
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            elif executor_type == "thread":
+                executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=config["max_query_workers"],
+                    thread_name_prefix="salign-query",
+                )
+            else:
+                raise ValueError(f"Unknown query executor: {executor_type}")
+
+            query_executors[executor_type] = executor
+
+        return executor
@@ -1,12 +1,55 @@
+from infra.salign.sql.query_result import QueryResult
+from infra.salign.sql.query_result_cache import get_query_result_cache, make_query_cache_key
 from infra.salign.util.get_db_adapter_from_config import get_db_adapter_from_config
 
+import time
+
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 def execute_query(example, query):
-    return do_execute_query(example, query)
+    key, result = lookup_cached_query_result(example["database"], query)
+
+    if result is not None:
+        return result, False
+
+    start_time = time.time()
+    result, failed = do_execute_query(example, query)
+
+    store_query_result(key, result, failed, time.time() - start_time)
+
+    return result, failed
+
+
+def lookup_cached_query_result(database, query):
+    """
+    Returns (cache key, cached result). The key is None if caching is disabled, the result is None on a miss.
+    """
+    cache = get_query_result_cache()
+
+    if cache is None:
+        return None, None
+
+    db_adapter = get_db_adapter_from_config(database)
+
+    key = make_query_cache_key(
+        db_adapter.get_database_identity(database),
+        db_adapter.get_database_version(database),
+        query,
+    )
+
+    # Entries cached before results were columnar are still lists of rows
+    return key, QueryResult.from_value(cache.get(key))
+
+
+def store_query_result(key, result, failed, seconds):
+    # Failures can be transient (timeouts, dropped connections), only cache successes
+    if key is None or failed:
+        return
+
+    get_query_result_cache().put(key, result, seconds)
 
 
 def do_execute_query(example, query):
@@ -18,12 +61,12 @@ def do_execute_query(example, query):
         falsed = False
 
         try:
-            cursor.execute(query)
+            cursor.execute(db_adapter.prepare_query(database, query))
             result = db_adapter.convert_result(cursor)
         except Exception as e:
             logger.debug(f"Error executing query: {query}")
             logger.debug(f"Error message: {str(e)}")
-            result = str(e)
+            result = QueryResult.from_error(e)
             falsed = True
 
         return result, falsed
@@ -1,8 +1,7 @@
-from infra.salign.util.get_db_adapter_from_config import get_db_adapter_from_config
+from infra.salign.sql.schema_cache import get_table_info
 
 def get_columns(database):
-    db_adapter = get_db_adapter_from_config(database)
-    table_info = db_adapter.get_table_info(database)
+    table_info = get_table_info(database)
 
     column_info = []
 
@@ -1,28 +1,139 @@
+from infra.salign.sql.schema_index import get_schema_index
+
 from infra.salign.util.get_config import get_config
+from infra.salign.util.tokenizer import count_tokens
+
+import itertools
+import threading
+from collections import OrderedDict
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Rendered profiles are small, a few hundred covers every database in a run
+DB_PROFILE_CACHE_SIZE = 256
+
+db_profile_cache = OrderedDict()
+db_profile_cache_lock = threading.Lock()
+
+prepared_profiles = OrderedDict()
+prepared_profiles_lock = threading.Lock()
+prepared_profile_ids = itertools.count()
+
+
+class PreparedProfile:
+    """
+    The column descriptions of one db_profile with their schema index, built once and
+    shared by every question asked about it.
+
+    Profiles are found by the parts of their descriptions that are rendered, so a
+    description edited in place or a column added is a new profile.
+    """
+
+    def __init__(self, column_descriptions):
+        self.key = next(prepared_profile_ids)
+        self.descriptions = tuple(column_descriptions)
+        self.index = get_schema_index(
+            tuple(get_column_document(d) for d in self.descriptions)
+        )
+
+    def select(self, question):
+        """
+        Indices of the columns to render, most relevant first, at most `schema_linking_top_columns` of them.
+        """
+        config = get_config()
+
+        if not config["schema_linking_enabled"]:
+            return tuple(range(len(self.descriptions)))
+
+        return tuple(self.index.rank(question)[: config["schema_linking_top_columns"]])
+
 
 def get_db_profile(example, seed=42):
     assert "db_profile" in example, "Example must contain 'db_profile' key"
 
-    descriptions = list(example["db_profile"]["column_descriptions"])
+    profile = get_prepared_profile(example["db_profile"]["column_descriptions"])
+
+    # Most relevant columns first, so truncation drops the least relevant ones
+    selected = profile.select(example.get("question", ""))
 
     config = get_config()
 
-    max_db_profile_length = config["db_profile_max_length"]
+    max_db_profile_tokens = config["db_profile_max_tokens"]
+    create_table_max_tokens = config["create_table_max_tokens"]
+
+    key = (profile.key, selected, max_db_profile_tokens, create_table_max_tokens)
+
+    with db_profile_cache_lock:
+        prompt = db_profile_cache.get(key)
+        if prompt is not None:
+            db_profile_cache.move_to_end(key)
+            return prompt
+
+    prompt = render_db_profile(
+        [profile.descriptions[index] for index in selected],
+        max_db_profile_tokens,
+        create_table_max_tokens,
+    )
+
+    with db_profile_cache_lock:
+        db_profile_cache[key] = prompt
+        while len(db_profile_cache) > DB_PROFILE_CACHE_SIZE:
+            db_profile_cache.popitem(last=False)
 
+    return prompt
+
+
+def get_prepared_profile(column_descriptions):
+    key = get_prepared_profile_key(column_descriptions)
+
+    with prepared_profiles_lock:
+        profile = prepared_profiles.get(key)
+
+        if profile is not None:
+            prepared_profiles.move_to_end(key)
+            return profile
+
+    profile = PreparedProfile(column_descriptions)
+
+    with prepared_profiles_lock:
+        prepared_profiles[key] = profile
+        while len(prepared_profiles) > DB_PROFILE_CACHE_SIZE:
+            prepared_profiles.popitem(last=False)
+
+    return profile
+
+
+def get_prepared_profile_key(column_descriptions):
+    # Strings cache their hash, so hashing the key is cheap next to ranking the columns again
+    return tuple(
+        (d["column"]["table"], d["column"]["column"]["column"], d["profile"])
+        for d in column_descriptions
+    )
+
+
+def get_column_document(description):
+    column = description["column"]
+
+    return f"{column['table']} {column['column']['column']} {description['profile']}"
+
+
+def render_db_profile(descriptions, max_db_profile_tokens, create_table_max_tokens):
     prompt = "Consider the following database profile of some relevant columns:\n\n"
     prompt += "\nThe format is `Column: Table.Column`\n\n"
 
+    # Token counts of the pieces are cached, so the running total is cheap to keep
+    prompt_tokens = count_tokens(prompt)
+
     total_selected_columns = 0
     for d in descriptions:
         description = d["profile"]
-        if len(prompt) + len(description) + 2 > max_db_profile_length:
+        description_tokens = count_tokens(description + "\n")
+        if prompt_tokens + description_tokens > max_db_profile_tokens:
             break
         prompt += description + "\n"
+        prompt_tokens += description_tokens
         total_selected_columns += 1
 
     if len(descriptions) > total_selected_columns:
@@ -33,21 +144,26 @@ def get_db_profile(example, seed=42):
     selected_columns_per_table = {}
 
     total_selected_columns = 0
-    create_table_max_length = config["create_table_max_length"]
+
+    # Size of get_create_table_statements(selected_columns_per_table), kept up to date
+    # as columns are added instead of re-rendering every statement for each column
+    create_table_tokens = count_tokens(get_create_table_statements({}))
 
     for d in descriptions:
         table = d["column"]["table"]
         column = d["column"]["column"]["column"]
 
         if table not in selected_columns_per_table:
+            separator = "\n" if selected_columns_per_table else ""
+            create_table_tokens += count_tokens(f"{separator}CREATE TABLE {table} ();")
             selected_columns_per_table[table] = []
+            create_table_tokens += count_tokens(column)
+        else:
+            create_table_tokens += count_tokens(f", {column}")
 
         selected_columns_per_table[table].append(column)
 
-        if (
-            len(get_create_table_statements(selected_columns_per_table))
-            > create_table_max_length
-        ):
+        if create_table_tokens > create_table_max_tokens:
             break
 
         total_selected_columns += 1
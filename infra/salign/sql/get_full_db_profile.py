@@ -1,11 +1,353 @@
+from infra.salign.sql.schema_cache import get_table_info
+
+from infra.salign.util.disk_cache import DiskCache
 from infra.salign.util.get_config import get_config
+from infra.salign.util.get_db_adapter_from_config import get_db_adapter_from_config
+from infra.salign.util.prompt_budget import fit_fragments
+from infra.salign.util.tokenizer import count_tokens
 
+import hashlib
 import random
+import re
+import threading
+import time
+
 import logging
 
 logger = logging.getLogger(__name__)
 
+
 def get_full_db_profile(database, seed):
+    """
+    Describe the database's tables and columns for a prompt.
+
+    The statistics are gathered once per database with sampled queries and cached on
+    disk, each call only renders a seed dependent subset that fits the token budget.
+    """
+    profile = get_cached_db_profile(database)
+
+    if profile is None or len(profile["tables"]) == 0:
+        return ""
+
+    return render_db_profile(profile, seed)
+
+
+def render_db_profile(profile, seed):
+    config = get_config()
+
+    rng = random.Random(seed)
+
+    tables = list(profile["tables"])
+    rng.shuffle(tables)
+
+    fragments = [render_table(table, rng) for table in tables]
+
+    header = "The database has the following tables, with statistics from a sample of rows:\n\n"
+
+    selected = fit_fragments(
+        fragments, config["full_db_profile_max_tokens"] - count_tokens(header)
+    )
+
+    if len(selected) < len(fragments):
+        logger.debug(
+            f"Rendered {len(selected)} out of {len(fragments)} tables in the full db profile."
+        )
+
+    return header + "\n".join(fragments[index] for index in selected)
+
+
+def render_table(table, rng):
+    config = get_config()
+
+    if table["has_statistics"]:
+        lines = [f"TABLE {table['name']} ({table['sampled_rows']} rows sampled)"]
+    else:
+        lines = [f"TABLE {table['name']}"]
+
+    for column in table["columns"]:
+        details = [column["type"]] if column["type"] else []
+
+        if column["hint"]:
+            details.append(column["hint"])
+
+        if column["null_ratio"] is not None:
+            details.append(f"{column['null_ratio'] * 100:.0f}% null")
+
+        if column["distinct_count"] is not None:
+            details.append(f"{column['distinct_count']} distinct")
+
+        samples = column["samples"]
+        if len(samples) > config["full_db_profile_samples_per_column"]:
+            samples = rng.sample(samples, config["full_db_profile_samples_per_column"])
+
+        if samples:
+            details.append("e.g. " + ", ".join(samples))
+
+        lines.append(f"  {column['name']}: " + ", ".join(details))
+
+    return "\n".join(lines) + "\n"
+
+
+profile_cache = None
+memory_profiles = {}
+profile_cache_lock = threading.Lock()
+profile_build_lock = threading.Lock()
+
+
+def get_cached_db_profile(database):
+    """
+    The database's profile from memory, disk, or built with sampled queries if missing or stale.
+    """
+    config = get_config()
+
+    db_adapter = get_db_adapter_from_config(database)
+
+    key = make_profile_cache_key(db_adapter.get_database_identity(database), config)
+    version = repr(db_adapter.get_database_version(database))
+
+    # One build at a time, concurrent callers wait for it instead of profiling again
+    with profile_build_lock:
+        profile = get_profile_entry(key)
+
+        if profile is not None and is_current(profile, version):
+            return profile
+
+        try:
+            profile = build_db_profile(database)
+        except Exception as e:
+            logger.warning(f"Could not profile database: {e}")
+            return None
+
+        profile["version"] = version
+        profile["built_at"] = time.time()
+
+        put_profile_entry(key, profile)
+
+        return profile
+
+
+def is_current(profile, version):
+    ttl = get_config()["profile_cache_ttl"]
+
+    return profile["version"] == version and time.time() - profile["built_at"] < ttl
+
+
+def build_db_profile(database):
+    config = get_config()
+
+    start_time = time.time()
+
+    table_info = get_table_info(database)
+
+    table_names = list(table_info.keys())
+    max_tables = config["full_db_profile_max_profiled_tables"]
+
+    if len(table_names) > max_tables:
+        logger.warning(
+            f"Only collecting statistics for {max_tables} out of {len(table_names)} tables."
+        )
+
+    tables = []
+
+    for index, table_name in enumerate(table_names):
+        columns = table_info[table_name]
+
+        statistics = None
+        if index < max_tables:
+            statistics = get_table_statistics(database, table_name, columns)
+
+        tables.append(make_table_profile(table_name, columns, statistics))
+
+    add_key_hints(tables)
+
+    logger.info(
+        f"Profiled {len(tables)} tables in {time.time() - start_time:.1f}s"
+    )
+
+    return {"tables": tables}
+
+
+def get_table_statistics(database, table_name, columns):
+    """
+    Null and distinct counts over at most `full_db_profile_sample_rows` rows plus a few sample rows, two queries per table.
+    """
+    config = get_config()
+
+    db_adapter = get_db_adapter_from_config(database)
+
+    sample_rows = config["full_db_profile_sample_rows"]
+    quoted_table = db_adapter.quote_table_name(table_name)
+
+    quoted_columns = [db_adapter.quote_column(column["column"]) for column in columns]
+
+    aggregates = ["COUNT(*)"]
+    for quoted_column in quoted_columns:
+        aggregates.append(f"COUNT({quoted_column})")
+        aggregates.append(f"COUNT(DISTINCT {quoted_column})")
+
+    counts_query = (
+        f"SELECT {', '.join(aggregates)} "
+        f"FROM (SELECT * FROM {quoted_table} LIMIT {sample_rows}) AS sampled"
+    )
+
+    samples_query = (
+        f"SELECT {', '.join(quoted_columns)} "
+        f"FROM {quoted_table} LIMIT {config['full_db_profile_sample_values']}"
+    )
+
+    try:
+        with db_adapter.create_db_connection(database) as cursor:
+            cursor.execute(counts_query)
+            counts = cursor.fetchone()
+
+            cursor.execute(samples_query)
+            sample_values = cursor.fetchall()
+    except Exception as e:
+        logger.warning(f"Could not collect statistics for {table_name}, profiling it without them: {e}")
+        return None
+
+    return {"counts": tuple(counts), "sample_values": [tuple(row) for row in sample_values]}
+
+
+def make_table_profile(table_name, columns, statistics):
+    sampled_rows = statistics["counts"][0] if statistics else 0
+
+    column_profiles = []
+
+    for index, column in enumerate(columns):
+        null_ratio = None
+        distinct_count = None
+        non_null_count = None
+        samples = []
+
+        if statistics is not None:
+            non_null_count = statistics["counts"][1 + 2 * index]
+            distinct_count = statistics["counts"][2 + 2 * index]
+            null_ratio = 1 - non_null_count / sampled_rows if sampled_rows else 0.0
+
+            for row in statistics["sample_values"]:
+                value = row[index]
+                if value is None:
+                    continue
+                text = truncate_value(str(value))
+                if text not in samples:
+                    samples.append(text)
+
+        column_profiles.append(
+            {
+                "name": column["column"],
+                "type": column["type"],
+                "null_ratio": null_ratio,
+                "distinct_count": distinct_count,
+                "non_null_count": non_null_count,
+                "samples": samples,
+                "hint": "",
+            }
+        )
+
+    return {
+        "name": table_name,
+        "sampled_rows": sampled_rows,
+        "has_statistics": statistics is not None,
+        "columns": column_profiles,
+    }
+
+
+def add_key_hints(tables):
+    """
+    Guess primary and foreign keys from names and sampled uniqueness, works without constraint metadata.
+    """
+    tables_by_stem = {}
+    for table in tables:
+        stem = get_name_stem(table["name"].split(".")[-1])
+        tables_by_stem[stem] = table["name"]
+        if stem.endswith("s"):
+            tables_by_stem[stem[:-1]] = table["name"]
+
+    for table in tables:
+        table_stem = get_name_stem(table["name"].split(".")[-1])
+
+        for column in table["columns"]:
+            name = get_name_stem(column["name"])
+
+            is_unique = (
+                column["distinct_count"] is not None
+                and column["non_null_count"] == table["sampled_rows"] > 0
+                and column["distinct_count"] == column["non_null_count"]
+            )
+
+            if is_unique and (
+                name == "id" or name in (f"{table_stem}_id", f"{table_stem.rstrip('s')}_id")
+            ):
+                column["hint"] = "likely primary key"
+                continue
+
+            if name.endswith("_id") or (name.endswith("id") and len(name) > 2):
+                referenced = tables_by_stem.get(re.sub(r"_?id$", "", name))
+                if referenced is not None and referenced != table["name"]:
+                    column["hint"] = f"may reference {referenced}"
+
+
+def get_name_stem(name):
+    return name.strip('"').lower()
+
+
+def truncate_value(text, max_length=32):
+    text = " ".join(text.split())
+    if len(text) <= max_length:
+        return text
+    return text[:max_length] + "..."
+
+
+def get_profile_entry(key):
+    with profile_cache_lock:
+        profile = memory_profiles.get(key)
+
+    if profile is None:
+        disk = get_profile_disk_cache()
+        if disk is not None:
+            profile = disk.get(key)
+            if profile is not None:
+                with profile_cache_lock:
+                    memory_profiles[key] = profile
+
+    return profile
+
+
+def put_profile_entry(key, profile):
+    with profile_cache_lock:
+        memory_profiles[key] = profile
+
+    disk = get_profile_disk_cache()
+    if disk is not None:
+        disk.put(key, profile)
+
+
+def get_profile_disk_cache():
+    global profile_cache
+
+    config = get_config()
+
+    if not config["profile_cache_path"]:
+        return None
+
+    with profile_cache_lock:
+        if profile_cache is None:
+            profile_cache = DiskCache(
+                config["profile_cache_path"], config["profile_cache_max_bytes"]
+            )
+
+        return profile_cache
+
 
-    data_profile = ""
-    return data_profile
+def make_profile_cache_key(database_identity, config):
+    # Profiles gathered with different sampling settings are kept apart
+    key = repr(
+        (
+            database_identity,
+            config["full_db_profile_sample_rows"],
+            config["full_db_profile_sample_values"],
+            config["full_db_profile_max_profiled_tables"],
+        )
+    )
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
@@ -0,0 +1,174 @@
+from infra.salign.sql.connection_pool import get_connection_pool
+from infra.salign.sql.database_adapter import DatabaseAdapter, quote_identifier
+from infra.salign.sql.query_result import QueryResult
+from infra.salign.util.get_config import get_config
+from contextlib import contextmanager
+import psycopg
+import functools
+import json
+import os
+import threading
+import time
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Tables in the default schema are named without it
+DEFAULT_SCHEMA = "public"
+
+database_versions = {}
+database_versions_lock = threading.Lock()
+
+
+class PostgresAdapter(DatabaseAdapter):
+    """
+    A Postgres database, `{"type": "postgres", "db_id": ...}` with the host, port, user
+    and password in the JSON file at `credential_path`, or a libpq `dsn` instead.
+    """
+
+    dialect = "postgres"
+
+    @contextmanager
+    def create_db_connection(self, database):
+        """Context manager for pooled Postgres connections."""
+
+        config = get_config()
+        query_execution_timeout = config["query_execution_timeout"]
+
+        pool = get_connection_pool(
+            self.get_database_identity(database),
+            lambda: psycopg.connect(
+                **get_connection_arguments(database),
+                options=f"-c statement_timeout={query_execution_timeout * 1000}",
+            ),
+            self.is_connection_alive,
+        )
+
+        cursor = None
+        try:
+            with pool.connection() as conn:
+                try:
+                    cursor = conn.cursor()
+                    yield cursor
+                finally:
+                    if cursor:
+                        cursor.close()
+                    # A failed statement aborts the transaction, start the next user with a clean one
+                    conn.rollback()
+
+        except Exception as e:
+            logger.error(f"Postgres connection error: {e}")
+            raise
+
+    def is_connection_alive(self, conn):
+        return not conn.closed
+
+    def get_database_identity(self, database):
+        if "dsn" in database:
+            return ("postgres", database["dsn"])
+
+        return (
+            "postgres",
+            database["db_id"],
+            os.path.abspath(database["credential_path"]),
+        )
+
+    def get_database_version(self, database):
+        """
+        Row changes and table count from the statistics views, re-read at most once per `database_version_ttl` seconds.
+        """
+        identity = self.get_database_identity(database)
+        ttl = get_config()["database_version_ttl"]
+
+        with database_versions_lock:
+            cached = database_versions.get(identity)
+            if cached is not None and time.monotonic() - cached[1] < ttl:
+                return cached[0]
+
+        with self.create_db_connection(database) as cursor:
+            cursor.execute(
+                "SELECT COALESCE(SUM(n_tup_ins + n_tup_upd + n_tup_del), 0), COUNT(*) "
+                "FROM pg_stat_user_tables"
+            )
+            version = tuple(int(value) for value in cursor.fetchone())
+
+        with database_versions_lock:
+            database_versions[identity] = (version, time.monotonic())
+
+        return version
+
+    def quote_table_name(self, table_name):
+        return ".".join(quote_identifier(part) for part in table_name.split("."))
+
+    def get_table_info(self, database):
+        with self.create_db_connection(database) as cursor:
+            cursor.execute(
+                "SELECT c.table_schema, c.table_name, c.column_name, c.data_type, "
+                "c.character_maximum_length, c.numeric_precision, c.numeric_scale "
+                "FROM information_schema.columns AS c "
+                "JOIN information_schema.tables AS t "
+                "ON c.table_schema = t.table_schema AND c.table_name = t.table_name "
+                "WHERE t.table_type = 'BASE TABLE' "
+                "AND t.table_schema NOT IN ('pg_catalog', 'information_schema') "
+                "ORDER BY c.table_schema, c.table_name, c.ordinal_position"
+            )
+            rows = cursor.fetchall()
+
+        table_info = {}
+        for schema_name, table_name, column_name, *column_type in rows:
+            if schema_name != DEFAULT_SCHEMA:
+                table_name = f"{schema_name}.{table_name}"
+
+            table_info.setdefault(table_name, []).append(
+                {
+                    "column": quote_identifier(column_name),
+                    "type": format_column_type(*column_type),
+                }
+            )
+
+        return table_info
+
+    def convert_result(self, cursor):
+        config = get_config()
+
+        max_rows = config["max_rows_per_query"]
+
+        if cursor.description is None:
+            # Statements without a result set
+            return QueryResult.from_rows([])
+
+        results = cursor.fetchmany(max_rows)
+        column_names = [desc[0] for desc in cursor.description]
+
+        return QueryResult.from_rows(
+            super().convert_decimals_to_floats(results),
+            column_names=column_names,
+            truncated=len(results) >= max_rows,
+        )
+
+
+def get_connection_arguments(database):
+    if "dsn" in database:
+        return {"conninfo": database["dsn"]}
+
+    return {"dbname": database["db_id"], **load_postgres_credential(database["credential_path"])}
+
+
+@functools.lru_cache(maxsize=None)
+def load_postgres_credential(cred_path):
+    with open(cred_path) as f:
+        return json.load(f)
+
+
+def format_column_type(data_type, character_length, precision, scale):
+    """
+    The type with its length or precision, e.g. character varying(64) or numeric(10,2).
+    """
+    if character_length is not None:
+        return f"{data_type}({character_length})"
+
+    if data_type == "numeric" and precision is not None:
+        return f"{data_type}({precision},{scale or 0})"
+
+    return data_type
@@ -0,0 +1,285 @@
+from array import array
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+ROW_FORMATS = ("tuple", "list", "dict")
+
+INT64_MIN = -(2**63)
+INT64_MAX = 2**63 - 1
+
+
+class QueryResult:
+    """
+    The rows returned by a query, stored column by column, or the error if it failed.
+
+    Columns of plain ints or floats are kept in typed arrays, everything else in tuples.
+    `row_format` records how the rows came back from the database (row tuples from
+    SQLite, row dicts from Snowflake), so iterating, indexing and `str()` give exactly
+    the rows and rendering of the list the adapter used to return.
+
+    Results are immutable: copying returns the same object, so problems derived from
+    each other share their results instead of copying every row.
+    """
+
+    __slots__ = (
+        "column_names",
+        "columns",
+        "dtypes",
+        "row_count",
+        "row_format",
+        "truncated",
+        "error",
+    )
+
+    def __init__(
+        self,
+        column_names,
+        columns,
+        row_count,
+        row_format="tuple",
+        truncated=False,
+        error=None,
+    ):
+        if row_format not in ROW_FORMATS:
+            raise ValueError(f"Unknown row format: {row_format}")
+
+        typed = [make_column_array(values) for values in columns]
+
+        object.__setattr__(self, "column_names", tuple(column_names))
+        object.__setattr__(self, "columns", tuple(values for _, values in typed))
+        object.__setattr__(self, "dtypes", tuple(dtype for dtype, _ in typed))
+        object.__setattr__(self, "row_count", row_count)
+        object.__setattr__(self, "truncated", truncated)
+        object.__setattr__(self, "error", error)
+        object.__setattr__(self, "row_format", row_format)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("QueryResult is immutable")
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (
+            QueryResult,
+            (
+                self.column_names,
+                self.columns,
+                self.row_count,
+                self.row_format,
+                self.truncated,
+                self.error,
+            ),
+        )
+
+    def __len__(self):
+        return self.row_count
+
+    def __bool__(self):
+        # A failed result reads as true, like the error message it replaces
+        return self.failed or self.row_count > 0
+
+    def __iter__(self):
+        return self.iter_rows()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.get_row(i) for i in range(*index.indices(self.row_count))]
+
+        if index < 0:
+            index += self.row_count
+        if not 0 <= index < self.row_count:
+            raise IndexError("QueryResult row index out of range")
+
+        return self.get_row(index)
+
+    def __eq__(self, other):
+        if isinstance(other, QueryResult):
+            return (
+                self.error == other.error
+                and self.row_format == other.row_format
+                and self.column_names == other.column_names
+                and self.row_count == other.row_count
+                and all(tuple(a) == tuple(b) for a, b in zip(self.columns, other.columns))
+            )
+
+        if self.failed:
+            return self.error == other
+
+        return isinstance(other, list) and self.to_rows() == other
+
+    def __hash__(self):
+        return hash((self.column_names, self.row_count, self.error))
+
+    def __str__(self):
+        if self.failed:
+            return self.error
+        return str(self.to_rows())
+
+    def __repr__(self):
+        if self.failed:
+            return f"QueryResult(error={self.error!r})"
+        return f"QueryResult(rows={self.row_count}, columns={list(self.column_names)})"
+
+    @property
+    def failed(self):
+        return self.error is not None
+
+    @classmethod
+    def from_rows(cls, rows, column_names=None, row_format="tuple", truncated=False):
+        """
+        Build a result from a list of row tuples, lists or dicts, raises ValueError if the rows are not uniform.
+
+        `row_format` is only used for an empty result, otherwise it comes from the rows.
+        """
+        rows = list(rows)
+
+        if len(rows) == 0:
+            column_names = column_names or ()
+            return cls(column_names, [[] for _ in column_names], 0, row_format, truncated)
+
+        first = rows[0]
+
+        if isinstance(first, dict):
+            keys = tuple(first.keys())
+            if any(not isinstance(row, dict) or tuple(row.keys()) != keys for row in rows):
+                raise ValueError("Row dicts do not all have the same keys")
+            columns = [[row[key] for row in rows] for key in keys]
+            return cls(keys, columns, len(rows), "dict", truncated)
+
+        if isinstance(first, (tuple, list)):
+            row_type = type(first)
+            width = len(first)
+            if any(type(row) is not row_type or len(row) != width for row in rows):
+                raise ValueError("Rows do not all have the same type and width")
+
+            if column_names is None or len(column_names) != width:
+                column_names = [str(index) for index in range(width)]
+
+            columns = [list(column) for column in zip(*rows)]
+            row_format = "tuple" if row_type is tuple else "list"
+            return cls(column_names, columns, len(rows), row_format, truncated)
+
+        raise ValueError(f"Cannot build a QueryResult from rows of type {type(first).__name__}")
+
+    @classmethod
+    def from_columns(cls, column_names, columns, row_format="dict", truncated=False):
+        """
+        Build a result from column arrays. Dict rows keep one column per name, like dict(zip(...)) would.
+        """
+        column_names = list(column_names)
+        columns = list(columns)
+
+        if row_format == "dict" and len(set(column_names)) != len(column_names):
+            merged = dict(zip(column_names, columns))
+            column_names, columns = list(merged.keys()), list(merged.values())
+
+        row_count = len(columns[0]) if columns else 0
+
+        return cls(column_names, columns, row_count, row_format, truncated)
+
+    @classmethod
+    def from_error(cls, message):
+        return cls((), (), 0, error=str(message))
+
+    @classmethod
+    def from_value(cls, value):
+        """
+        Wrap an adapter's result or error message, values that have no columnar form are returned unchanged.
+        """
+        if value is None or isinstance(value, QueryResult):
+            return value
+
+        if isinstance(value, str):
+            return cls.from_error(value)
+
+        try:
+            return cls.from_rows(value)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Keeping result as rows: {e}")
+            return value
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["column_names"],
+            data["columns"],
+            data["row_count"],
+            data["row_format"],
+            data["truncated"],
+            data["error"],
+        )
+
+    def to_dict(self):
+        return {
+            "column_names": list(self.column_names),
+            "columns": [list(values) for values in self.columns],
+            "row_count": self.row_count,
+            "row_format": self.row_format,
+            "truncated": self.truncated,
+            "error": self.error,
+        }
+
+    def to_rows(self):
+        """
+        The result as the list of rows the adapter used to return, or the error message.
+        """
+        if self.failed:
+            return self.error
+        return list(self.iter_rows())
+
+    def iter_rows(self, start=0, stop=None):
+        if stop is None or stop > self.row_count:
+            stop = self.row_count
+
+        for index in range(start, stop):
+            yield self.get_row(index)
+
+    def get_row(self, index):
+        values = [values[index] for values in self.columns]
+
+        if self.row_format == "dict":
+            return dict(zip(self.column_names, values))
+        if self.row_format == "list":
+            return values
+        return tuple(values)
+
+    def get_column_lists(self):
+        return [list(values) for values in self.columns]
+
+
+def make_column_array(values):
+    """
+    Returns (dtype, values), with columns of only ints or only floats packed into arrays.
+    """
+    if isinstance(values, array):
+        return ("float64" if values.typecode == "d" else "int64"), values
+
+    values = tuple(values)
+
+    if values and all(type(value) is int for value in values):
+        if all(INT64_MIN <= value <= INT64_MAX for value in values):
+            return "int64", array("q", values)
+
+    if values and all(type(value) is float for value in values):
+        return "float64", array("d", values)
+
+    return "object", values
+
+
+def is_failed_result(result):
+    return isinstance(result, str) or (isinstance(result, QueryResult) and result.failed)
+
+
+def as_rows(result):
+    """
+    Rows of a QueryResult, other results (rows loaded from datasets, error strings) unchanged.
+    """
+    if isinstance(result, QueryResult):
+        return result.to_rows()
+    return result
@@ -0,0 +1,153 @@
+from infra.salign.util.disk_cache import DiskCache
+from infra.salign.util.get_config import get_config
+
+import copy
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class QueryResultCache:
+    """
+    Caches successful query results keyed by (database identity, database version, normalized SQL).
+
+    Results are kept in an in-memory LRU tier and, if a path is configured, in an
+    on-disk tier that survives across runs. Changing the database (SQLite file mtime,
+    Snowflake last altered time) changes the key, so stale results are never served.
+    """
+
+    def __init__(self, max_entries, disk_path="", disk_max_bytes=0):
+        self.max_entries = max_entries
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.disk = None
+        if disk_path:
+            self.disk = DiskCache(disk_path, disk_max_bytes)
+
+        self.hits = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.saved_seconds = 0.0
+
+    def get(self, key):
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is not None:
+                self.memory.move_to_end(key)
+                self.hits += 1
+                self.memory_hits += 1
+                self.saved_seconds += entry["seconds"]
+
+        if entry is None and self.disk is not None:
+            entry = self.disk.get(key)
+            if entry is not None:
+                self.put_memory(key, entry)
+                with self.lock:
+                    self.hits += 1
+                    self.disk_hits += 1
+                    self.saved_seconds += entry["seconds"]
+
+        if entry is None:
+            with self.lock:
+                self.misses += 1
+            return None
+
+        # Callers own their results, so hand out a copy
+        return copy.deepcopy(entry["result"])
+
+    def put(self, key, result, seconds):
+        entry = {"result": copy.deepcopy(result), "seconds": seconds}
+
+        self.put_memory(key, entry)
+
+        if self.disk is not None:
+            self.disk.put(key, entry)
+
+    def put_memory(self, key, entry):
+        with self.lock:
+            self.memory[key] = entry
+            self.memory.move_to_end(key)
+
+            while len(self.memory) > self.max_entries:
+                self.memory.popitem(last=False)
+                self.memory_evictions += 1
+
+    def get_stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "memory_entries": len(self.memory),
+                "memory_evictions": self.memory_evictions,
+                "disk_evictions": self.disk.evictions if self.disk else 0,
+                "saved_seconds": self.saved_seconds,
+            }
+
+
+def make_query_cache_key(database_identity, database_version, query):
+    key = repr((database_identity, database_version, normalize_sql(query)))
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def normalize_sql(query):
+    """
+    Collapse whitespace and drop trailing semicolons, leaving quoted strings and identifiers untouched.
+    """
+    parts = re.split(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\")", query)
+
+    for index in range(0, len(parts), 2):
+        parts[index] = re.sub(r"\s+", " ", parts[index])
+
+    normalized = "".join(parts).strip()
+
+    while normalized.endswith(";"):
+        normalized = normalized[:-1].rstrip()
+
+    return normalized
+
+
+query_result_cache = None
+query_result_cache_lock = threading.Lock()
+
+
+def get_query_result_cache():
+    """
+    Get the process-wide query result cache, or None if caching is disabled.
+    """
+    global query_result_cache
+
+    config = get_config()
+
+    if not config["query_cache_enabled"]:
+        return None
+
+    with query_result_cache_lock:
+        if query_result_cache is None:
+            query_result_cache = QueryResultCache(
+                max_entries=config["query_cache_max_entries"],
+                disk_path=config["query_cache_path"],
+                disk_max_bytes=config["query_cache_max_bytes"],
+            )
+
+        return query_result_cache
+
+
+def get_query_cache_stats():
+    cache = get_query_result_cache()
+
+    if cache is None:
+        return {}
+
+    return cache.get_stats()
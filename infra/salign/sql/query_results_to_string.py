@@ -1,21 +1,90 @@
+from infra.salign.sql.query_result import QueryResult
 from infra.salign.util.get_config import get_config
+from infra.salign.util.tokenizer import count_tokens_uncached, truncate_to_tokens
+
+# Rows rendered at first when looking for the ends of a long result, doubled as needed
+FIRST_RENDERED_ROWS = 8
 
 
 def query_results_to_string(results):
     config = get_config()
 
-    string = str(results)
+    max_tokens = config["max_query_result_tokens"]
 
-    max_len = config["max_query_result_length"]
+    if isinstance(results, QueryResult) and not results.failed:
+        return query_result_to_string(results, max_tokens)
+
+    string = str(results)
 
-    if len(string) <= max_len:
+    if count_tokens_uncached(string) <= max_tokens:
         return string
 
-    half_max = max_len // 2
+    return truncate_result_string(string, string, max_tokens, len(results))
+
+
+def truncate_result_string(head, tail, max_tokens, row_count):
+    half_max = max_tokens // 2
 
     return (
-        string[:half_max]
+        truncate_to_tokens(head, half_max)
         + "..."
-        + string[-half_max:]
-        + f" (total rows: {len(results)})"
+        + truncate_to_tokens(tail, half_max, keep_end=True)
+        + f" (total rows: {row_count})"
     )
+
+
+def query_result_to_string(result, max_tokens):
+    """
+    The same string as for the list of rows, but a long result only renders rows from its two ends.
+    """
+    half_max = max_tokens // 2
+
+    # A prefix of str(rows) longer than max_tokens means the whole string is too
+    head = render_head(result, max_tokens)
+
+    if head is None:
+        string = str(result)
+
+        if count_tokens_uncached(string) <= max_tokens:
+            return string
+
+        return truncate_result_string(string, string, max_tokens, len(result))
+
+    tail = render_tail(result, half_max)
+
+    return truncate_result_string(head, tail, max_tokens, len(result))
+
+
+def render_head(result, max_tokens):
+    """
+    A prefix of str(rows) with more than max_tokens tokens, or None if the whole result is shorter.
+    """
+    row_count = FIRST_RENDERED_ROWS
+
+    while row_count < len(result):
+        head = "[" + ", ".join(repr(row) for row in result.iter_rows(0, row_count))
+
+        if count_tokens_uncached(head) > max_tokens:
+            return head
+
+        row_count *= 2
+
+    return None
+
+
+def render_tail(result, max_tokens):
+    """
+    A suffix of str(rows) with more than max_tokens tokens, or the whole string.
+    """
+    row_count = FIRST_RENDERED_ROWS
+
+    while row_count < len(result):
+        start = len(result) - row_count
+        tail = ", ".join(repr(row) for row in result.iter_rows(start)) + "]"
+
+        if count_tokens_uncached(tail) > max_tokens:
+            return tail
+
+        row_count *= 2
+
+    return str(result)
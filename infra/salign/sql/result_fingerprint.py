@@ -0,0 +1,250 @@
+from infra.salign.sql.compare_columns import CanonicalColumn, stable_hash
+from infra.salign.sql.query_result import QueryResult
+
+import math
+
+# Above this, str(int) and str(float) stop sorting the same way, so exact hashes are not trusted
+MAX_EXACT_NUMBER = 1e15
+
+
+class ResultFingerprint:
+    """
+    A compact summary of a query result that decides most result comparisons in O(columns).
+
+    For each column it keeps the signature used by `columns_match` (row count, null and
+    number counts, hash of the text values), a hash of the exact values as a multiset
+    and as a sequence, and the kinds of values present. Different signatures prove two
+    columns don't match, equal exact hashes prove they do. Anything in between
+    (numbers that differ by less than the tolerance) is left to `compare_pandas_table`.
+
+    When ignoring row order, `compare_pandas_table` sorts values by `str(value)`, so in
+    a column mixing text with numbers or nulls, 1 and 1.0 or None and NaN sort to
+    different places among the text. Equal multisets don't prove such columns match.
+
+    Fingerprints are immutable and round trip through `to_dict` so they can be stored
+    on problems next to reference results.
+    """
+
+    __slots__ = ("row_count", "signatures", "multiset_hashes", "sequence_hashes", "dtypes")
+
+    def __init__(self, row_count, signatures, multiset_hashes, sequence_hashes, dtypes):
+        object.__setattr__(self, "row_count", row_count)
+        object.__setattr__(self, "signatures", tuple(signatures))
+        object.__setattr__(self, "multiset_hashes", tuple(multiset_hashes))
+        object.__setattr__(self, "sequence_hashes", tuple(sequence_hashes))
+        object.__setattr__(self, "dtypes", tuple(dtypes))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("ResultFingerprint is immutable")
+
+    def __eq__(self, other):
+        return isinstance(other, ResultFingerprint) and self.to_dict() == other.to_dict()
+
+    def __hash__(self):
+        return hash((self.row_count, self.signatures, self.multiset_hashes))
+
+    def __repr__(self):
+        return f"ResultFingerprint(rows={self.row_count}, dtypes={list(self.dtypes)})"
+
+    @property
+    def column_count(self):
+        return len(self.signatures)
+
+    @classmethod
+    def from_result(cls, result):
+        """
+        Fingerprint a QueryResult or a list of row tuples or row dicts, or return None if the rows are not uniform.
+        """
+        columns = get_columns(result)
+
+        if columns is None:
+            return None
+
+        signatures = []
+        multiset_hashes = []
+        sequence_hashes = []
+        dtypes = []
+
+        for values in columns:
+            column = CanonicalColumn(values)
+
+            if not column.exact:
+                signatures.append(None)
+                multiset_hashes.append(None)
+                sequence_hashes.append(None)
+                dtypes.append("other")
+                continue
+
+            signatures.append(column.signature)
+
+            tokens = [get_exact_token(value) for value in values]
+
+            if any(token is None for token in tokens):
+                multiset_hashes.append(None)
+                sequence_hashes.append(None)
+            else:
+                multiset_hashes.append(stable_hash(tuple(sorted(tokens))))
+                sequence_hashes.append(stable_hash(tuple(tokens)))
+
+            dtypes.append(get_dtype(tokens, values))
+
+        return cls(len(result), signatures, multiset_hashes, sequence_hashes, dtypes)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            data["row_count"],
+            [tuple(s) if s is not None else None for s in data["signatures"]],
+            data["multiset_hashes"],
+            data["sequence_hashes"],
+            data["dtypes"],
+        )
+
+    def to_dict(self):
+        return {
+            "row_count": self.row_count,
+            "signatures": [list(s) if s is not None else None for s in self.signatures],
+            "multiset_hashes": list(self.multiset_hashes),
+            "sequence_hashes": list(self.sequence_hashes),
+            "dtypes": list(self.dtypes),
+        }
+
+    def matches(self, generated, condition_cols=[], ignore_order=True):
+        """
+        Compare this reference fingerprint with the fingerprint of a generated result.
+
+        Returns True or False when the fingerprints decide the comparison the same way
+        `compare_pandas_table` would, and None when a full comparison is needed.
+        """
+        if condition_cols != []:
+            if any(
+                not isinstance(index, int) or not -self.column_count <= index < self.column_count
+                for index in condition_cols
+            ):
+                return None
+            columns = [self.column(index) for index in condition_cols]
+        else:
+            columns = [self.column(index) for index in range(self.column_count)]
+
+        exact_hashes = set(
+            generated.multiset_hashes if ignore_order else generated.sequence_hashes
+        )
+        exact_hashes.discard(None)
+
+        generated_signatures = set(generated.signatures)
+
+        # A generated column without a signature could match anything
+        generated_has_unknown = None in generated_signatures
+
+        undecided = False
+
+        for signature, multiset_hash, sequence_hash, dtype in columns:
+            exact_hash = multiset_hash if ignore_order else sequence_hash
+
+            if ignore_order and is_mixed_text(dtype):
+                exact_hash = None
+
+            if exact_hash is not None and exact_hash in exact_hashes:
+                continue
+
+            if signature is None or generated_has_unknown or signature in generated_signatures:
+                undecided = True
+                continue
+
+            return False
+
+        return None if undecided else True
+
+    def column(self, index):
+        return (
+            self.signatures[index],
+            self.multiset_hashes[index],
+            self.sequence_hashes[index],
+            self.dtypes[index],
+        )
+
+
+def get_columns(result):
+    if isinstance(result, QueryResult):
+        return get_query_result_columns(result)
+
+    if isinstance(result, str) or not isinstance(result, (list, tuple)):
+        return None
+
+    if len(result) == 0:
+        return []
+
+    first = result[0]
+
+    if isinstance(first, dict):
+        keys = tuple(first.keys())
+        if any(not isinstance(row, dict) or tuple(row.keys()) != keys for row in result):
+            return None
+        return [[row[key] for row in result] for key in keys]
+
+    if isinstance(first, (list, tuple)):
+        width = len(first)
+        if any(not isinstance(row, (list, tuple)) or len(row) != width for row in result):
+            return None
+        return [list(column) for column in zip(*result)] if width > 0 else None
+
+    return None
+
+
+def get_query_result_columns(result):
+    if result.failed:
+        return None
+
+    # The same columns get_columns finds in the rows, an empty result has none
+    if result.row_count == 0:
+        return []
+
+    if result.row_format != "dict" and not result.column_names:
+        return None
+
+    return result.get_column_lists()
+
+
+def get_exact_token(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "n"
+
+    # Booleans compare equal to 1 and 0 but sort differently, keep them apart
+    if isinstance(value, bool):
+        return "b" + str(value)
+
+    if isinstance(value, (int, float)):
+        if math.isinf(value):
+            return "f" + repr(float(value))
+        if abs(value) >= MAX_EXACT_NUMBER:
+            return None
+        return "f" + repr(float(value))
+
+    if isinstance(value, str):
+        return "t" + value
+
+    return None
+
+
+def is_mixed_text(dtype):
+    kinds = dtype.split("|")
+
+    return "text" in kinds and len(kinds) > 1
+
+
+def get_dtype(tokens, values):
+    kinds = set()
+
+    for token, value in zip(tokens, values):
+        if token is None:
+            kinds.add("other")
+        elif token == "n":
+            kinds.add("null")
+        elif token[0] == "t":
+            kinds.add("text")
+        elif token[0] == "b":
+            kinds.add("bool")
+        else:
+            kinds.add("number")
+
+    return "|".join(sorted(kinds)) if kinds else "empty"
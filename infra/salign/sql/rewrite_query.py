@@ -0,0 +1,89 @@
+import functools
+import re
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A plain or double quoted SQL identifier
+IDENTIFIER = r'(?:"(?:[^"]|"")+"|[A-Za-z_][A-Za-z0-9_$]*)'
+
+# Database types whose sqlglot dialect has a different name
+SQL_DIALECTS = {"postgresql": "postgres"}
+
+
+@functools.lru_cache(maxsize=4096)
+def rewrite_query(query, source_database, source_dialect=None, target_dialect=None):
+    """
+    A query written against the warehouse, rewritten for a local mirror of it.
+
+    Fully qualified names lose their database, `MGO."SALES".ORDERS` becomes
+    `"SALES".ORDERS`, and the SQL is transpiled from source_dialect to target_dialect
+    when sqlglot is installed. Without sqlglot, or if it can't parse the query, only
+    the names are rewritten.
+    """
+    if source_dialect and target_dialect and source_dialect != target_dialect:
+        transpiled = transpile_query(
+            query, source_database, source_dialect, target_dialect
+        )
+
+        if transpiled is not None:
+            return transpiled
+
+    return strip_database_qualifier(query, source_database)
+
+
+def transpile_query(query, source_database, source_dialect, target_dialect):
+    # sqlglot is optional, only mirrors of a warehouse with a different dialect need it
+    try:
+        import sqlglot
+        from sqlglot import exp
+    except ImportError:
+        return None
+
+    try:
+        expressions = sqlglot.parse(query, read=get_sql_dialect(source_dialect))
+
+        for expression in expressions:
+            if expression is None:
+                continue
+
+            for table in expression.find_all(exp.Table, exp.Column):
+                if is_same_name(table.catalog, source_database):
+                    table.set("catalog", None)
+
+        return ";\n".join(
+            expression.sql(dialect=get_sql_dialect(target_dialect))
+            for expression in expressions
+            if expression is not None
+        )
+
+    except Exception as e:
+        logger.debug(f"Unable to transpile query, only rewriting names: {e}")
+        return None
+
+
+def strip_database_qualifier(query, source_database):
+    return re.sub(
+        get_database_qualifier_pattern(source_database) + rf"(?={IDENTIFIER}\s*\.)",
+        "",
+        query,
+    )
+
+
+def get_database_qualifier_pattern(source_database):
+    """
+    Matches `DB.` or `"DB".` at the start of a qualified name, but not after another name part.
+    """
+    name = re.escape(source_database)
+
+    return rf'(?<![\w$."])(?i:{name}|"{name}")\s*\.\s*'
+
+
+def get_sql_dialect(db_type):
+    return SQL_DIALECTS.get(db_type, db_type)
+
+
+def is_same_name(name, source_database):
+    # Snowflake folds unquoted names to upper case, compare the way the warehouse resolves them
+    return bool(name) and name.upper() == source_database.upper()
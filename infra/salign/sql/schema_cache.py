@@ -0,0 +1,99 @@
+from infra.salign.util.disk_cache import DiskCache
+from infra.salign.util.get_config import get_config
+from infra.salign.util.get_db_adapter_from_config import get_db_adapter_from_config
+
+import copy
+import hashlib
+import threading
+import time
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+schema_cache = None
+memory_schemas = {}
+schema_cache_lock = threading.Lock()
+
+
+def get_table_info(database):
+    """
+    The adapter's table info for the database, cached in memory and on disk.
+
+    Entries are refreshed after `schema_cache_ttl` seconds, or sooner if the database
+    version (SQLite file mtime, Snowflake last altered time) changes.
+    """
+    db_adapter = get_db_adapter_from_config(database)
+
+    key = make_schema_cache_key(db_adapter.get_database_identity(database))
+    version = repr(db_adapter.get_database_version(database))
+
+    entry = get_schema_entry(key)
+
+    if entry is not None and is_current(entry, version):
+        return copy.deepcopy(entry["table_info"])
+
+    start_time = time.time()
+
+    table_info = db_adapter.get_table_info(database)
+
+    logger.info(
+        f"Fetched schema of {len(table_info)} tables in {time.time() - start_time:.1f}s"
+    )
+
+    put_schema_entry(
+        key, {"table_info": table_info, "version": version, "fetched_at": time.time()}
+    )
+
+    return copy.deepcopy(table_info)
+
+
+def is_current(entry, version):
+    ttl = get_config()["schema_cache_ttl"]
+
+    return entry["version"] == version and time.time() - entry["fetched_at"] < ttl
+
+
+def get_schema_entry(key):
+    with schema_cache_lock:
+        entry = memory_schemas.get(key)
+
+    if entry is None:
+        disk = get_schema_disk_cache()
+        if disk is not None:
+            entry = disk.get(key)
+            if entry is not None:
+                with schema_cache_lock:
+                    memory_schemas[key] = entry
+
+    return entry
+
+
+def put_schema_entry(key, entry):
+    with schema_cache_lock:
+        memory_schemas[key] = entry
+
+    disk = get_schema_disk_cache()
+    if disk is not None:
+        disk.put(key, entry)
+
+
+def get_schema_disk_cache():
+    global schema_cache
+
+    config = get_config()
+
+    if not config["schema_cache_path"]:
+        return None
+
+    with schema_cache_lock:
+        if schema_cache is None:
+            schema_cache = DiskCache(
+                config["schema_cache_path"], config["schema_cache_max_bytes"]
+            )
+
+        return schema_cache
+
+
+def make_schema_cache_key(database_identity):
+    return hashlib.sha256(repr(database_identity).encode("utf-8")).hexdigest()
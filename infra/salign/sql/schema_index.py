@@ -0,0 +1,128 @@
+from infra.salign.util.get_config import get_config
+
+import re
+import threading
+from collections import OrderedDict
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Schemas are reused by every problem on a database, only a few are live at once
+SCHEMA_INDEX_CACHE_SIZE = 32
+
+
+class SchemaIndex:
+    """
+    A TF-IDF index over column documents (table and column names, types, descriptions,
+    sample values) that ranks columns by relevance to a question.
+
+    scikit-learn is imported lazily. Without it, or for an empty question, columns keep
+    their original order.
+    """
+
+    def __init__(self, documents):
+        self.documents = documents
+        self.vectorizer = None
+        self.matrix = None
+
+        if len(documents) == 0:
+            return
+
+        try:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+        except ImportError:
+            logger.warning("scikit-learn is not installed, columns will not be ranked.")
+            return
+
+        self.vectorizer = TfidfVectorizer(
+            tokenizer=tokenize_schema_text,
+            lowercase=False,
+            token_pattern=None,
+            sublinear_tf=True,
+        )
+
+        try:
+            self.matrix = self.vectorizer.fit_transform(documents)
+        except ValueError:
+            # Every document was empty after tokenization
+            self.vectorizer = None
+
+    def rank(self, question):
+        """
+        Returns document indices from most to least relevant, ties keep their original order.
+        """
+        if self.vectorizer is None or not question:
+            return list(range(len(self.documents)))
+
+        query = self.vectorizer.transform([question])
+
+        # Rows are L2 normalized, so the dot product is the cosine similarity
+        scores = (self.matrix @ query.T).toarray().ravel()
+
+        return sorted(range(len(self.documents)), key=lambda index: -scores[index])
+
+
+def tokenize_schema_text(text):
+    """
+    Lowercase words, with identifiers like ORDER_DATE or orderDate also split into their parts.
+    """
+    tokens = []
+
+    for word in re.findall(r"[A-Za-z0-9_]+", text):
+        lowered = word.lower()
+        tokens.append(lowered)
+
+        parts = re.findall(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+", word)
+        if len(parts) > 1:
+            tokens.extend(part.lower() for part in parts)
+
+    # Table names are often plural (ORDERS) while questions are not (each order)
+    tokens.extend(
+        token[:-1]
+        for token in list(tokens)
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss")
+    )
+
+    return tokens
+
+
+schema_indexes = OrderedDict()
+schema_indexes_lock = threading.Lock()
+
+
+def get_schema_index(documents):
+    """
+    Get the index for a tuple of column documents, built once and reused across questions.
+    """
+    with schema_indexes_lock:
+        index = schema_indexes.get(documents)
+        if index is not None:
+            schema_indexes.move_to_end(documents)
+            return index
+
+    index = SchemaIndex(list(documents))
+
+    with schema_indexes_lock:
+        schema_indexes[documents] = index
+        while len(schema_indexes) > SCHEMA_INDEX_CACHE_SIZE:
+            schema_indexes.popitem(last=False)
+
+    return index
+
+
+def rank_by_relevance(items, documents, question, top_k=None):
+    """
+    Sort items by how relevant their documents are to the question, keeping the top_k if given.
+    """
+    config = get_config()
+
+    if not config["schema_linking_enabled"]:
+        return list(items)[:top_k] if top_k is not None else list(items)
+
+    order = get_schema_index(tuple(documents)).rank(question)
+
+    if top_k is not None:
+        order = order[:top_k]
+
+    return [items[index] for index in order]
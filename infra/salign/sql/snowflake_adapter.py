@@ -1,8 +1,15 @@
+from infra.salign.sql.arrow_result import convert_arrow_columns, read_arrow_table
+from infra.salign.sql.connection_pool import get_connection_pool
 from infra.salign.sql.database_adapter import DatabaseAdapter
+from infra.salign.sql.query_result import QueryResult
 from infra.salign.util.get_config import get_config
 from contextlib import contextmanager
 import snowflake.connector
+import functools
 import json
+import os
+import threading
+import time
 import pandas as pd
 
 import logging
@@ -10,40 +17,133 @@ import logging
 logging.getLogger("snowflake.connector").setLevel(logging.WARNING)
 logger = logging.getLogger(__name__)
 
+database_versions = {}
+database_versions_lock = threading.Lock()
+
 
 class SnowflakeAdapter(DatabaseAdapter):
+    dialect = "snowflake"
 
     @contextmanager
     def create_db_connection(self, database):
-        """Context manager for Snowflake database connections."""
+        """Context manager for pooled Snowflake database connections."""
 
         config = get_config()
         query_execution_timeout = config["query_execution_timeout"]
 
-        conn = None
-        cursor = None
-        try:
-            cred_path = database["credential_path"]
-            snowflake_credential = json.load(open(cred_path))
+        cred_path = database["credential_path"]
 
-            conn = snowflake.connector.connect(
+        pool = get_connection_pool(
+            self.get_database_identity(database),
+            lambda: snowflake.connector.connect(
                 database=database["db_id"],
                 network_timeout=query_execution_timeout,
-                **snowflake_credential,
-            )
-            cursor = conn.cursor()
-            yield cursor
+                **load_snowflake_credential(cred_path),
+            ),
+            self.is_connection_alive,
+        )
+
+        cursor = None
+        try:
+            with pool.connection() as conn:
+                try:
+                    cursor = conn.cursor()
+                    yield cursor
+                finally:
+                    if cursor:
+                        cursor.close()
 
         except Exception as e:
             logger.error(f"Snowflake connection error: {e}")
             raise
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
+
+    def is_connection_alive(self, conn):
+        return not conn.is_closed()
+
+    def quote_table_name(self, table_name):
+        # The database is named as configured, schemas and tables as INFORMATION_SCHEMA spells them
+        database_name, *names = table_name.split(".")
+        return ".".join(
+            [database_name] + ['"' + name.replace('"', '""') + '"' for name in names]
+        )
+
+    def get_sample_query(self, table_name, row_count):
+        # A random sample of the table rather than the first rows of its first micro-partitions
+        if not row_count:
+            return f"SELECT * FROM {table_name}"
+
+        return f"SELECT * FROM {table_name} SAMPLE ({int(row_count)} ROWS)"
+
+    def get_database_identity(self, database):
+        return (
+            "snowflake",
+            database["db_id"],
+            os.path.abspath(database["credential_path"]),
+        )
+
+    def get_database_version(self, database):
+        """
+        The most recent LAST_ALTERED time of any table, re-read at most once per `database_version_ttl` seconds.
+        """
+        identity = self.get_database_identity(database)
+        ttl = get_config()["database_version_ttl"]
+
+        with database_versions_lock:
+            cached = database_versions.get(identity)
+            if cached is not None and time.monotonic() - cached[1] < ttl:
+                return cached[0]
+
+        with self.create_db_connection(database) as cursor:
+            cursor.execute(
+                "SELECT MAX(LAST_ALTERED) FROM {}.INFORMATION_SCHEMA.TABLES".format(
+                    database["db_id"]
+                )
+            )
+            version = str(cursor.fetchone()[0])
+
+        with database_versions_lock:
+            database_versions[identity] = (version, time.monotonic())
+
+        return version
 
     def get_table_info(self, database):
+        """
+        Columns of every base table from a single INFORMATION_SCHEMA.COLUMNS query.
+        """
+        database_name = database["db_id"]
+
+        with self.create_db_connection(database) as cursor:
+            cursor.execute(
+                "SELECT c.TABLE_SCHEMA, c.TABLE_NAME, c.COLUMN_NAME, c.DATA_TYPE, "
+                "c.CHARACTER_MAXIMUM_LENGTH, c.NUMERIC_PRECISION, c.NUMERIC_SCALE "
+                "FROM {db}.INFORMATION_SCHEMA.COLUMNS AS c "
+                "JOIN {db}.INFORMATION_SCHEMA.TABLES AS t "
+                "ON c.TABLE_SCHEMA = t.TABLE_SCHEMA AND c.TABLE_NAME = t.TABLE_NAME "
+                "WHERE t.TABLE_TYPE = 'BASE TABLE' "
+                "ORDER BY c.TABLE_SCHEMA, c.TABLE_NAME, c.ORDINAL_POSITION".format(
+                    db=database_name
+                )
+            )
+            rows = cursor.fetchall()
+
+        table_info = {}
+        for schema_name, table_name, column_name, *column_type in rows:
+            formatted_table_name = "{}.{}.{}".format(
+                database_name, schema_name, table_name
+            )
+            table_info.setdefault(formatted_table_name, []).append(
+                {
+                    "column": '"' + str(column_name) + '"',
+                    "type": format_column_type(*column_type),
+                }
+            )
+
+        return table_info
+
+    def get_table_info_per_table(self, database):
+        """
+        The previous SHOW TABLES and DESCRIBE TABLE walk, one round trip per table.
+        """
         database_name = database["db_id"]
 
         with self.create_db_connection(database) as cursor:
@@ -83,8 +183,49 @@ class SnowflakeAdapter(DatabaseAdapter):
 
         max_rows = config["max_rows_per_query"]
 
-        results = cursor.fetchmany(max_rows)
-        columns = [desc[0] for desc in cursor.description]
-        df = pd.DataFrame(results, columns=columns)
+        try:
+            column_names = [desc[0] for desc in cursor.description]
+            table = read_arrow_table(cursor.fetch_arrow_batches(), column_names, max_rows)
+        except Exception as e:
+            # Results that are not in Arrow format (e.g. SHOW commands) or no pyarrow
+            logger.debug(f"Falling back to fetchmany: {e}")
+            table = None
+
+        if table is None:
+            results = cursor.fetchmany(max_rows)
+            columns = [desc[0] for desc in cursor.description]
+            df = pd.DataFrame(results, columns=columns)
+
+            return QueryResult.from_rows(
+                super().convert_decimals_to_floats(df.to_dict(orient="records")),
+                column_names=columns,
+                row_format="dict",
+                truncated=len(results) >= max_rows,
+            )
+
+        # The columns are kept as they are, rows are only built when a prompt renders them
+        return QueryResult.from_columns(
+            table.column_names,
+            convert_arrow_columns(table),
+            row_format="dict",
+            truncated=table.num_rows >= max_rows,
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def load_snowflake_credential(cred_path):
+    with open(cred_path) as f:
+        return json.load(f)
+
+
+def format_column_type(data_type, character_length, precision, scale):
+    """
+    Rebuild the type DESCRIBE TABLE shows, e.g. NUMBER(38,0) or VARCHAR(16777216).
+    """
+    if data_type == "NUMBER" and precision is not None:
+        return f"NUMBER({precision},{scale or 0})"
+
+    if data_type == "TEXT" and character_length is not None:
+        return f"VARCHAR({character_length})"
 
-        return super().convert_decimals_to_floats(df.to_dict(orient="records"))
+    return data_type
@@ -1,7 +1,9 @@
 import os
 import sqlite3
 import time
+from infra.salign.sql.connection_pool import get_connection_pool
 from infra.salign.sql.database_adapter import DatabaseAdapter
+from infra.salign.sql.query_result import QueryResult
 from infra.salign.util.get_config import get_config
 from contextlib import contextmanager
 import logging
@@ -10,10 +12,11 @@ logger = logging.getLogger(__name__)
 
 
 class SQLiteAdapter(DatabaseAdapter):
+    dialect = "sqlite"
 
     @contextmanager
     def create_db_connection(self, database):
-        """Context manager for SQLite database connections."""
+        """Context manager for pooled SQLite database connections."""
         database_path = self.get_database_path(database)
         assert os.path.exists(
             database_path
@@ -22,33 +25,55 @@ class SQLiteAdapter(DatabaseAdapter):
         config = get_config()
         query_execution_timeout = config["query_execution_timeout"]
 
-        conn = None
+        pool = get_connection_pool(
+            self.get_database_identity(database),
+            lambda: self.create_sqlite_connection(
+                database_path, timeout_seconds=query_execution_timeout
+            ),
+            self.is_connection_alive,
+        )
+
         cursor = None
         try:
-            conn = self.create_sqlite_connection(
-                database_path, timeout_seconds=query_execution_timeout
-            )
-            cursor = conn.cursor()
-            yield cursor
+            with pool.connection() as conn:
+                # The timeout is measured from checkout, not from when the pooled connection was opened
+                self.set_query_timeout(conn, query_execution_timeout)
+                try:
+                    cursor = conn.cursor()
+                    yield cursor
+                finally:
+                    if cursor:
+                        cursor.close()
+                    # Don't leak an open transaction to the next user of the connection
+                    conn.rollback()
 
         except Exception as e:
             logger.error(f"SQLite connection error: {e}")
             raise
-        finally:
-            if cursor:
-                cursor.close()
-            if conn:
-                conn.close()
 
     def get_database_path(self, database):
         """Get database path from database configuration."""
         return database["path"]
 
+    def get_database_identity(self, database):
+        return ("sqlite", os.path.abspath(self.get_database_path(database)))
+
+    def get_database_version(self, database):
+        stat = os.stat(self.get_database_path(database))
+        return (stat.st_mtime_ns, stat.st_size)
+
     def create_sqlite_connection(self, db_file, timeout_seconds=30):
         """Create a SQLite connection with timeout handling."""
         # Create a connection to the SQLite database
-        conn = sqlite3.connect(db_file)
+        # Pooled connections are handed out to whichever thread asks next
+        conn = sqlite3.connect(db_file, check_same_thread=False)
+
+        self.set_query_timeout(conn, timeout_seconds)
+
+        return conn
 
+    def set_query_timeout(self, conn, timeout_seconds):
+        """Abort any query on `conn` that runs longer than `timeout_seconds` from now."""
         # Track when the query started
         start_time = time.time()
 
@@ -66,32 +91,49 @@ class SQLiteAdapter(DatabaseAdapter):
         # to execute between invocations of the callback
         conn.set_progress_handler(progress_callback, 1000)
 
-        return conn
+    def quote_table_name(self, table_name):
+        return '"' + table_name.replace('"', '""') + '"'
+
+    def is_connection_alive(self, conn):
+        conn.execute("SELECT 1").fetchone()
+        return True
 
     def get_table_info(self, database):
-        # Get all table names and column names
+        # Get all table names and column names in one query
         with self.create_db_connection(database) as cursor:
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-            tables = cursor.fetchall()
-
-            table_info = {}
-            for table in tables:
-                table_name = table[0]
-                cursor.execute(f"PRAGMA table_info('{table_name}')")
-                columns = cursor.fetchall()
+            try:
+                cursor.execute(
+                    "SELECT m.name, p.name, p.type FROM sqlite_master AS m "
+                    "JOIN pragma_table_info(m.name) AS p "
+                    "WHERE m.type='table' ORDER BY m.rowid, p.cid;"
+                )
+                rows = cursor.fetchall()
+            except sqlite3.OperationalError:
+                # pragma table valued functions need SQLite 3.16
+                return self.get_table_info_per_table(cursor)
+
+        table_info = {}
+        for table_name, column_name, column_type in rows:
+            table_info.setdefault(table_name, []).append(
+                {"column": quote_column_name(column_name), "type": column_type}
+            )
 
-                for index, column in enumerate(columns):
+        return table_info
 
-                    columns[index] = list(column)
+    def get_table_info_per_table(self, cursor):
+        cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+        tables = cursor.fetchall()
 
-                    if column[1].find("-") != -1:
-                        columns[index][1] = '"' + column[1] + '"'
-                    elif column[1].find(" ") != -1:
-                        columns[index][1] = '"' + column[1] + '"'
+        table_info = {}
+        for table in tables:
+            table_name = table[0]
+            cursor.execute(f"PRAGMA table_info('{table_name}')")
+            columns = cursor.fetchall()
 
-                table_info[table_name] = [
-                    {"column": column[1], "type": column[2]} for column in columns
-                ]
+            table_info[table_name] = [
+                {"column": quote_column_name(column[1]), "type": column[2]}
+                for column in columns
+            ]
 
         return table_info
 
@@ -99,4 +141,12 @@ class SQLiteAdapter(DatabaseAdapter):
         result = list(cursor.fetchall())
         result = super().convert_decimals_to_floats(result)
 
-        return result
+        column_names = [desc[0] for desc in cursor.description or ()]
+
+        return QueryResult.from_rows(result, column_names=column_names)
+
+
+def quote_column_name(column_name):
+    if column_name.find("-") != -1 or column_name.find(" ") != -1:
+        return '"' + column_name + '"'
+    return column_name
@@ -2,8 +2,15 @@ from infra.salign.engine.super_aligner_engine import SuperAlignerEngine
 
 
 class SuperAligner:
-    def __init__(self, llm=None):
-        self.engine = SuperAlignerEngine(llm=llm)
+    """
+    config_overrides replace settings while solve runs. They replace them for the whole
+    process, so only one SuperAligner with overrides can solve at a time per process.
+    Settings that loading problems depends on have to be overridden around it as well,
+    with override_config.
+    """
+
+    def __init__(self, llm=None, config_overrides=None):
+        self.engine = SuperAlignerEngine(llm=llm, config_overrides=config_overrides)
 
     def connect(self, database):
         self.engine.connect(database)
@@ -23,5 +30,5 @@ class SuperAligner:
     def align(self):
         return self.engine.align()
 
-    def solve(self):
-        return self.engine.solve()
+    def solve(self, resume=False):
+        return self.engine.solve(resume=resume)
@@ -1,15 +1,12 @@
 from infra.salign.sql.get_db_profile import get_db_profile
-from infra.salign.sql.execute_query import execute_query
+from infra.salign.sql.execute_queries import execute_queries
 from infra.salign.sql.query_results_to_string import query_results_to_string
 
-from infra.salign.util.get_inference_api_url import get_inference_api_url
+from infra.salign.inference.inference_gateway import generate
+from infra.salign.util.derive_example import derive_example
 from infra.salign.util.get_config import get_config
 from infra.salign.util.prompt_template import PromptTemplate
 
-import scalarlm
-
-import copy
-
 import logging
 
 logger = logging.getLogger(__name__)
@@ -19,9 +16,7 @@ def add_reasoning_trajectories(original_dataset):
 
     prompts = make_reasoning_prompts(dataset)
 
-    llm = scalarlm.SupermassiveIntelligence(api_url=get_inference_api_url())
-
-    responses = llm.generate(prompts, max_tokens=512)
+    responses = generate(prompts, max_tokens=512)
 
     trajectories = make_new_trajectories(dataset, responses)
 
@@ -33,11 +28,12 @@ def add_results(original_dataset):
 
     logger.info(f"Adding results to {len(original_dataset)} examples.")
 
-    for example in original_dataset:
-        data = copy.deepcopy(example)
-        reference_result, reference_failed = execute_query(
-            example, example["reference_sql"]
-        )
+    executed = execute_queries(
+        original_dataset, [example["reference_sql"] for example in original_dataset]
+    )
+
+    for example, (reference_result, reference_failed) in zip(original_dataset, executed):
+        data = derive_example(example)
 
         data["reference_result"] = reference_result
         data["reference_failed"] = reference_failed
@@ -90,7 +86,7 @@ def make_new_trajectories(dataset, responses):
     trajectories = []
 
     for response, data in zip(responses, dataset):
-        trajectory = copy.deepcopy(data)
+        trajectory = derive_example(data)
 
         reasoning = extract_explanation(response)
         trajectory["reasoning"] = reasoning
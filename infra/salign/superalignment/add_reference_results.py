@@ -0,0 +1,92 @@
+from infra.salign.sql.execute_queries import execute_queries
+from infra.salign.sql.query_result_cache import normalize_sql
+from infra.salign.sql.result_fingerprint import ResultFingerprint
+
+from infra.salign.util.get_db_adapter_from_config import get_db_adapter_from_config
+
+import hashlib
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def add_reference_results(problems):
+    """
+    Execute each problem's reference query once and store the result on the problem.
+
+    Problems whose stored result was computed from the same reference SQL against the
+    same database version are left alone, so this is cheap to call every iteration.
+    Failed reference queries are retried on every call.
+    """
+    stale_problems = [
+        problem
+        for problem in problems
+        if "reference_sql" in problem and not has_current_reference_result(problem)
+    ]
+
+    if len(stale_problems) == 0:
+        return
+
+    logger.info(f"Computing reference results for {len(stale_problems)} problems.")
+
+    executed = execute_queries(
+        stale_problems, [problem["reference_sql"] for problem in stale_problems]
+    )
+
+    for problem, (reference_result, reference_failed) in zip(stale_problems, executed):
+        problem["reference_result"] = reference_result
+        problem["reference_failed"] = reference_failed
+        problem["reference_fingerprint"] = make_reference_fingerprint(
+            problem, reference_result
+        )
+
+
+def has_current_reference_result(example):
+    if "reference_fingerprint" not in example or "reference_result" not in example:
+        return False
+
+    # Failures can be transient (timeouts, dropped connections), the query is run again
+    if example.get("reference_failed", False):
+        return False
+
+    fingerprint = example["reference_fingerprint"]
+
+    return fingerprint["sql"] == get_sql_hash(example["reference_sql"]) and fingerprint[
+        "database_version"
+    ] == get_database_version(example)
+
+
+def make_reference_fingerprint(example, reference_result):
+    return {
+        "sql": get_sql_hash(example["reference_sql"]),
+        "database_version": get_database_version(example),
+        "result": make_result_fingerprint(reference_result),
+    }
+
+
+def make_result_fingerprint(reference_result):
+    fingerprint = ResultFingerprint.from_result(reference_result)
+
+    return fingerprint.to_dict() if fingerprint is not None else None
+
+
+def get_reference_result_fingerprint(example):
+    fingerprint = example["reference_fingerprint"]["result"]
+
+    return ResultFingerprint.from_dict(fingerprint) if fingerprint is not None else None
+
+
+def get_sql_hash(sql):
+    return hash_text(normalize_sql(sql))
+
+
+def get_database_version(example):
+    database = example["database"]
+    db_adapter = get_db_adapter_from_config(database)
+
+    return repr(db_adapter.get_database_version(database))
+
+
+def hash_text(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
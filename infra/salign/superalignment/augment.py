@@ -1,14 +1,12 @@
 from infra.salign.sql.get_db_profile import get_db_profile
 from infra.salign.sql.query_results_to_string import query_results_to_string
 
-from infra.salign.util.get_inference_api_url import get_inference_api_url
+from infra.salign.inference.inference_gateway import generate
 
+from infra.salign.util.derive_example import derive_example
 from infra.salign.util.get_config import get_config
 from infra.salign.util.prompt_template import PromptTemplate
 
-import scalarlm
-
-import copy
 import random
 
 import logging
@@ -34,24 +32,16 @@ def augment(dataset):
 
 def write_question_variations(queries, variation_count):
 
-    varied_questions = copy.deepcopy(queries)
+    varied_questions = [derive_example(query) for query in queries]
     existing_questions = [[example["question"]] for example in queries]
 
     logger.info(f"Generating {variation_count} question variations for each SQL query.")
     for i in range(variation_count):
         prompts = make_question_variation_prompts(queries, existing_questions)
 
-        llm = scalarlm.SupermassiveIntelligence(api_url=get_inference_api_url())
-
-        responses = llm.generate(prompts, max_tokens=512)
+        responses = generate(prompts, max_tokens=512)
 
-        queries_with_varied_questions = copy.deepcopy(queries)
-
-        varied_questions.extend(
-            make_question_variations_from_responses(
-                queries_with_varied_questions, responses
-            )
-        )
+        varied_questions.extend(make_question_variations_from_responses(queries, responses))
 
         logger.info(
             f"Generated {len(varied_questions)} question variations for the SQL queries."
@@ -121,7 +111,7 @@ def make_question_variations_from_responses(queries, responses):
     varied_questions = []
 
     for query, response in zip(queries, responses):
-        q = copy.deepcopy(query)
+        q = derive_example(query)
 
         question = extract_question(response)
         q["question"] = question
@@ -1,4 +1,4 @@
-import copy
+from infra.salign.util.derive_example import derive_example
 
 
 def dedup(dataset):
@@ -8,6 +8,6 @@ def dedup(dataset):
     for item in dataset:
         if not item["question"] in seen:
             seen.add(item["question"])
-            deduped_dataset.append(copy.deepcopy(item))
+            deduped_dataset.append(derive_example(item))
 
     return deduped_dataset
@@ -4,12 +4,11 @@ from infra.salign.sql.query_results_to_string import query_results_to_string
 from infra.salign.superalignment.get_insights import get_insights
 from infra.salign.superalignment.get_context import get_context
 
-from infra.salign.util.get_inference_api_url import get_inference_api_url
+from infra.salign.inference.inference_gateway import generate
+from infra.salign.util.derive_example import derive_example
 from infra.salign.util.get_config import get_config
 from infra.salign.util.prompt_template import PromptTemplate
 
-import scalarlm
-import copy
 
 
 def explain_errors(results, seed):
@@ -17,9 +16,7 @@ def explain_errors(results, seed):
 
     prompts = make_explanation_prompts(errors, seed)
 
-    llm = scalarlm.SupermassiveIntelligence(api_url=get_inference_api_url())
-
-    responses = llm.generate(prompts, max_tokens=1024)
+    responses = generate(prompts, max_tokens=1024, seed=seed)
 
     explanations = make_explanations(errors, responses, prompts)
 
@@ -90,7 +87,7 @@ def make_explanations(errors, responses, prompts):
     explanations = []
 
     for error, response, prompt in zip(errors, responses, prompts):
-        explanation = copy.deepcopy(error)
+        explanation = derive_example(error, copied_keys=("trajectory",))
         explanation["explanation"] = response
 
         explanation["trajectory"].append(prompt)
@@ -1,16 +1,16 @@
-from infra.salign.sql.execute_query import execute_query
 from infra.salign.sql.extract_sql import extract_sql
 from infra.salign.sql.extract_reasoning import extract_reasoning
 
-from infra.salign.superalignment.text2sql import add_metrics
+from infra.salign.superalignment.text2sql import add_generated_results, add_metrics
 
+from infra.salign.inference.inference_gateway import generate_chunks
+
+from infra.salign.util.derive_example import derive_example
 from infra.salign.util.get_config import get_config
 
-import copy
+import concurrent.futures
 import random
 
-import scalarlm
-
 import logging
 
 logger = logging.getLogger(__name__)
@@ -36,11 +36,9 @@ def explore_trajectories(results, llm_info, reasoners, seed=42):
 
     prompts = make_trajectory_prompts(errors, trajectories_per_error, reasoners, seed)
 
-    responses = explore_trajectories_inference(prompts, llm_info)
-
-    new_results = make_results(errors, responses, trajectories_per_error)
-
-    new_results = add_metrics(new_results)
+    new_results = explore_trajectories_pipelined(
+        errors, prompts, llm_info, trajectories_per_error, seed
+    )
 
     # Add new results as well as all keys from the original results other than results
     final_results = {
@@ -58,17 +56,48 @@ def explore_trajectories(results, llm_info, reasoners, seed=42):
 
     return final_results
 
-def explore_trajectories_inference(prompts, llm_info):
+def explore_trajectories_pipelined(errors, prompts, llm_info, trajectories_per_error, seed=42):
+    """
+    Generate trajectories in chunks and score each chunk on a worker thread while the
+    next chunk is being generated, so inference and query execution overlap.
+    """
+    config = get_config()
 
-    try:
-        llm = scalarlm.SupermassiveIntelligence(api_url=llm_info["api_url"])
-        responses = llm.generate(
-            prompts, max_tokens=1024, model_name=llm_info["model_name"]
-        )
-        return responses
-    except AssertionError as e:
-        logger.error(f"Explore trajectories failed: {e}")
-        return []
+    chunks = generate_chunks(
+        prompts,
+        max_tokens=1024,
+        chunk_size=config["exploration_chunk_size"],
+        model_name=llm_info["model_name"],
+        api_url=llm_info["api_url"],
+        seed=seed,
+    )
+
+    futures = []
+
+    # One worker, execute_queries already runs each chunk's queries concurrently
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=1, thread_name_prefix="salign-explore"
+    ) as executor:
+        # Chunks that fail to generate are skipped by generate_chunks, the rest are still scored
+        for start, responses in chunks:
+            futures.append(
+                executor.submit(
+                    score_trajectories, errors, responses, trajectories_per_error, start
+                )
+            )
+
+        new_results = []
+        for future in futures:
+            try:
+                new_results.extend(future.result())
+            except Exception as e:
+                logger.error(f"Unable to score explored trajectories: {e}")
+
+    return new_results
+
+
+def score_trajectories(errors, responses, trajectories_per_error, start=0):
+    return add_metrics(make_results(errors, responses, trajectories_per_error, start))
 
 
 def make_trajectory_prompts(errors, trajectories_per_error, reasoners, seed=42):
@@ -89,28 +118,24 @@ def make_prompt(error, reasoner, seed=42):
     return reasoner.forward(error, seed=seed)
 
 
-def make_results(errors, responses, trajectories_per_error):
+def make_results(errors, responses, trajectories_per_error, start=0):
+    """
+    Make one result per response, where responses[i] is trajectory (start + i) of the errors.
+    """
     results = []
 
-    if len(responses) == 0:
-        return results
-
-    index = 0
+    for offset, response in enumerate(responses):
+        error = errors[(start + offset) // trajectories_per_error]
 
-    for error in errors:
-        for i in range(trajectories_per_error):
-            response = responses[index]
-            result = copy.deepcopy(error)
-            add_alternate_query(result)
+        result = derive_example(error, copied_keys=("alternate_queries",))
+        add_alternate_query(result)
 
-            result["generated_sql"] = extract_sql(response)
-            result["reasoning"] = extract_reasoning(response)
-            generated_result, generated_failed = execute_query(result, result["generated_sql"])
+        result["generated_sql"] = extract_sql(response)
+        result["reasoning"] = extract_reasoning(response)
+        results.append(result)
 
-            result["generated_result"] = generated_result
-            result["generated_failed"] = generated_failed
-            results.append(result)
-            index += 1
+    if len(results) > 0:
+        add_generated_results(results)
 
     return results
 
@@ -1,15 +1,14 @@
 from infra.salign.superalignment.explain_errors import explain_errors
-from infra.salign.sql.execute_query import execute_query
+from infra.salign.sql.execute_queries import execute_queries
 
 from infra.salign.superalignment.write_queries_to_research_dataset import (
     write_queries_to_research_dataset,
 )
 
+from infra.salign.util.derive_example import derive_example
 from infra.salign.util.get_config import get_config
 from infra.salign.util.prompt_template import PromptTemplate
 
-import copy
-
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,7 +23,7 @@ def gather_learnings(eval_results, llm_info, seed):
 
     queries = write_queries_to_research_dataset(eval_explanations, llm_info, seed)
 
-    query_results = execute_queries(queries)
+    query_results = execute_evidence_queries(queries)
 
     learnings = extract_learnings_from_query_results(query_results, eval_explanations)
 
@@ -42,27 +41,36 @@ def gather_learnings(eval_results, llm_info, seed):
     return final_results
 
 
-def execute_queries(queries):
+def execute_evidence_queries(queries):
     query_results = []
 
+    examples = []
+    sqls = []
+    unexecuted_evidence = []
+
     for query in queries:
-        query_result = copy.deepcopy(query)
+        query_result = derive_example(query, copied_keys=("evidence",))
         logger.debug(f"Gathering evidence for question: {query_result['question']}")
         for evidence in query_result["evidence"]:
-            sql = evidence["sql"]
             if not "result" in evidence:
-                result, failed = execute_query(query_result, sql)
-                evidence["result"] = result
-                evidence["failed"] = failed
+                examples.append(query_result)
+                sqls.append(evidence["sql"])
+                unexecuted_evidence.append(evidence)
 
         query_results.append(query_result)
 
+    executed = execute_queries(examples, sqls)
+
+    for evidence, (result, failed) in zip(unexecuted_evidence, executed):
+        evidence["result"] = result
+        evidence["failed"] = failed
+
     return query_results
 
 
 def extract_learnings_from_query_results(query_results, eval_explanations):
     question_to_explanation_map = {
-        explanation["question"]: copy.deepcopy(explanation)
+        explanation["question"]: derive_example(explanation, copied_keys=("evidence",))
         for explanation in eval_explanations
     }
 
@@ -1,12 +1,10 @@
 from infra.salign.sql.extract_sql import extract_sql
 from infra.salign.sql.get_full_db_profile import get_full_db_profile
 
-from infra.salign.util.get_inference_api_url import get_inference_api_url
+from infra.salign.inference.inference_gateway import generate
 from infra.salign.util.get_config import get_config
 from infra.salign.util.prompt_template import PromptTemplate
 
-import scalarlm
-
 import random
 
 import os
@@ -22,9 +20,7 @@ def generate_queries_from_questions(query_logs, questions, target_query_count):
         target_query_count=target_query_count,
     )
 
-    llm = scalarlm.SupermassiveIntelligence(api_url=get_inference_api_url())
-
-    responses = llm.generate(prompts, max_tokens=512)
+    responses = generate(prompts, max_tokens=512)
 
     database = query_logs[0]["database"]
 
@@ -1,6 +1,8 @@
 from infra.salign.sql.query_results_to_string import query_results_to_string
 
 from infra.salign.util.get_config import get_config
+from infra.salign.util.prompt_budget import fit_fragments
+from infra.salign.util.tokenizer import count_tokens
 from infra.salign.util.prompt_template import PromptTemplate
 
 import random
@@ -10,7 +12,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def get_alternate_queries(example, seed):
+def get_alternate_queries(example, seed, max_tokens=None):
 
     if not "generated_sql" in example:
         return ""
@@ -30,14 +32,43 @@ def get_alternate_queries(example, seed):
         alternate_queries, min(len(alternate_queries), maximum_queries)
     )
 
+    # The most recent query and the correct result are always included, past
+    # queries only as far as the budget allows
+    recent_prompt = get_most_recent_query(example)
+
+    if max_tokens is not None and len(past_queries) > 0:
+        fragments = [
+            make_past_query_fragment(i, q) for i, q in enumerate(past_queries, start=1)
+        ]
+        available_tokens = (
+            max_tokens
+            - count_tokens(prompt)
+            - count_tokens(recent_prompt)
+            - count_tokens("Previous incorrect queries:\n")
+        )
+        selected = fit_fragments(fragments, available_tokens)
+        past_queries = [past_queries[index] for index in selected]
+
     if len(past_queries) > 0:
         prompt += "Previous incorrect queries:\n"
         for i, q in enumerate(past_queries, start=1):
-            prompt += f"Incorrect Query {i}:\n"
-            prompt += f"```sql\n{q['sql']}\n```\n"
-            prompt += f"Result: {query_results_to_string(q['result'])}\n\n"
+            prompt += make_past_query_fragment(i, q)
+
+    prompt += recent_prompt
+
+    return prompt
+
+
+def make_past_query_fragment(i, q):
+    fragment = f"Incorrect Query {i}:\n"
+    fragment += f"```sql\n{q['sql']}\n```\n"
+    fragment += f"Result: {query_results_to_string(q['result'])}\n\n"
+
+    return fragment
+
 
-    prompt += "Most recent incorrect query:\n"
+def get_most_recent_query(example):
+    prompt = "Most recent incorrect query:\n"
     prompt += f"```sql\n{example['generated_sql']}\n```\n"
     prompt += f"Result: {query_results_to_string(example['generated_result'])}\n\n"
 
@@ -1,4 +1,5 @@
 from infra.salign.util.get_config import get_config
+from infra.salign.util.tokenizer import count_tokens, truncate_to_tokens
 
 import logging
 
@@ -11,14 +12,16 @@ def get_context(example, seed):
         return ""
 
     config = get_config()
-    max_context_length = config["max_context_length"]
+    max_context_tokens = config["max_context_tokens"]
 
     context = example["context"]
 
-    if len(context) > max_context_length:
+    context_tokens = count_tokens(context)
+
+    if context_tokens > max_context_tokens:
         logger.warning(
-            f"Context length {len(context)} exceeds max length {max_context_length}. Truncating context."
+            f"Context length {context_tokens} tokens exceeds max length {max_context_tokens}. Truncating context."
         )
-        context = context[:max_context_length]
+        context = truncate_to_tokens(context, max_context_tokens)
 
     return context + "\n\n"
@@ -1,6 +1,8 @@
 from infra.salign.sql.query_results_to_string import query_results_to_string
 
 from infra.salign.util.get_config import get_config
+from infra.salign.util.prompt_budget import fit_fragments
+from infra.salign.util.tokenizer import count_tokens
 
 import random
 
@@ -9,7 +11,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def get_evidence(example, seed):
+def get_evidence(example, seed, max_tokens=None):
 
     if not "evidence" in example:
         return ""
@@ -39,9 +41,27 @@ def get_evidence(example, seed):
 
     queries = evidence_queries + evidence[-gap:]
 
+    if max_tokens is not None:
+        # Keep the most recent queries first when the section is over budget
+        fragments = [make_evidence_fragment(i, q) for i, q in enumerate(queries, start=1)]
+        selected = fit_fragments(
+            fragments,
+            max_tokens - count_tokens(prompt),
+            priority=reversed(range(len(fragments))),
+        )
+        if len(selected) == 0:
+            return ""
+        queries = [queries[index] for index in selected]
+
     for i, q in enumerate(queries, start=1):
-        prompt += f"Query {i}:\n"
-        prompt += f"```sql\n{q['sql']}\n```\n"
-        prompt += f"Result: {query_results_to_string(q['result'])}\n\n"
+        prompt += make_evidence_fragment(i, q)
 
     return prompt
+
+
+def make_evidence_fragment(i, q):
+    fragment = f"Query {i}:\n"
+    fragment += f"```sql\n{q['sql']}\n```\n"
+    fragment += f"Result: {query_results_to_string(q['result'])}\n\n"
+
+    return fragment
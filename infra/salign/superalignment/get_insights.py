@@ -1,4 +1,6 @@
 from infra.salign.util.get_config import get_config
+from infra.salign.util.prompt_budget import fit_fragments
+from infra.salign.util.tokenizer import count_tokens
 
 import random
 
@@ -7,7 +9,7 @@ import logging
 logger = logging.getLogger(__name__)
 
 
-def get_insights(example, seed):
+def get_insights(example, seed, max_tokens=None):
 
     if not "insights" in example:
         return ""
@@ -27,8 +29,19 @@ def get_insights(example, seed):
 
     insights = example["insights"][-gap:] + sampled_insights
 
+    if max_tokens is not None:
+        # Newest insights come first, so they are kept first
+        fragments = [make_insight_fragment(i, insight) for i, insight in enumerate(insights, start=1)]
+        selected = fit_fragments(fragments, max_tokens - count_tokens(prompt))
+        if len(selected) == 0:
+            return ""
+        insights = [insights[index] for index in selected]
+
     for i, insight in enumerate(insights, start=1):
-        prompt += f"Insight {i}:\n"
-        prompt += f"```insight\n{insight}\n```\n"
+        prompt += make_insight_fragment(i, insight)
 
     return prompt
+
+
+def make_insight_fragment(i, insight):
+    return f"Insight {i}:\n```insight\n{insight}\n```\n"
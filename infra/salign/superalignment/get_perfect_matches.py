@@ -1,6 +1,6 @@
 from infra.salign.superalignment.add_reasoning_trajectories import add_reasoning_trajectories
 
-import copy
+from infra.salign.util.derive_example import derive_example
 
 import logging
 
@@ -12,13 +12,13 @@ def get_perfect_matches(explored_trajectories, inference_results):
 
     for result in explored_trajectories["results"]:
         if result["score"] >= 1.0:
-            perfect_match = copy.deepcopy(result)
+            perfect_match = derive_example(result)
             perfect_match["reference_sql"] = result["generated_sql"]
             perfect_matches.append(perfect_match)
 
     for result in inference_results["results"]:
         if result["score"] >= 1.0:
-            perfect_match = copy.deepcopy(result)
+            perfect_match = derive_example(result)
             perfect_match["reference_sql"] = result["generated_sql"]
             perfect_matches.append(perfect_match)
 
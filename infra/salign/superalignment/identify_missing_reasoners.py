@@ -5,12 +5,10 @@ from infra.salign.superalignment.merge_similar_reasoners import merge_similar_re
 
 from infra.salign.reasoning_prompts.learned_reasoning_prompt import LearnedReasoningPrompt
 
-from infra.salign.util.get_inference_api_url import get_inference_api_url
+from infra.salign.inference.inference_gateway import generate
 from infra.salign.util.get_config import get_config
 from infra.salign.util.prompt_template import PromptTemplate
 
-import scalarlm
-
 import random
 import copy
 
@@ -41,9 +39,7 @@ def get_identify_reasoner_responses(missing_skills):
 
     prompts = make_identify_reasoner_prompts(skills_with_missing_reasoners)
 
-    llm = scalarlm.SupermassiveIntelligence(api_url=get_inference_api_url())
-
-    responses = llm.generate(prompts, max_tokens=1024)
+    responses = generate(prompts, max_tokens=1024)
 
     return skills_with_missing_reasoners, prompts, responses
 
@@ -1,14 +1,12 @@
 from infra.salign.sql.get_db_profile import get_db_profile
 from infra.salign.sql.query_results_to_string import query_results_to_string
 
-from infra.salign.util.get_inference_api_url import get_inference_api_url
+from infra.salign.inference.inference_gateway import generate
+from infra.salign.util.derive_example import derive_example
 from infra.salign.util.get_config import get_config
 from infra.salign.util.prompt_template import PromptTemplate
 
-import scalarlm
-
 import random
-import copy
 import json
 
 import logging
@@ -30,9 +28,7 @@ def identify_missing_skills_from_explanations(explanations, reasoners):
     return missing_skills
 
 def identify_missing_skills_from_explanations_op(prompts):
-    llm = scalarlm.SupermassiveIntelligence(api_url=get_inference_api_url())
-
-    responses = llm.generate(prompts, max_tokens=1024)
+    responses = generate(prompts, max_tokens=1024)
 
     return responses
 
@@ -125,7 +121,7 @@ def make_missing_skills(
     for explanation, response, prompt, selected_reasoners in zip(
         explanations, responses, prompts, all_selected_reasoners
     ):
-        missing_skill = copy.deepcopy(explanation)
+        missing_skill = derive_example(explanation, copied_keys=("trajectory",))
 
         skills = parse_missing_skills(response, reasoners, selected_reasoners)
 
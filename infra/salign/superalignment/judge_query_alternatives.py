@@ -1,14 +1,12 @@
 from infra.salign.sql.get_full_db_profile import get_full_db_profile
 from infra.salign.sql.query_results_to_string import query_results_to_string
 
-from infra.salign.util.get_inference_api_url import get_inference_api_url
+from infra.salign.inference.inference_gateway import generate
 
+from infra.salign.util.derive_example import derive_example
 from infra.salign.util.get_config import get_config
 from infra.salign.util.prompt_template import PromptTemplate
 
-import scalarlm
-
-import copy
 import json
 
 import logging
@@ -21,9 +19,7 @@ def judge_query_alternatives(queries):
 
     prompts = make_judge_prompts(queries)
 
-    llm = scalarlm.SupermassiveIntelligence(api_url=get_inference_api_url())
-
-    responses = llm.generate(prompts, max_tokens=1024)
+    responses = generate(prompts, max_tokens=1024)
 
     judged_queries = make_judged_queries(queries, responses)
 
@@ -90,13 +86,13 @@ def make_judged_queries(queries, responses):
     judged_queries = []
 
     for query, response in zip(queries, responses):
-        judged_query = copy.deepcopy(query)
+        judged_query = derive_example(query, copied_keys=("alternate_queries",))
 
         scores = extract_scores_from_response(response)
 
         judged_query["score"] = scores[0] if scores else 0
 
-        for alternative_query, score in zip(query["alternate_queries"], scores[1:]):
+        for alternative_query, score in zip(judged_query["alternate_queries"], scores[1:]):
             alternative_query["score"] = score
 
         judged_queries.append(judged_query)
@@ -1,14 +1,12 @@
 from infra.salign.sql.get_full_db_profile import get_full_db_profile
 
-from infra.salign.util.get_inference_api_url import get_inference_api_url
+from infra.salign.inference.inference_gateway import generate
 
 from infra.salign.util.get_config import get_config
 from infra.salign.util.prompt_template import PromptTemplate
 
 import random
 
-import scalarlm
-
 
 def make_questions_from_alignment_prompt(
     alignment_prompt,
@@ -17,9 +15,7 @@ def make_questions_from_alignment_prompt(
 ):
     prompts = make_prompts(alignment_prompt, query_logs, target_question_count)
 
-    llm = scalarlm.SupermassiveIntelligence(api_url=get_inference_api_url())
-
-    responses = llm.generate(prompts, max_tokens=1024)
+    responses = generate(prompts, max_tokens=1024)
 
     return make_questions(responses, prompts)
 
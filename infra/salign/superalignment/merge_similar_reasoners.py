@@ -1,14 +1,12 @@
 from infra.salign.reasoning_prompts.learned_reasoning_prompt import LearnedReasoningPrompt
 
-from infra.salign.util.get_inference_api_url import get_inference_api_url
+from infra.salign.inference.inference_gateway import generate
 
+from infra.salign.util.derive_example import derive_example
 from infra.salign.util.get_config import get_config
 from infra.salign.util.prompt_template import PromptTemplate
 
-import scalarlm
-
 import json
-import copy
 
 import logging
 
@@ -82,9 +80,7 @@ def truncate(text, max_length):
 
 
 def make_merge_reasoners_op(prompt):
-    llm = scalarlm.SupermassiveIntelligence(api_url=get_inference_api_url())
-
-    response = llm.generate([prompt], max_tokens=1024)
+    response = generate([prompt], max_tokens=1024)
 
     return response[0]
 
@@ -153,7 +149,7 @@ def update_skills(merged_reasoners, skills, reasoner_to_merged_mapping):
                 f"Merging reasoner {reasoner['name']} into merged index "
                 f"{merged_index} {merged_reasoners[merged_index].get_name()}"
             )
-            merged_reasoner = copy.deepcopy(reasoner)
+            merged_reasoner = derive_example(reasoner)
             merged_reasoner["name"] = merged_reasoners[merged_index].get_name()
             missing_skills.append(merged_reasoner)
 
@@ -1,15 +1,13 @@
 from infra.salign.sql.get_full_db_profile import get_full_db_profile
 
-from infra.salign.sql.execute_query import execute_query
+from infra.salign.sql.execute_queries import execute_queries
 from infra.salign.sql.extract_sql import extract_sql
 from infra.salign.sql.query_results_to_string import query_results_to_string
 
-from infra.salign.util.get_inference_api_url import get_inference_api_url
+from infra.salign.inference.inference_gateway import generate
+from infra.salign.util.derive_example import derive_example
 from infra.salign.util.prompt_template import PromptTemplate
 
-import scalarlm
-
-import copy
 import sqlite3
 import random
 
@@ -20,9 +18,7 @@ logger = logging.getLogger(__name__)
 def refine_queries(queries):
     prompts, results, failed = make_refine_prompts(queries)
 
-    llm = scalarlm.SupermassiveIntelligence(api_url=get_inference_api_url())
-
-    responses = llm.generate(prompts, max_tokens=512)
+    responses = generate(prompts, max_tokens=512)
 
     refined_queries = make_refined_queries(queries, responses, results, failed)
 
@@ -36,8 +32,10 @@ def make_refine_prompts(queries):
 
     random.seed(42)
 
-    for index, query in enumerate(queries):
-        prompt, result, fail = make_refine_prompt(query, seed=index)
+    executed = execute_queries(queries, [query["reference_sql"] for query in queries])
+
+    for index, (query, (result, fail)) in enumerate(zip(queries, executed)):
+        prompt = make_refine_prompt(query, result, seed=index)
         prompts.append(prompt)
         results.append(result)
         failed.append(fail)
@@ -45,7 +43,7 @@ def make_refine_prompts(queries):
     return prompts, results, failed
 
 
-def make_refine_prompt(query, seed):
+def make_refine_prompt(query, result, seed):
     prompt = PromptTemplate().user()
     prompt += "You are a SQL expert.\n"
 
@@ -58,8 +56,6 @@ def make_refine_prompt(query, seed):
     prompt += "```\n"
 
     prompt += "It produces the following result:\n"
-
-    result, failed = execute_query(query, query["reference_sql"])
     prompt += query_results_to_string(result) + "\n"
 
     prompt += (
@@ -95,7 +91,7 @@ def make_refine_prompt(query, seed):
     prompt += " Write the query a ```sql``` code block.\n"
     prompt += PromptTemplate().assistant()
 
-    return prompt, result, failed
+    return prompt
 
 
 def make_refined_queries(queries, responses, results, failed):
@@ -103,8 +99,13 @@ def make_refined_queries(queries, responses, results, failed):
 
     existing_queries = set()
 
-    for query, response, result, failed in zip(queries, responses, results, failed):
-        new_query = copy.deepcopy(query)
+    refined_sqls = [extract_sql(response) for response in responses]
+    refined_executed = execute_queries(queries, refined_sqls)
+
+    for query, response, result, failed, refined_sql, (new_result, new_failed) in zip(
+        queries, responses, results, failed, refined_sqls, refined_executed
+    ):
+        new_query = derive_example(query, copied_keys=("alternate_queries",))
 
         add_alternate_query(
             new_query,
@@ -115,9 +116,7 @@ def make_refined_queries(queries, responses, results, failed):
             query.get("score", 0),
         )
 
-        new_query["reference_sql"] = extract_sql(response)
-
-        new_result, new_failed = execute_query(query, new_query["reference_sql"])
+        new_query["reference_sql"] = refined_sql
         new_query["reference_result"] = new_result
         new_query["failed"] = new_failed
         new_query["refinement"] = response
@@ -1,17 +1,16 @@
 from infra.salign.superalignment.refine_queries import refine_queries
 from infra.salign.superalignment.judge_query_alternatives import judge_query_alternatives
 
+from infra.salign.util.derive_example import derive_example
 from infra.salign.util.get_config import get_config
 
-import copy
-
 import logging
 
 logger = logging.getLogger(__name__)
 
 
 def refine_queries_with_results(queries):
-    queries_to_refine = copy.deepcopy(queries)
+    queries_to_refine = list(queries)
     refined_queries = []
 
     config = get_config()
@@ -52,7 +51,7 @@ def select_best_queries(queries):
     best_queries = []
 
     for query in judged_queries:
-        best_query = copy.deepcopy(query)
+        best_query = derive_example(query, copied_keys=("alternate_queries",))
 
         score = best_query["score"]
 
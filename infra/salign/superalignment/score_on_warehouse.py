@@ -0,0 +1,51 @@
+from infra.salign.superalignment.add_reference_results import add_reference_results
+from infra.salign.superalignment.text2sql import add_generated_results, add_metrics
+
+from infra.salign.util.derive_example import derive_example
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def score_on_warehouse(problems):
+    """
+    Score the queries generated on a local mirror against the warehouse it mirrors,
+    e.g. because the mirror only holds samples of the tables.
+
+    Sets warehouse_score on each mirrored problem and returns the accuracy on the
+    warehouse of the problems scored, or None if there were none.
+    """
+    mirrored_problems = [
+        problem
+        for problem in problems
+        if "warehouse_database" in problem and "generated_sql" in problem
+    ]
+
+    if len(mirrored_problems) == 0:
+        return None
+
+    logger.info(f"Scoring {len(mirrored_problems)} problems on the warehouse.")
+
+    results = []
+    for problem in mirrored_problems:
+        result = derive_example(problem)
+        result["database"] = problem["warehouse_database"]
+        results.append(result)
+
+    # The reference results were computed on the mirror, they are executed again
+    add_reference_results(results)
+    add_generated_results(results)
+
+    for problem, result in zip(mirrored_problems, add_metrics(results)):
+        problem["warehouse_score"] = result["score"]
+
+    accuracy = sum(
+        1 for problem in mirrored_problems if problem["warehouse_score"] >= 1.0
+    ) / len(mirrored_problems)
+
+    logger.info(
+        f"Warehouse eval score: {accuracy * 100:.2f}% of {len(mirrored_problems)} problems"
+    )
+
+    return accuracy
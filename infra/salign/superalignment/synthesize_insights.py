@@ -5,12 +5,12 @@ from infra.salign.superalignment.get_evidence import get_evidence
 from infra.salign.superalignment.get_insights import get_insights
 from infra.salign.superalignment.get_context import get_context
 
+from infra.salign.inference.inference_gateway import generate
+
+from infra.salign.util.derive_example import derive_example
 from infra.salign.util.get_config import get_config
 from infra.salign.util.prompt_template import PromptTemplate
 
-import scalarlm
-
-import copy
 import re
 
 import logging
@@ -25,10 +25,12 @@ def synthesize_insights(eval_results, llm_info, seed):
 
     prompts = make_synthesize_insights_prompts(errors, seed)
 
-    llm = scalarlm.SupermassiveIntelligence(api_url=llm_info["api_url"])
-
-    responses = llm.generate(
-        prompts, max_tokens=1024, model_name=llm_info["model_name"]
+    responses = generate(
+        prompts,
+        max_tokens=1024,
+        model_name=llm_info["model_name"],
+        api_url=llm_info["api_url"],
+        seed=seed,
     )
 
     insights = make_insights(errors, responses, prompts)
@@ -111,7 +113,7 @@ def make_insights(errors, responses, prompts):
     insights = []
 
     for error, response, prompt in zip(errors, responses, prompts):
-        insight = copy.deepcopy(error)
+        insight = derive_example(error, copied_keys=("insights",))
         extracted_insights = extract_insights_from_response(response)
 
         for extracted_insight in extracted_insights:
@@ -1,16 +1,21 @@
 from infra.salign.sql.execute_query import execute_query
+from infra.salign.sql.execute_queries import execute_queries
+from infra.salign.sql.compare_columns import columns_match
+from infra.salign.sql.query_result import as_rows, is_failed_result
+from infra.salign.sql.result_fingerprint import ResultFingerprint
 from infra.salign.sql.extract_sql import extract_sql
 from infra.salign.sql.extract_reasoning import extract_reasoning
 from infra.salign.sql.get_db_profile import get_db_profile
 
-from infra.salign.util.prompt_template import PromptTemplate
-
-import scalarlm
+from infra.salign.superalignment.add_reference_results import (
+    get_reference_result_fingerprint,
+    has_current_reference_result,
+)
 
-import pandas as pd
+from infra.salign.inference.inference_gateway import generate
 
-import copy
-import math
+from infra.salign.util.derive_example import derive_example
+from infra.salign.util.prompt_template import PromptTemplate
 
 import logging
 
@@ -21,12 +26,12 @@ def text2sql(examples, model_name=None, api_url=None, seed=42):
 
     prompts = make_text2sql_prompts(examples, seed=seed)
 
-    llm = scalarlm.SupermassiveIntelligence(api_url=api_url)
-
-    responses = llm.generate(
+    responses = generate(
         prompts,
         max_tokens=512,
         model_name=model_name,
+        api_url=api_url,
+        seed=seed,
     )
 
     results = make_results(examples, responses)
@@ -69,28 +74,33 @@ def make_results(examples, responses):
         result = make_result(example, response)
         results.append(result)
 
+    add_generated_results(results)
+
     return results
 
 
 def make_result(example, response):
 
-    result = copy.deepcopy(example)
+    result = derive_example(example)
 
     result["generated_sql"] = extract_sql(response)
     result["reasoning"] = extract_reasoning(response)
 
-    generated_result, generated_failed = execute_query(result, result["generated_sql"])
+    return result
 
-    result["generated_result"] = generated_result
-    result["generated_failed"] = generated_failed
 
-    return result
+def add_generated_results(results):
+    executed = execute_queries(results, [result["generated_sql"] for result in results])
+
+    for result, (generated_result, generated_failed) in zip(results, executed):
+        result["generated_result"] = generated_result
+        result["generated_failed"] = generated_failed
 
 
 def add_metrics(results):
     results_with_metrics = []
     for result in results:
-        result_with_metric = copy.deepcopy(result)
+        result_with_metric = derive_example(result)
         add_metrics_to_result(result_with_metric)
         results_with_metrics.append(result_with_metric)
 
@@ -114,13 +124,27 @@ def query_result_match(example):
 
 
 def compute_score(results, example, generated_result):
-    # Case 1: reference SQL exists, execute it
+    generated_fingerprint = ResultFingerprint.from_result(generated_result)
+
+    # Case 1: reference SQL exists, use the precomputed result if it is current, otherwise execute it
     if "reference_sql" in example:
-        reference_result, reference_failed = execute_query(example, example["reference_sql"])
+        reference_fingerprint = None
+        if has_current_reference_result(example):
+            reference_result = example["reference_result"]
+            reference_failed = example["reference_failed"]
+            reference_fingerprint = get_reference_result_fingerprint(example)
+        else:
+            reference_result, reference_failed = execute_query(example, example["reference_sql"])
         results["reference_result"] = reference_result
         results["reference_failed"] = reference_failed
 
-        match = not reference_failed and compare_results(reference_result, generated_result, example)
+        match = not reference_failed and compare_results(
+            reference_result,
+            generated_result,
+            example,
+            reference_fingerprint=reference_fingerprint,
+            generated_fingerprint=generated_fingerprint,
+        )
         results["score"] = 1.0 if match else 0.0
         return
 
@@ -128,7 +152,9 @@ def compute_score(results, example, generated_result):
     possible_refs = example.get("reference_results", [example["reference_result"]])
 
     for ref in possible_refs:
-        if compare_results(ref, generated_result, example):
+        if compare_results(
+            ref, generated_result, example, generated_fingerprint=generated_fingerprint
+        ):
             results.update({"score": 1.0, "reference_result": ref})
             return
 
@@ -136,14 +162,16 @@ def compute_score(results, example, generated_result):
     results["reference_result"] = example["reference_result"]
 
 
-def compare_results(reference_result, generated_result, example):
-    if isinstance(reference_result, str) or isinstance(generated_result, str):
-        # If either result is a string, it means the query failed
+def compare_results(
+    reference_result,
+    generated_result,
+    example,
+    reference_fingerprint=None,
+    generated_fingerprint=None,
+):
+    if is_failed_result(reference_result) or is_failed_result(generated_result):
         return False
 
-    reference_dataframe = pd.DataFrame(reference_result)
-    generated_dataframe = pd.DataFrame(generated_result)
-
     condition_cols = []
     ignore_order = True
 
@@ -151,6 +179,27 @@ def compare_results(reference_result, generated_result, example):
         condition_cols = example["eval_criteria"]["condition_cols"]
         ignore_order = example["eval_criteria"]["ignore_order"]
 
+    # Most comparisons are decided by the fingerprints without building DataFrames
+    if reference_fingerprint is None:
+        reference_fingerprint = ResultFingerprint.from_result(reference_result)
+    if generated_fingerprint is None:
+        generated_fingerprint = ResultFingerprint.from_result(generated_result)
+
+    if reference_fingerprint is not None and generated_fingerprint is not None:
+        match = reference_fingerprint.matches(
+            generated_fingerprint,
+            condition_cols=condition_cols,
+            ignore_order=ignore_order,
+        )
+        if match is not None:
+            return match
+
+    # Only comparisons the fingerprints can't decide need pandas
+    import pandas as pd
+
+    reference_dataframe = pd.DataFrame(as_rows(reference_result))
+    generated_dataframe = pd.DataFrame(as_rows(generated_result))
+
     return compare_pandas_table(
         generated_dataframe,
         reference_dataframe,
@@ -170,35 +219,6 @@ def compare_pandas_table(pred, gold, condition_cols=[], ignore_order=False):
 
     """
 
-    tolerance = 1e-2
-
-    def vectors_match(v1, v2, tol=tolerance, ignore_order_=False):
-        try:
-            if ignore_order_:
-                v1, v2 = (
-                    sorted(
-                        v1,
-                        key=lambda x: (x is None, str(x), isinstance(x, (int, float))),
-                    ),
-                    sorted(
-                        v2,
-                        key=lambda x: (x is None, str(x), isinstance(x, (int, float))),
-                    ),
-                )
-            if len(v1) != len(v2):
-                return False
-            for a, b in zip(v1, v2):
-                if pd.isna(a) and pd.isna(b):
-                    continue
-                elif isinstance(a, (int, float)) and isinstance(b, (int, float)):
-                    if not math.isclose(float(a), float(b), abs_tol=tol):
-                        return False
-                elif a != b:
-                    return False
-            return True
-        except Exception as e:
-            return False
-
     score = 0
     try: 
         if condition_cols != []:
@@ -209,17 +229,8 @@ def compare_pandas_table(pred, gold, condition_cols=[], ignore_order=False):
 
         t_gold_list = gold_cols.transpose().values.tolist()
         t_pred_list = pred_cols.transpose().values.tolist()
-        score = 1
-        for _, gold in enumerate(t_gold_list):
-            if not any(
-                vectors_match(gold, pred, ignore_order_=ignore_order)
-                for pred in t_pred_list
-            ):
-                score = 0
-            else:
-                for j, pred in enumerate(t_pred_list):
-                    if vectors_match(gold, pred, ignore_order_=ignore_order):
-                        break
+
+        score = columns_match(t_gold_list, t_pred_list, ignore_order=ignore_order)
     except Exception as e:
         pass
 
@@ -1,12 +1,13 @@
 from infra.salign.superalignment.text2sql import make_prompt as make_text2sql_prompt
 
-from infra.salign.util.get_train_api_url import get_train_api_url
+from infra.salign.inference.inference_gateway import get_llm_client
 
-import scalarlm
+from infra.salign.util.derive_example import derive_example
+from infra.salign.util.get_train_api_url import get_train_api_url
+from infra.salign.util.json_serializer import to_json_data
 
 import os
 import time
-import copy
 import random
 
 import logging
@@ -17,9 +18,9 @@ logger = logging.getLogger(__name__)
 def train_llm(original_dataset):
     api_url = get_train_api_url()
 
-    llm = scalarlm.SupermassiveIntelligence(api_url=api_url)
+    llm = get_llm_client(api_url)
 
-    dataset = copy.deepcopy(original_dataset)
+    dataset = [derive_example(example) for example in original_dataset]
 
     add_input_and_ouptput_fields(dataset)
 
@@ -31,7 +32,8 @@ def train_llm(original_dataset):
     max_steps = int(dataset_size * 1.5)
 
     status = llm.train(
-        dataset,
+        # Query results are sent as the rows they stand for
+        to_json_data(dataset),
         train_args={
             "max_steps": max_steps,
             "learning_rate": 3e-4,
@@ -2,9 +2,7 @@ from infra.salign.sql.get_db_profile import get_db_profile
 
 from infra.salign.superalignment.write_questions import write_questions
 
-from infra.salign.util.get_inference_api_url import get_inference_api_url
-
-import scalarlm
+from infra.salign.inference.inference_gateway import generate
 
 import logging
 
@@ -35,9 +33,7 @@ def update_reasoner_training_data(reasoners, missing_skills):
 
 def update_reasoner_training_data_operation(prompts):
 
-    llm = scalarlm.SupermassiveIntelligence(api_url=get_inference_api_url())
-
-    responses = llm.generate(prompts, max_tokens=1024)
+    responses = generate(prompts, max_tokens=1024)
 
     return responses
 
@@ -112,9 +108,7 @@ def get_trajectory_prompts(reasoner_skill_pairs, training_examples_with_question
 
 def update_reasoner_trajectory_data_operation(prompts):
 
-    llm = scalarlm.SupermassiveIntelligence(api_url=get_inference_api_url())
-
-    responses = llm.generate(prompts, max_tokens=1024)
+    responses = generate(prompts, max_tokens=1024)
 
     return responses
 
@@ -0,0 +1,55 @@
+from infra.salign.sql.build_local_mirror import LOCAL_DATABASE_TYPES, build_local_mirror
+
+from infra.salign.util.get_db_adapter_from_config import get_db_adapter_from_config
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def use_local_mirror(problems):
+    """
+    Point problems at a local mirror of their warehouse database, so exploring queries
+    never waits on the warehouse. The warehouse is kept as the problem's warehouse_database.
+
+    Each warehouse gets one mirror with the tables its problems' reference SQL reads.
+    Problems that already use a mirror, e.g. restored from a checkpoint, are left alone.
+    """
+    warehouse_problems = {}
+
+    for problem in problems:
+        database = problem["database"]
+
+        if "warehouse_database" in problem or not can_mirror(database):
+            continue
+
+        db_adapter = get_db_adapter_from_config(database)
+        warehouse_problems.setdefault(
+            db_adapter.get_database_identity(database), []
+        ).append(problem)
+
+    for mirrored_problems in warehouse_problems.values():
+        database = mirrored_problems[0]["database"]
+
+        reference_queries = [
+            problem["reference_sql"]
+            for problem in mirrored_problems
+            if "reference_sql" in problem
+        ]
+
+        mirror_database = build_local_mirror(database, reference_queries)
+
+        logger.info(
+            f"Exploring {len(mirrored_problems)} problems on {mirror_database['path']} instead of {database['db_id']}"
+        )
+
+        for problem in mirrored_problems:
+            problem["warehouse_database"] = problem["database"]
+            problem["database"] = mirror_database
+
+
+def can_mirror(database):
+    return (
+        database.get("type", "sqlite").lower() not in LOCAL_DATABASE_TYPES
+        and "db_id" in database
+    )
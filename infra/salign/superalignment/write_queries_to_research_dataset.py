@@ -4,22 +4,24 @@ from infra.salign.sql.query_results_to_string import query_results_to_string
 from infra.salign.superalignment.get_insights import get_insights
 from infra.salign.superalignment.get_evidence import get_evidence
 
+from infra.salign.inference.inference_gateway import generate
+
+from infra.salign.util.derive_example import derive_example
 from infra.salign.util.get_config import get_config
 from infra.salign.util.prompt_template import PromptTemplate
 
-import scalarlm
-
 import re
-import copy
 
 def write_queries_to_research_dataset(results, llm_info, seed):
 
     prompts = make_research_prompts(results, seed)
 
-    llm = scalarlm.SupermassiveIntelligence(api_url=llm_info["api_url"])
-
-    responses = llm.generate(
-        prompts, max_tokens=1024, model_name=llm_info["model_name"]
+    responses = generate(
+        prompts,
+        max_tokens=1024,
+        model_name=llm_info["model_name"],
+        api_url=llm_info["api_url"],
+        seed=seed,
     )
 
     queries = make_queries(results, responses, prompts)
@@ -88,7 +90,7 @@ def make_queries(results, responses, prompts):
     for error, response, prompt in zip(results, responses, prompts):
         exracted_queries = extract_queries_from_response(response)
         for extracted_query in exracted_queries:
-            query = copy.deepcopy(error)
+            query = derive_example(error, copied_keys=("evidence",))
             add_evidence(query, extracted_query)
             queries.append(query)
 
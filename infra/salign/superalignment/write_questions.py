@@ -1,14 +1,12 @@
 from infra.salign.sql.get_full_db_profile import get_full_db_profile
 
-from infra.salign.sql.execute_query import execute_query
+from infra.salign.sql.execute_queries import execute_queries
 from infra.salign.sql.query_results_to_string import query_results_to_string
 
-from infra.salign.util.get_inference_api_url import get_inference_api_url
+from infra.salign.inference.inference_gateway import generate
+from infra.salign.util.derive_example import derive_example
 from infra.salign.util.prompt_template import PromptTemplate
 
-import scalarlm
-
-import copy
 import re
 
 import logging
@@ -19,9 +17,7 @@ logger = logging.getLogger(__name__)
 def write_questions(queries):
     prompts, results, failed = make_question_prompts(queries)
 
-    llm = scalarlm.SupermassiveIntelligence(api_url=get_inference_api_url())
-
-    responses = llm.generate(prompts, max_tokens=1024)
+    responses = generate(prompts, max_tokens=1024)
 
     new_questions = make_new_questions(queries, responses, results, failed)
 
@@ -33,8 +29,10 @@ def make_question_prompts(queries):
     results = []
     failed = []
 
-    for index, query in enumerate(queries):
-        prompt, result, fail = make_question_prompt(query, seed=index)
+    executed = execute_queries(queries, [query["reference_sql"] for query in queries])
+
+    for index, (query, (result, fail)) in enumerate(zip(queries, executed)):
+        prompt = make_question_prompt(query, result, seed=index)
         prompts.append(prompt)
         results.append(result)
         failed.append(fail)
@@ -42,7 +40,7 @@ def make_question_prompts(queries):
     return prompts, results, failed
 
 
-def make_question_prompt(query, seed):
+def make_question_prompt(query, result, seed):
     prompt = PromptTemplate().user()
     prompt += "Consider a database with the following schema:\n"
 
@@ -55,8 +53,6 @@ def make_question_prompt(query, seed):
     prompt += "```\n"
 
     prompt += "It produces the following result:\n"
-
-    result, failed = execute_query(query, query["reference_sql"])
     prompt += query_results_to_string(result) + "\n"
 
     prompt += "Your task is to write a question that could be answered by the SQL query and result above.\n"
@@ -72,7 +68,7 @@ def make_question_prompt(query, seed):
     prompt += " If the query returns multiple columns, write a question that asks for all of them.\n"
     prompt += PromptTemplate().assistant()
 
-    return prompt, result, failed
+    return prompt
 
 
 def make_new_questions(queries, responses, results, failed):
@@ -81,7 +77,7 @@ def make_new_questions(queries, responses, results, failed):
     existing_questions = set()
 
     for query, response, result, failed in zip(queries, responses, results, failed):
-        new_query = copy.deepcopy(query)
+        new_query = derive_example(query)
         new_query["question"] = extract_question(response)
         new_query["result"] = result
         new_query["failed"] = failed
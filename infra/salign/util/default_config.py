@@ -1,5 +1,7 @@
 from pydantic import BaseModel
 
+from typing import Dict
+
 
 class Config(BaseModel):
     inference_api_url: str = "https://qwen30b.cray-lm.com"
@@ -23,11 +25,68 @@ class Config(BaseModel):
     query_execution_timeout: int = 60
     max_rows_per_query: int = 100
 
-    db_profile_max_length: int = 2048
-    create_table_max_length: int = 1536
-
-    max_query_result_length: int = 512
-    max_context_length: int = 512
+    connection_pool_size: int = 4
+    connection_pool_idle_timeout: int = 300
+
+    query_cache_enabled: bool = True
+    query_cache_max_entries: int = 4096
+    query_cache_path: str = ""
+    query_cache_max_bytes: int = 1024 * 1024 * 1024
+    database_version_ttl: int = 60
+
+    schema_cache_path: str = "infra/salign/data/cache/schema.sqlite"
+    schema_cache_max_bytes: int = 256 * 1024 * 1024
+    schema_cache_ttl: int = 24 * 60 * 60
+
+    local_mirror_enabled: bool = False
+    local_mirror_path: str = "infra/salign/data/mirrors"
+    local_mirror_sample_rows: int = 0
+    local_mirror_score_on_warehouse: bool = True
+
+    query_executor: str = "auto"
+    max_query_workers: int = 8
+    max_concurrent_queries_per_database: int = 4
+    batch_query_timeout: int = 90
+
+    inference_sub_batch_size: int = 16
+    max_concurrent_inference_requests: int = 4
+    inference_max_retries: int = 3
+    inference_retry_delay: float = 2.0
+
+    completion_cache_enabled: bool = True
+    completion_cache_path: str = "infra/salign/data/cache/completions.sqlite"
+    completion_cache_max_bytes: int = 1024 * 1024 * 1024
+
+    tokenizer_name: str = ""
+    tokenizer_path: str = ""
+    tokenizer_cache_path: str = "infra/salign/data/tokenizers"
+
+    prompt_token_budget: int = 6144
+    prompt_budget_shares: Dict[str, float] = {
+        "schema": 0.4,
+        "alternate_queries": 0.3,
+        "evidence": 0.2,
+        "insights": 0.1,
+    }
+
+    full_db_profile_max_tokens: int = 1024
+    full_db_profile_samples_per_column: int = 3
+    full_db_profile_sample_rows: int = 1000
+    full_db_profile_sample_values: int = 10
+    full_db_profile_max_profiled_tables: int = 200
+
+    profile_cache_path: str = "infra/salign/data/cache/profiles.sqlite"
+    profile_cache_max_bytes: int = 256 * 1024 * 1024
+    profile_cache_ttl: int = 24 * 60 * 60
+
+    schema_linking_enabled: bool = True
+    schema_linking_top_columns: int = 64
+
+    db_profile_max_tokens: int = 512
+    create_table_max_tokens: int = 384
+
+    max_query_result_tokens: int = 128
+    max_context_tokens: int = 128
 
     max_query_refinement_iterations: int = 1
 
@@ -46,8 +105,10 @@ class Config(BaseModel):
     question_variation_count: int = 1
 
     results_path: str = "infra/salign/data/results"
+    checkpoint_path: str = "infra/salign/data/checkpoints"
 
     trajectories_per_error: int = 3
+    exploration_chunk_size: int = 64
     maximum_trajectory_history: int = 8
 
     max_reasoner_training_examples: int = 3
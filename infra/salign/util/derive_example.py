@@ -0,0 +1,27 @@
+def derive_example(example, copied_keys=()):
+    """
+    A new example that shares its values with `example` instead of deep copying them.
+
+    Stages only set top level keys on the examples they derive, so database profiles,
+    query results and trajectories are shared between an example and everything
+    derived from it. A stage that changes a list or dict value in place (appending to
+    a trajectory, scoring alternate queries) names its key in copied_keys, that value
+    is copied along with the dicts it holds.
+    """
+    derived = dict(example)
+
+    for key in copied_keys:
+        if key in derived:
+            derived[key] = copy_value(derived[key])
+
+    return derived
+
+
+def copy_value(value):
+    if isinstance(value, list):
+        return [dict(item) if isinstance(item, dict) else item for item in value]
+
+    if isinstance(value, dict):
+        return dict(value)
+
+    return value
@@ -0,0 +1,148 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Access times are recorded by lookups in memory and written in one transaction this often
+ACCESS_FLUSH_INTERVAL = 256
+
+
+class DiskCache:
+    """
+    A size-capped key/value store in a local SQLite file with least recently used eviction.
+
+    Values are pickled, so anything the pipeline produces can be stored. Lookups never
+    write, the access times they record are saved with the next put, or in one batch
+    every ACCESS_FLUSH_INTERVAL lookups.
+    """
+
+    def __init__(self, path, max_bytes):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            "key TEXT PRIMARY KEY, value BLOB, size INTEGER, last_access REAL)"
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_access ON entries (last_access)"
+        )
+        self.conn.commit()
+
+        self.total_bytes = self.conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+
+        self.evictions = 0
+
+        # key -> last access time not yet written to the file
+        self.pending_accesses = {}
+        self.lookups_since_flush = 0
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            self.pending_accesses[key] = time.time()
+            self.lookups_since_flush += 1
+
+            if self.lookups_since_flush >= ACCESS_FLUSH_INTERVAL:
+                self.flush_accesses_locked()
+                self.conn.commit()
+
+        try:
+            return pickle.loads(row[0])
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cache entry {key}: {e}")
+            self.delete(key)
+            return None
+
+    def put(self, key, value):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+
+        if len(blob) > self.max_bytes:
+            return
+
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None:
+                self.total_bytes -= row[0]
+
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, last_access) VALUES (?, ?, ?, ?)",
+                (key, blob, len(blob), time.time()),
+            )
+            self.total_bytes += len(blob)
+            self.pending_accesses.pop(key, None)
+
+            # Eviction orders by access time, it has to see the recent lookups
+            self.flush_accesses_locked()
+            self.evict_locked()
+            self.conn.commit()
+
+    def delete(self, key):
+        with self.lock:
+            self.pending_accesses.pop(key, None)
+
+            row = self.conn.execute(
+                "SELECT size FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return
+
+            self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self.total_bytes -= row[0]
+            self.conn.commit()
+
+    def flush_accesses_locked(self):
+        self.lookups_since_flush = 0
+
+        if not self.pending_accesses:
+            return
+
+        self.conn.executemany(
+            "UPDATE entries SET last_access = ? WHERE key = ?",
+            [(accessed, key) for key, accessed in self.pending_accesses.items()],
+        )
+        self.pending_accesses.clear()
+
+    def evict_locked(self):
+        while self.total_bytes > self.max_bytes:
+            rows = self.conn.execute(
+                "SELECT key, size FROM entries ORDER BY last_access LIMIT 64"
+            ).fetchall()
+
+            if not rows:
+                self.total_bytes = 0
+                break
+
+            for key, size in rows:
+                self.conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.total_bytes -= size
+                self.evictions += 1
+                if self.total_bytes <= self.max_bytes:
+                    break
+
+    def close(self):
+        with self.lock:
+            self.flush_accesses_locked()
+            self.conn.commit()
+            self.conn.close()
@@ -1,9 +1,165 @@
 from infra.salign.util.default_config import Config
 
+from contextlib import contextmanager
+import functools
+from types import MappingProxyType
 import os
+import threading
 import yaml
 
+import logging
+
+logger = logging.getLogger(__name__)
+
+# A YAML file with settings that replace the defaults
+CONFIG_PATH_VARIABLE = "SALIGN_CONFIG"
+
+# SALIGN_MAX_ROWS_PER_QUERY=50 sets max_rows_per_query, after the YAML file
+ENVIRONMENT_PREFIX = "SALIGN_"
+
+config_snapshot = None
+config_lock = threading.Lock()
+
 
 def get_config():
-    loaded_config = {}
-    return Config(**loaded_config).dict()
+    """
+    The settings as a read-only mapping, loaded once per process.
+
+    Defaults come from `Config`, then the YAML file named by SALIGN_CONFIG, then
+    SALIGN_<SETTING> environment variables. Call `reload_config` after changing
+    any of them, or use `override_config` for settings that only apply to one run.
+    """
+    snapshot = config_snapshot
+
+    if snapshot is None:
+        with config_lock:
+            if config_snapshot is None:
+                set_config_snapshot(load_config())
+            snapshot = config_snapshot
+
+    return snapshot
+
+
+def reload_config():
+    with config_lock:
+        set_config_snapshot(load_config())
+
+    return config_snapshot
+
+
+@contextmanager
+def override_config(overrides):
+    """
+    Replace some settings until the block exits, e.g. for one solve run. Overrides nest.
+
+    The settings are replaced for the whole process, every thread reads them. Only one
+    block with different overrides can run at a time, two concurrent runs in one
+    process would overwrite each other's settings.
+    """
+    if not overrides:
+        yield get_config()
+        return
+
+    previous = get_config()
+
+    with config_lock:
+        set_config_snapshot(make_config({**previous, **overrides}))
+
+    try:
+        yield config_snapshot
+    finally:
+        with config_lock:
+            set_config_snapshot(previous)
+
+
+def load_config():
+    settings = {}
+
+    path = os.environ.get(CONFIG_PATH_VARIABLE)
+
+    if path:
+        settings.update(load_config_file(path))
+
+    settings.update(get_environment_overrides())
+
+    return make_config(settings)
+
+
+def load_config_file(path):
+    with open(path, "r") as f:
+        settings = yaml.safe_load(f) or {}
+
+    if not isinstance(settings, dict):
+        raise ValueError(f"Expected a mapping of settings in {path}")
+
+    logger.info(f"Loaded settings from {path}")
+
+    return settings
+
+
+def get_environment_overrides():
+    overrides = {}
+
+    for name in get_defaults():
+        value = os.environ.get(ENVIRONMENT_PREFIX + name.upper())
+
+        if value is not None:
+            overrides[name] = parse_setting(name, value)
+
+    return overrides
+
+
+def parse_setting(name, text):
+    """
+    The value of a setting given as text, e.g. on the command line or in the environment.
+    """
+    default = get_defaults().get(name)
+
+    # Strings are taken as they are, everything else is parsed, e.g. 50, true or {a: 1}
+    return text if isinstance(default, str) else yaml.safe_load(text)
+
+
+def make_config(settings):
+    defaults = get_defaults()
+
+    unknown = sorted(set(settings) - set(defaults))
+    if unknown:
+        logger.warning(f"Ignoring unknown settings: {unknown}")
+
+    config = Config(**{name: settings[name] for name in settings if name in defaults})
+
+    return freeze(config.dict())
+
+
+@functools.lru_cache(maxsize=None)
+def get_defaults():
+    return freeze(Config().dict())
+
+
+def freeze(value):
+    if isinstance(value, dict):
+        return MappingProxyType({key: freeze(item) for key, item in value.items()})
+
+    if isinstance(value, list):
+        return tuple(freeze(item) for item in value)
+
+    return value
+
+
+def thaw(value):
+    """
+    The settings as plain dicts and lists, e.g. to send them to another process.
+    """
+    if isinstance(value, MappingProxyType):
+        return {key: thaw(item) for key, item in value.items()}
+
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+
+    return value
+
+
+def set_config_snapshot(snapshot):
+    global config_snapshot
+
+    config_snapshot = snapshot
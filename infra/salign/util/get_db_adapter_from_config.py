@@ -1,14 +1,64 @@
-from infra.salign.sql.sqlite_adapter import SQLiteAdapter
-from infra.salign.sql.snowflake_adapter import SnowflakeAdapter
+import importlib
+import threading
+
+# Adapters by database type, imported on first use so e.g. SQLite runs never load the Snowflake connector
+DB_ADAPTERS = {
+    "sqlite": ("infra.salign.sql.sqlite_adapter", "SQLiteAdapter"),
+    "snowflake": ("infra.salign.sql.snowflake_adapter", "SnowflakeAdapter"),
+    "duckdb": ("infra.salign.sql.duckdb_adapter", "DuckDBAdapter"),
+    "postgres": ("infra.salign.sql.postgres_adapter", "PostgresAdapter"),
+    "postgresql": ("infra.salign.sql.postgres_adapter", "PostgresAdapter"),
+}
+
+# Adapters keep no per-query state, one instance per type is shared by every caller
+db_adapter_instances = {}
+db_adapters_lock = threading.Lock()
 
 
 def get_db_adapter_from_config(database_dict):
     # Try to get db_type, default to SQLiteAdapter
-    db_type = database_dict.get("type", "SQLiteAdapter").lower()
+    db_type = database_dict.get("type", "sqlite").lower()
+
+    adapter = db_adapter_instances.get(db_type)
+
+    if adapter is None:
+        with db_adapters_lock:
+            adapter = db_adapter_instances.get(db_type)
+
+            if adapter is None:
+                adapter = get_db_adapter_class(db_type)()
+                db_adapter_instances[db_type] = adapter
+
+    return adapter
+
+
+def register_db_adapter(db_type, adapter_class):
+    """
+    Use adapter_class, or a (module name, class name) pair imported on first use, for databases of db_type.
+    """
+    db_type = db_type.lower()
 
-    if db_type == "sqlite":
-        return SQLiteAdapter()
-    elif db_type == "snowflake":
-        return SnowflakeAdapter()
-    else:
+    with db_adapters_lock:
+        DB_ADAPTERS[db_type] = adapter_class
+        db_adapter_instances.pop(db_type, None)
+
+
+def get_db_adapter_class(db_type):
+    if db_type not in DB_ADAPTERS:
         raise ValueError(f"Unknown database type: {db_type}")
+
+    adapter_class = DB_ADAPTERS[db_type]
+
+    if isinstance(adapter_class, type):
+        return adapter_class
+
+    module_name, class_name = adapter_class
+
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError as e:
+        raise ImportError(
+            f"The {db_type} adapter needs a package that is not installed: {e}"
+        ) from e
+
+    return getattr(module, class_name)
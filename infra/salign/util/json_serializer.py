@@ -0,0 +1,23 @@
+from infra.salign.sql.query_result import QueryResult
+
+from decimal import Decimal
+import json
+
+
+def json_serializer(obj):
+    """
+    `default` for json.dump, for the values examples hold that JSON has no type for.
+    """
+    if isinstance(obj, Decimal):
+        return str(obj)
+    # Results are written as the rows (or error message) they stand for
+    if isinstance(obj, QueryResult):
+        return obj.to_rows()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def to_json_data(value):
+    """
+    The value as plain dicts, lists and strings, e.g. before a client serializes it.
+    """
+    return json.loads(json.dumps(value, default=json_serializer))
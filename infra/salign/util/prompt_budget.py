@@ -0,0 +1,97 @@
+from infra.salign.util.get_config import get_config
+from infra.salign.util.tokenizer import count_tokens
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class PromptBudget:
+    """
+    Splits a prompt's token budget across its sections.
+
+    Each section is offered a share of the tokens still available. Sections that need
+    less than their share take what they need and give the rest back, which is then
+    split among the sections that still want more.
+    """
+
+    def __init__(self, total_tokens, shares):
+        self.total_tokens = total_tokens
+        self.shares = shares
+
+    @classmethod
+    def from_config(cls):
+        config = get_config()
+
+        return cls(config["prompt_token_budget"], config["prompt_budget_shares"])
+
+    def allocate(self, demands, reserved_tokens=0):
+        """
+        Returns {section: granted tokens} given {section: tokens the section wants}.
+        """
+        remaining = max(self.total_tokens - reserved_tokens, 0)
+
+        grants = {}
+        active = {
+            section: demand for section, demand in demands.items() if demand > 0
+        }
+
+        for section, demand in demands.items():
+            if demand <= 0:
+                grants[section] = 0
+
+        while active:
+            share_total = sum(self.get_share(section) for section in active)
+
+            offers = {
+                section: int(remaining * self.get_share(section) / share_total)
+                for section in active
+            }
+
+            satisfied = [
+                section for section, demand in active.items() if demand <= offers[section]
+            ]
+
+            if not satisfied:
+                grants.update(offers)
+                break
+
+            for section in satisfied:
+                grants[section] = active.pop(section)
+                remaining -= grants[section]
+
+        truncated = [section for section in demands if grants[section] < demands[section]]
+
+        if truncated:
+            logger.debug(f"Prompt budget truncated sections: {truncated}")
+
+        return grants
+
+    def get_share(self, section):
+        # Sections without a configured share split evenly with the smallest one
+        return self.shares.get(section, min(self.shares.values(), default=1.0))
+
+
+def fit_fragments(fragments, max_tokens, priority=None):
+    """
+    Returns the indices of the fragments that fit in max_tokens, in their original order.
+
+    Fragments are considered in priority order (default: original order), and a
+    fragment that doesn't fit is skipped so smaller ones after it can still be used.
+    """
+    if priority is None:
+        priority = range(len(fragments))
+
+    selected = []
+    used_tokens = 0
+
+    for index in priority:
+        tokens = count_tokens(fragments[index])
+
+        if used_tokens + tokens > max_tokens:
+            continue
+
+        selected.append(index)
+        used_tokens += tokens
+
+    return sorted(selected)
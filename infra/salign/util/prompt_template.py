@@ -19,12 +19,16 @@ class PromptTemplate:
         return cls._instance
 
 class LlamaPromptTemplate:
+    tokenizer_name = "meta-llama/Llama-3.1-8B-Instruct"
+
     def user(self):
         return "<|begin_of_text|><|start_header_id|>user<|end_header_id|>"
     def assistant(self):
         return "<|eot_id|><|start_header_id|>assistant<|end_header_id|>"
 
 class QwenPromptTemplate:
+    tokenizer_name = "Qwen/Qwen3-30B-A3B"
+
     def user(self):
         return "<|im_start|>user\n"
     def assistant(self):
@@ -0,0 +1,130 @@
+from infra.salign.util.get_config import get_config
+from infra.salign.util.prompt_template import PromptTemplate
+
+import functools
+import os
+import threading
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Used when no tokenizer can be loaded, close enough for English and SQL
+CHARACTERS_PER_TOKEN = 4
+
+tokenizer = None
+tokenizer_lock = threading.Lock()
+
+
+def get_tokenizer():
+    """
+    Load the base model's tokenizer once, or return None to fall back to estimating.
+
+    The tokenizer name comes from `tokenizer_name` in the config if set, otherwise from
+    the PromptTemplate of the base model. It is read from the tokenizer.json file at
+    `tokenizer_path` if set, otherwise from a copy saved in `tokenizer_cache_path` the
+    first time it was downloaded, so later runs work offline and without a token for
+    gated models. `transformers` is an optional fallback for names `tokenizers` can't load.
+    """
+    global tokenizer
+
+    with tokenizer_lock:
+        if tokenizer is None:
+            tokenizer = load_tokenizer()
+
+        return tokenizer if tokenizer is not False else None
+
+
+def load_tokenizer():
+    config = get_config()
+
+    name = config["tokenizer_name"] or PromptTemplate().tokenizer_name
+    path = config["tokenizer_path"] or get_saved_tokenizer_path(name)
+
+    try:
+        from tokenizers import Tokenizer
+
+        if os.path.exists(path):
+            loaded = Tokenizer.from_file(path)
+        else:
+            loaded = Tokenizer.from_pretrained(name)
+            save_tokenizer(loaded, path)
+
+        return lambda text: len(loaded.encode(text, add_special_tokens=False).ids)
+    except Exception as e:
+        logger.debug(f"Could not load {name} with tokenizers: {e}")
+
+    try:
+        from transformers import AutoTokenizer
+
+        loaded = AutoTokenizer.from_pretrained(name)
+        return lambda text: len(loaded.encode(text, add_special_tokens=False))
+    except Exception as e:
+        logger.debug(f"Could not load {name} with transformers: {e}")
+
+    logger.warning(
+        f"No tokenizer available for {name}, estimating {CHARACTERS_PER_TOKEN} characters per token. "
+        f"Set tokenizer_path to a local tokenizer.json to count tokens exactly."
+    )
+
+    return False
+
+
+def get_saved_tokenizer_path(name):
+    config = get_config()
+
+    return os.path.join(config["tokenizer_cache_path"], name.replace("/", "--") + ".json")
+
+
+def save_tokenizer(loaded, path):
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        loaded.save(path)
+    except Exception as e:
+        logger.warning(f"Could not save the tokenizer to {path}: {e}")
+
+
+@functools.lru_cache(maxsize=65536)
+def count_tokens(text):
+    """
+    Number of tokens in text, cached because schema and insight fragments repeat across prompts.
+
+    Text that is only counted once, e.g. a rendered query result, goes to count_tokens_uncached.
+    """
+    return count_tokens_uncached(text)
+
+
+def count_tokens_uncached(text):
+    if not text:
+        return 0
+
+    encode = get_tokenizer()
+
+    if encode is None:
+        return (len(text) + CHARACTERS_PER_TOKEN - 1) // CHARACTERS_PER_TOKEN
+
+    return encode(text)
+
+
+def truncate_to_tokens(text, max_tokens, keep_end=False):
+    """
+    The longest prefix of text with at most max_tokens tokens, or the longest suffix if keep_end.
+    """
+    # The text being truncated is rarely counted again, keep it out of the cache
+    if count_tokens_uncached(text) <= max_tokens:
+        return text
+
+    def cut(length):
+        return text[len(text) - length :] if keep_end else text[:length]
+
+    low, high = 0, len(text)
+
+    while low < high:
+        middle = (low + high + 1) // 2
+        # Prefixes are never reused, keep them out of the cache
+        if count_tokens_uncached(cut(middle)) <= max_tokens:
+            low = middle
+        else:
+            high = middle - 1
+
+    return cut(low)
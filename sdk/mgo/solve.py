@@ -1,5 +1,9 @@
 from infra.salign import SuperAligner
 from infra.salign.reasoning_prompts.english_reasoning_prompt import EnglishReasoningPrompt
+from infra.salign.sql.build_local_mirror import build_local_mirror
+from infra.salign.sql.schema_index import rank_by_relevance
+from infra.salign.util.get_config import get_config, override_config
+from infra.salign.util.json_serializer import json_serializer
 
 import json
 import logging
@@ -7,24 +11,42 @@ import os
 
 logger = logging.getLogger(__name__)
 
-def run():
-    solve()
+def run(resume=False, config_overrides=None):
+    solve(resume=resume, config_overrides=config_overrides)
 
-def solve():
+def solve(resume=False, config_overrides=None):
     setup_logging()
     
     db_name = "MGO"
 
-    saligner = SuperAligner(llm=load_llm(db_name))
-    saligner.connect(load_database(db_name))
-    saligner.align_prompt(get_alignment_prompt())
-    saligner.load_problems(load_problems(db_name))
-    saligner.learn_reasoners(load_reasoners())
+    # Loading the problems links their schemas, the overrides have to apply to it as well
+    with override_config(config_overrides):
+        saligner = SuperAligner(llm=load_llm(db_name))
+        saligner.connect(load_database(db_name))
+        saligner.align_prompt(get_alignment_prompt())
+        saligner.load_problems(load_problems(db_name))
+        saligner.learn_reasoners(load_reasoners())
 
-    model = saligner.solve()
+        model = saligner.solve(resume=resume)
 
-    logger.info("Solve completed successfully.")
-    save_llm(model, db_name)
+        logger.info("Solve completed successfully.")
+        save_llm(model, db_name)
+
+
+def build_mirror(config_overrides=None):
+    """
+    Extract the tables the problems read into a local mirror, runs with local_mirror_enabled explore on it.
+    """
+    setup_logging()
+
+    db_name = "MGO"
+
+    with override_config(config_overrides):
+        problems = load_problems(db_name)
+
+        build_local_mirror(
+            load_database(db_name), [problem["reference_sql"] for problem in problems]
+        )
 
 
 def load_reasoners():
@@ -62,14 +84,14 @@ def load_problems(db_name):
 
     questions = data["Queries"]
     
-    schema = format_schema(data["Schema"])
-    
     for item in questions:
         example = {}
         
         example["question"] = item["Question"]
         example["reference_sql"] = item["Original Query"]
-        example["db_profile"] = schema
+        example["db_profile"] = format_schema(
+            select_relevant_columns(data["Schema"], item["Question"])
+        )
 
         example["database"] = load_database(db_name)
 
@@ -87,11 +109,57 @@ def save_llm(model_config, db_name):
 
     try:
         with open(model_path, "w") as file:
-            json.dump(model_config, file, indent=4)
+            json.dump(model_config, file, indent=4, default=json_serializer)
         logger.info(f"Saved LLM model configuration to {model_path}.")
     except Exception as e:
         logger.error(f"Failed to save LLM model configuration to {model_path}: {e}")
         
+def select_relevant_columns(schema_json, question):
+    """
+    Keep the columns most relevant to the question, in their original table and column order.
+    """
+    columns = [
+        (table_index, column_index)
+        for table_index, table in enumerate(schema_json)
+        for column_index in range(len(table["columns"]))
+    ]
+
+    documents = [
+        get_column_document(schema_json[t], schema_json[t]["columns"][c]) for t, c in columns
+    ]
+
+    top_columns = get_config()["schema_linking_top_columns"]
+
+    selected = set(rank_by_relevance(columns, documents, question, top_k=top_columns))
+
+    relevant_schema = []
+    for table_index, table in enumerate(schema_json):
+        relevant_columns = [
+            column
+            for column_index, column in enumerate(table["columns"])
+            if (table_index, column_index) in selected
+        ]
+        if relevant_columns:
+            relevant_schema.append({**table, "columns": relevant_columns})
+
+    return relevant_schema
+
+
+def get_column_document(table, column):
+    return " ".join(
+        str(part)
+        for part in (
+            table["table_name"],
+            table.get("table_description", ""),
+            column["column_name"],
+            column["column_type"],
+            column.get("column_description", ""),
+            column.get("sample_values", ""),
+        )
+        if part
+    )
+
+
 def format_schema(schema_json):
     output = []
     for table in schema_json:
@@ -1,3 +1,9 @@
+from infra.salign.engine.results_index import (
+    RESULTS_INDEX_FILENAME,
+    ResultsIndex,
+)
+from infra.salign.engine.results_store import load_summaries
+
 import os
 import json
 from collections import defaultdict
@@ -25,31 +31,83 @@ def parse_filename(filename):
     except ValueError:
         return None
 
+    return short_model_name(model), db, solve_step
+
+
+def parse_summary_filename(filename):
+    """
+    Parse a filename in the form <model_name>_<database_name>_eval_summary.jsonl.
+    Returns (model_name, database_name) or None if not a match.
+    """
+    suffix = "_eval_summary.jsonl"
+    if not filename.endswith(suffix):
+        return None
+    pre = filename[: -len(suffix)]
+    if "_" not in pre:
+        return None
+    model, db = pre.split("_", 1)
+
+    return short_model_name(model), db
+
+
+def short_model_name(model):
     model = model[:7]
     if model == "None":
         model = "base"
-
-    return model, db, solve_step
+    return model
 
 
-def plot_accuracy_by_database(results_dir="data/results", output_dir="plots"):
-    """
-    Scans result files and generates line plots (with markers) of model accuracy over solve steps.
-    One plot per database, y-axis = accuracy (%), x-axis = solve step (iteration).
-    Each model is indicated by a line with markers.
-    Output files are named <database_name>.jpg.
+def iterate_accuracies(results_dir="data/results"):
     """
+    Yields (model_name, database_name, solve_step, accuracy %) for every saved solve step.
 
-    # database -> model -> {solve_step: accuracy}
-    data = defaultdict(lambda: defaultdict(dict))
+    Queries the results index the engine updates on every save, then reads runs that
+    are not in the index from their summary files or legacy
+    <model>_<db>_eval_results_<step>.json dumps.
+    """
+    indexed_runs = set()
+
+    index_path = os.path.join(results_dir, RESULTS_INDEX_FILENAME)
+    if os.path.exists(index_path):
+        index = ResultsIndex(index_path)
+        try:
+            rows = index.get_step_accuracies()
+        finally:
+            index.close()
+
+        for model_name, db_name, step, total, accuracy in rows:
+            indexed_runs.add((model_name, db_name))
+            if total == 0:
+                continue
+            yield short_model_name(model_name), db_name, step, 100 * accuracy
 
     for filename in os.listdir(results_dir):
+        filepath = os.path.join(results_dir, filename)
+
+        if filename.endswith("_eval_summary.jsonl"):
+            run = tuple(filename[: -len("_eval_summary.jsonl")].split("_", 1))
+            if run in indexed_runs:
+                continue
+
+        parsed = parse_summary_filename(filename)
+        if parsed:
+            model_name, db_name = parsed
+            try:
+                summaries = load_summaries(filepath)
+            except Exception as e:
+                print(f"Could not read {filename}: {e}")
+                continue
+            for summary in summaries:
+                if summary["total"] == 0:
+                    continue
+                yield model_name, db_name, summary["step"], 100 * summary["accuracy"]
+            continue
+
         parsed = parse_filename(filename)
         if not parsed:
             continue
         model_name, db_name, solve_step = parsed
 
-        filepath = os.path.join(results_dir, filename)
         with open(filepath, "r") as f:
             try:
                 results = json.load(f)
@@ -58,12 +116,26 @@ def plot_accuracy_by_database(results_dir="data/results", output_dir="plots"):
                 continue
 
         total = len(results)
-        
+
         if total == 0:
             continue
         num_correct = sum(1 for entry in results if "score" in entry and entry.get("score", 0) >= 1.0)
-        accuracy = 100 * num_correct / total
 
+        yield model_name, db_name, solve_step, 100 * num_correct / total
+
+
+def plot_accuracy_by_database(results_dir="data/results", output_dir="plots"):
+    """
+    Scans result files and generates line plots (with markers) of model accuracy over solve steps.
+    One plot per database, y-axis = accuracy (%), x-axis = solve step (iteration).
+    Each model is indicated by a line with markers.
+    Output files are named <database_name>.jpg.
+    """
+
+    # database -> model -> {solve_step: accuracy}
+    data = defaultdict(lambda: defaultdict(dict))
+
+    for model_name, db_name, solve_step, accuracy in iterate_accuracies(results_dir):
         data[db_name][model_name][solve_step] = accuracy
 
     # Plot for each database
@@ -90,32 +162,15 @@ def plot_grouped_bar_highest_accuracy(results_dir="data/results", output_dir="pl
 
     # {database: {model: [accuracies at different steps]}}
     data = {}
-    for filename in os.listdir(results_dir):
-        parsed = parse_filename(filename)
-        if not parsed:
-            continue
-        model, db, _ = parsed
-
-        filepath = os.path.join(results_dir, filename)
-        with open(filepath, "r") as f:
-            try:
-                results = json.load(f)
-            except Exception as e:
-                print(f"Error reading {filename}: {e}")
-                continue
-        total = len(results)
-        if total == 0:
-            continue
-        num_correct = sum(1 for entry in results if "score" in entry and entry.get("score", 0) >= 1.0)
-        acc = 100 * num_correct / total
+    for model, db, _, acc in iterate_accuracies(results_dir):
         data.setdefault(db, {}).setdefault(model, []).append(acc)
 
-        # Compute max accuracy for each model within each database
-        max_acc = {}
-        for db, models in data.items():
-            max_acc[db] = {
-                model: max(accuracies) for model, accuracies in models.items()
-            }
+    # Compute max accuracy for each model within each database
+    max_acc = {}
+    for db, models in data.items():
+        max_acc[db] = {
+            model: max(accuracies) for model, accuracies in models.items()
+        }
 
     # Collect list of databases and models (in sorted order)
     db_names = sorted(max_acc)
@@ -150,24 +205,7 @@ def plot_grouped_bar_highest_accuracy(results_dir="data/results", output_dir="pl
 def get_max_accuracy_for_db(results_dir="data/results"):
     # {database: [accuracies]}
     db_acc = {}
-    for filename in os.listdir(results_dir):
-        parsed = parse_filename(filename)
-        if not parsed:
-            continue
-        model, db, _ = parsed
-
-        filepath = os.path.join(results_dir, filename)
-        with open(filepath, "r") as f:
-            try:
-                results = json.load(f)
-            except Exception as e:
-                print(f"Error reading {filename}: {e}")
-                continue
-        total = len(results)
-        if total == 0:
-            continue
-        num_correct = sum(1 for entry in results if entry.get("score", 0) >= 1.0)
-        acc = 100 * num_correct / total
+    for _, db, _, acc in iterate_accuracies(results_dir):
         db_acc.setdefault(db, []).append(acc)
 
     # Compute the max accuracy for each database
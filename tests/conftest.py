@@ -0,0 +1,19 @@
+from infra.salign.util.get_config import override_config
+
+import pytest
+
+
+@pytest.fixture
+def config(tmp_path):
+    """
+    Settings for one test, with nothing cached between tests or written into the repository.
+    """
+    with override_config(
+        {
+            "query_cache_enabled": False,
+            "schema_cache_path": str(tmp_path / "schema.sqlite"),
+            "profile_cache_path": str(tmp_path / "profiles.sqlite"),
+            "local_mirror_path": str(tmp_path / "mirrors"),
+        }
+    ) as settings:
+        yield settings
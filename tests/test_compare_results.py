@@ -0,0 +1,160 @@
+from infra.salign.sql.result_fingerprint import ResultFingerprint
+from infra.salign.superalignment.text2sql import compare_pandas_table, compare_results
+
+import math
+import random
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+# Values whose str() ordering differs between int and float, text and number, None and NaN
+VALUES = [
+    0, 1, -1, 2, 10, 1.0, -1.0, 2.0, 10.0, 1.005, 2.5, 1e16,
+    "1", "1.0", "-1", "a", "nan", "zzz", "None",
+    None, float("nan"), True, False,
+]
+
+
+def original_compare_pandas_table(pred, gold, condition_cols=[], ignore_order=False):
+    """
+    compare_pandas_table before columns were canonicalized, the scores it gave are kept.
+    """
+
+    def vectors_match(v1, v2, tol=1e-2, ignore_order_=False):
+        try:
+            if ignore_order_:
+                v1, v2 = (
+                    sorted(v1, key=lambda x: (x is None, str(x), isinstance(x, (int, float)))),
+                    sorted(v2, key=lambda x: (x is None, str(x), isinstance(x, (int, float)))),
+                )
+            if len(v1) != len(v2):
+                return False
+            for a, b in zip(v1, v2):
+                if pd.isna(a) and pd.isna(b):
+                    continue
+                elif isinstance(a, (int, float)) and isinstance(b, (int, float)):
+                    if not math.isclose(float(a), float(b), abs_tol=tol):
+                        return False
+                elif a != b:
+                    return False
+            return True
+        except Exception:
+            return False
+
+    score = 0
+    try:
+        gold_cols = gold.iloc[:, condition_cols] if condition_cols != [] else gold
+
+        t_gold_list = gold_cols.transpose().values.tolist()
+        t_pred_list = pred.transpose().values.tolist()
+
+        score = 1
+        for gold_column in t_gold_list:
+            if not any(
+                vectors_match(gold_column, pred_column, ignore_order_=ignore_order)
+                for pred_column in t_pred_list
+            ):
+                score = 0
+    except Exception:
+        pass
+
+    return score
+
+
+def original_compare_results(reference_result, generated_result, example):
+    return original_compare_pandas_table(
+        pd.DataFrame(generated_result),
+        pd.DataFrame(reference_result),
+        condition_cols=example["eval_criteria"]["condition_cols"],
+        ignore_order=example["eval_criteria"]["ignore_order"],
+    )
+
+
+def make_example(ignore_order=True, condition_cols=[]):
+    return {"eval_criteria": {"condition_cols": condition_cols, "ignore_order": ignore_order}}
+
+
+@pytest.mark.parametrize(
+    "reference, generated, ignore_order, score",
+    [
+        # Sorted by str(), 1 lands before the text "1.0" and 1.0 after it
+        ([("1.0",), (None,), (-1,), (1,)], [("1.0",), (None,), (-1.0,), (1.0,)], True, 0),
+        ([("zzz",), (None,), (-1,)], [("zzz",), (float("nan"),), (-1,)], True, 0),
+        ([("1.0",), (None,), (-1,), (1,)], [("1.0",), (None,), (-1.0,), (1.0,)], False, 1),
+        ([(1, "a"), (2, "b")], [(2.0, "b"), (1.0, "a")], True, 1),
+        ([(1, "a"), (2, "b")], [(2.0, "b"), (1.0, "a")], False, 0),
+        ([(1.0,), (2.0,)], [(1.004,), (2.0,)], True, 1),
+        ([(1.0,), (2.0,)], [(1.02,), (2.0,)], True, 0),
+    ],
+)
+def test_scores(reference, generated, ignore_order, score):
+    example = make_example(ignore_order)
+
+    assert original_compare_results(reference, generated, example) == score
+    assert int(compare_results(reference, generated, example)) == score
+
+
+def make_case(rng):
+    columns = rng.randint(1, 2)
+    reference = [
+        tuple(rng.choice(VALUES) for _ in range(columns)) for _ in range(rng.randint(0, 5))
+    ]
+
+    generated = [tuple(change_value(value, rng) for value in row) for row in reference]
+    if rng.random() < 0.5:
+        rng.shuffle(generated)
+
+    example = make_example(rng.random() < 0.7, rng.choice([[], [0]]))
+
+    return reference, generated, example
+
+
+def change_value(value, rng):
+    r = rng.random()
+
+    if r < 0.5 or isinstance(value, bool):
+        return value
+    if isinstance(value, int) and r < 0.7:
+        return float(value)
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15 and r < 0.7:
+        return int(value)
+    if isinstance(value, (int, float)) and r < 0.8:
+        return value + rng.choice([0.001, -0.001, 0.5])
+    if value is None and r < 0.8:
+        return float("nan")
+    if r < 0.85:
+        return str(value)
+
+    return rng.choice(VALUES)
+
+
+def test_scores_match_original_comparison():
+    rng = random.Random(0)
+
+    for _ in range(1000):
+        reference, generated, example = make_case(rng)
+
+        expected = original_compare_results(reference, generated, example)
+
+        assert int(compare_results(reference, generated, example)) == expected, (
+            reference,
+            generated,
+            example,
+        )
+        assert (
+            compare_pandas_table(
+                pd.DataFrame(generated),
+                pd.DataFrame(reference),
+                **example["eval_criteria"],
+            )
+            == expected
+        ), (reference, generated, example)
+
+
+def test_fingerprint_leaves_mixed_text_columns_undecided():
+    reference = ResultFingerprint.from_result([("1.0",), (None,), (-1,), (1,)])
+    generated = ResultFingerprint.from_result([("1.0",), (None,), (-1.0,), (1.0,)])
+
+    assert reference.matches(generated, ignore_order=True) is None
+    assert reference.matches(generated, ignore_order=False) is True
@@ -0,0 +1,79 @@
+from infra.salign.sql.execute_query import execute_query
+from infra.salign.sql.get_full_db_profile import get_table_statistics, make_table_profile
+from infra.salign.util.get_db_adapter_from_config import get_db_adapter_from_config
+
+import pytest
+
+duckdb = pytest.importorskip("duckdb")
+
+
+@pytest.fixture
+def database(tmp_path, config):
+    path = str(tmp_path / "test.duckdb")
+
+    # Keywords as names, profiling and queries have to quote them
+    with duckdb.connect(path) as conn:
+        conn.execute('CREATE TABLE "order" ("select" INTEGER, name VARCHAR)')
+        conn.execute("""INSERT INTO "order" VALUES (1, 'a'), (2, 'b'), (2, NULL)""")
+        conn.execute("CREATE SCHEMA sales")
+        conn.execute("CREATE TABLE sales.Items (item_id INTEGER, price DECIMAL(10, 2))")
+        conn.execute("INSERT INTO sales.Items VALUES (1, 9.99)")
+
+    return {"type": "duckdb", "path": path, "db_id": "test"}
+
+
+def test_execute_query(database):
+    result, failed = execute_query(
+        {"database": database}, 'SELECT "select", name FROM "order" ORDER BY "select", name'
+    )
+
+    assert not failed
+    assert result.column_names == ("select", "name")
+    assert [tuple(row) for row in result.to_rows()] == [(1, "a"), (2, "b"), (2, None)]
+
+
+def test_decimals_are_floats(database):
+    result, failed = execute_query({"database": database}, "SELECT price FROM sales.Items")
+
+    assert not failed
+    assert [tuple(row) for row in result.to_rows()] == [(9.99,)]
+
+
+def test_connections_are_read_only(database):
+    result, failed = execute_query({"database": database}, 'DELETE FROM "order"')
+
+    assert failed
+    assert "read-only" in result.error.lower()
+
+
+def test_get_table_info(database):
+    table_info = get_db_adapter_from_config(database).get_table_info(database)
+
+    assert table_info == {
+        "order": [
+            {"column": '"select"', "type": "INTEGER"},
+            {"column": '"name"', "type": "VARCHAR"},
+        ],
+        "sales.Items": [
+            {"column": '"item_id"', "type": "INTEGER"},
+            {"column": '"price"', "type": "DECIMAL(10,2)"},
+        ],
+    }
+
+
+def test_table_statistics(database):
+    db_adapter = get_db_adapter_from_config(database)
+
+    for table_name, columns in db_adapter.get_table_info(database).items():
+        statistics = get_table_statistics(database, table_name, columns)
+
+        assert statistics is not None, table_name
+
+    columns = db_adapter.get_table_info(database)["order"]
+    profile = make_table_profile(
+        "order", columns, get_table_statistics(database, "order", columns)
+    )
+
+    assert profile["sampled_rows"] == 3
+    assert [column["distinct_count"] for column in profile["columns"]] == [2, 2]
+    assert [column["non_null_count"] for column in profile["columns"]] == [3, 2]
@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that are only needed once a run reaches the code that uses them
+HEAVY_MODULES = (
+    "duckdb",
+    "numpy",
+    "pandas",
+    "pyarrow",
+    "scalarlm",
+    "sklearn",
+    "snowflake",
+    "sqlglot",
+    "tokenizers",
+)
+
+# Generous enough for a slow machine, importing all of the above takes several times this
+MAX_IMPORT_SECONDS = 1.0
+
+
+def import_in_subprocess(module):
+    code = (
+        "import sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"loaded = [name for name in {HEAVY_MODULES!r} if name in sys.modules]\n"
+        "print(elapsed, *loaded)\n"
+    )
+
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=REPO_ROOT,
+        env={**os.environ, "PYTHONPATH": REPO_ROOT},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    elapsed, *loaded = result.stdout.split()
+
+    return float(elapsed), loaded
+
+
+@pytest.mark.parametrize(
+    "module",
+    # cli.main runs the CLI when imported, its commands are what it imports
+    [
+        "infra.salign",
+        "infra.salign.cli.mirror",
+        "infra.salign.cli.solve",
+        "infra.salign.super_aligner",
+    ],
+)
+def test_import_does_not_load_heavy_modules(module):
+    elapsed, loaded = import_in_subprocess(module)
+
+    assert loaded == []
+    assert elapsed < MAX_IMPORT_SECONDS
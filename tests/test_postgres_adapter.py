@@ -0,0 +1,118 @@
+from infra.salign.sql.execute_query import execute_query
+from infra.salign.sql.get_full_db_profile import get_table_statistics, make_table_profile
+from infra.salign.util.get_db_adapter_from_config import get_db_adapter_from_config
+
+import os
+import uuid
+
+import pytest
+
+# A libpq connection string for a scratch database, e.g. postgresql://localhost/salign_test
+POSTGRES_DSN = os.environ.get("SALIGN_TEST_POSTGRES_DSN")
+
+pytestmark = pytest.mark.skipif(
+    not POSTGRES_DSN, reason="SALIGN_TEST_POSTGRES_DSN is not set"
+)
+
+
+@pytest.fixture
+def schema_name():
+    """
+    A schema of its own for each test, dropped again afterwards.
+    """
+    psycopg = pytest.importorskip("psycopg")
+
+    name = f"salign_test_{uuid.uuid4().hex[:12]}"
+
+    with psycopg.connect(POSTGRES_DSN, autocommit=True) as conn:
+        conn.execute(f"CREATE SCHEMA {name}")
+        # Keywords as names, profiling and queries have to quote them
+        conn.execute(f'CREATE TABLE {name}."order" ("select" INTEGER, name VARCHAR(16))')
+        conn.execute(f"""INSERT INTO {name}."order" VALUES (1, 'a'), (2, 'b'), (2, NULL)""")
+        conn.execute(f'CREATE TABLE {name}."Items" (item_id INTEGER, price NUMERIC(10, 2))')
+        conn.execute(f'INSERT INTO {name}."Items" VALUES (1, 9.99)')
+
+    yield name
+
+    with psycopg.connect(POSTGRES_DSN, autocommit=True) as conn:
+        conn.execute(f"DROP SCHEMA {name} CASCADE")
+
+
+@pytest.fixture
+def database(config):
+    return {"type": "postgres", "dsn": POSTGRES_DSN, "db_id": "test"}
+
+
+def get_test_table_info(database, schema_name):
+    table_info = get_db_adapter_from_config(database).get_table_info(database)
+
+    return {
+        table_name: columns
+        for table_name, columns in table_info.items()
+        if table_name.startswith(schema_name + ".")
+    }
+
+
+def test_execute_query(database, schema_name):
+    result, failed = execute_query(
+        {"database": database},
+        f'SELECT "select", name FROM {schema_name}."order" ORDER BY "select", name',
+    )
+
+    assert not failed
+    assert result.column_names == ("select", "name")
+    assert [tuple(row) for row in result.to_rows()] == [(1, "a"), (2, "b"), (2, None)]
+
+
+def test_decimals_are_floats(database, schema_name):
+    result, failed = execute_query(
+        {"database": database}, f'SELECT price FROM {schema_name}."Items"'
+    )
+
+    assert not failed
+    assert [tuple(row) for row in result.to_rows()] == [(9.99,)]
+
+
+def test_failed_query_does_not_break_the_connection(database, schema_name):
+    result, failed = execute_query({"database": database}, "SELECT missing_column FROM nowhere")
+
+    assert failed
+
+    # The pooled connection is rolled back, its next query runs normally
+    result, failed = execute_query(
+        {"database": database}, f'SELECT COUNT(*) FROM {schema_name}."order"'
+    )
+
+    assert not failed
+    assert [tuple(row) for row in result.to_rows()] == [(3,)]
+
+
+def test_get_table_info(database, schema_name):
+    assert get_test_table_info(database, schema_name) == {
+        f"{schema_name}.Items": [
+            {"column": '"item_id"', "type": "integer"},
+            {"column": '"price"', "type": "numeric(10,2)"},
+        ],
+        f"{schema_name}.order": [
+            {"column": '"select"', "type": "integer"},
+            {"column": '"name"', "type": "character varying(16)"},
+        ],
+    }
+
+
+def test_table_statistics(database, schema_name):
+    table_info = get_test_table_info(database, schema_name)
+
+    for table_name, columns in table_info.items():
+        assert get_table_statistics(database, table_name, columns) is not None, table_name
+
+    table_name = f"{schema_name}.order"
+    profile = make_table_profile(
+        table_name,
+        table_info[table_name],
+        get_table_statistics(database, table_name, table_info[table_name]),
+    )
+
+    assert profile["sampled_rows"] == 3
+    assert [column["distinct_count"] for column in profile["columns"]] == [2, 2]
+    assert [column["non_null_count"] for column in profile["columns"]] == [3, 2]